@@ -0,0 +1,87 @@
+from datetime import date
+from typing import Any, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from app.models.analytics import (
+    BacklogResponse,
+    ResolutionTimeResponse,
+    ThroughputResponse,
+)
+from app.services import analytics
+from app.services.auth import get_current_user_from_token
+from app.services.rate_limit import rate_limit
+from app.services.replicas import get_read_client
+
+security = HTTPBearer()
+
+router = APIRouter(
+    prefix="/analytics",
+    tags=["analytics"],
+    dependencies=[Depends(rate_limit)],
+)
+
+
+@router.get("/throughput", response_model=ThroughputResponse)
+async def get_throughput(
+    start: date | None = None,
+    end: date | None = None,
+    priority: str | None = None,
+    location_id: str | None = None,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: dict[str, Any] = Depends(get_current_user_from_token),
+) -> ThroughputResponse:
+    """Work orders opened and closed per day (defaults to the last 30 days)."""
+    start, end = analytics.resolve_range(start, end)
+    supabase = get_read_client(credentials.credentials, current_user["id"])
+
+    try:
+        return analytics.throughput(supabase, start, end, priority, location_id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch throughput: {str(e)}",
+        ) from e
+
+
+@router.get("/resolution-time", response_model=ResolutionTimeResponse)
+async def get_resolution_time(
+    start: date | None = None,
+    end: date | None = None,
+    location_id: str | None = None,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: dict[str, Any] = Depends(get_current_user_from_token),
+) -> ResolutionTimeResponse:
+    """Mean time to resolution of work orders completed in the date range."""
+    start, end = analytics.resolve_range(start, end)
+    supabase = get_read_client(credentials.credentials, current_user["id"])
+
+    try:
+        return analytics.resolution_time(supabase, start, end, location_id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch resolution time: {str(e)}",
+        ) from e
+
+
+@router.get("/backlog", response_model=BacklogResponse)
+async def get_backlog(
+    group_by: list[Literal["priority", "location"]] = Query(["priority"]),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: dict[str, Any] = Depends(get_current_user_from_token),
+) -> BacklogResponse:
+    """Open work orders and their mean age, by priority and/or location.
+
+    Repeat `group_by` to group by both.
+    """
+    supabase = get_read_client(credentials.credentials, current_user["id"])
+
+    try:
+        return analytics.backlog(supabase, dict.fromkeys(group_by))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch backlog: {str(e)}",
+        ) from e
@@ -0,0 +1,278 @@
+from typing import Any
+from urllib.parse import quote
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
+from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from app.models.attachments import Attachment, AttachmentsResponse
+from app.services import attachments
+from app.services.archive import ARCHIVE_TABLE
+from app.services.attachments import ATTACHMENTS_TABLE
+from app.services.auth import get_current_user_from_token
+from app.services.rate_limit import rate_limit
+from app.services.replicas import get_read_client, track_writes
+from app.services.storage import StorageBackend, get_storage
+from app.services.supabase import get_supabase_client
+from app.services.thumbnails import THUMBNAIL_CONTENT_TYPE
+
+security = HTTPBearer()
+
+router = APIRouter(
+    prefix="/work-orders/{work_order_id}/attachments",
+    tags=["attachments"],
+    dependencies=[Depends(rate_limit), Depends(track_writes)],
+)
+
+ATTACHMENT_COLUMNS = (
+    "id, work_order_id, filename, content_type, size_bytes, sha256,"
+    " storage_key, thumbnail_key, uploaded_by_user_id, created_at"
+)
+
+
+def _to_attachment(row: dict[str, Any]) -> Attachment:
+    return Attachment(**row, has_thumbnail=row.get("thumbnail_key") is not None)
+
+
+def _get_attachment_row(
+    supabase: Any, work_order_id: str, attachment_id: str
+) -> dict[str, Any]:
+    response = (
+        supabase.table(ATTACHMENTS_TABLE)
+        .select(ATTACHMENT_COLUMNS)
+        .eq("id", attachment_id)
+        .eq("work_order_id", work_order_id)
+        .maybe_single()
+        .execute()
+    )
+    if not (response and response.data):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Attachment not found"
+        )
+    row: dict[str, Any] = response.data
+    return row
+
+
+@router.post("", response_model=Attachment, status_code=status.HTTP_201_CREATED)
+async def upload_attachment(
+    work_order_id: str,
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: dict[str, Any] = Depends(get_current_user_from_token),
+    storage: StorageBackend = Depends(get_storage),
+) -> Attachment:
+    """Upload a file (multipart form field `file`) to a work order.
+
+    The body is streamed to storage as it arrives, so large photos are never
+    held in memory. Images get a thumbnail, rendered in a worker process.
+    """
+    supabase = get_supabase_client()
+    supabase.auth.set_session(credentials.credentials, "")
+
+    try:
+        check_response = (
+            supabase.table("work_orders")
+            .select("id")
+            .eq("id", work_order_id)
+            .maybe_single()
+            .execute()
+        )
+        if not (check_response and check_response.data):
+            # Archived work orders are read-only, attachments included
+            archived_response = (
+                supabase.table(ARCHIVE_TABLE)
+                .select("id")
+                .eq("id", work_order_id)
+                .maybe_single()
+                .execute()
+            )
+            if archived_response and archived_response.data:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Archived work orders can't take new attachments",
+                )
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Work order not found or not accessible",
+            )
+
+        row = await attachments.store_upload(
+            storage,
+            work_order_id,
+            request.headers.get("content-type", ""),
+            request.stream(),
+        )
+        row["uploaded_by_user_id"] = current_user["id"]
+
+        try:
+            insert_response = supabase.table(ATTACHMENTS_TABLE).insert(row).execute()
+        except Exception:
+            await attachments.delete_blobs(storage, row)
+            raise
+
+        if not insert_response.data:
+            await attachments.delete_blobs(storage, row)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to create attachment",
+            )
+
+        return _to_attachment(insert_response.data[0])
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to upload attachment: {str(e)}",
+        ) from e
+
+
+@router.get("", response_model=AttachmentsResponse)
+async def get_attachments(
+    work_order_id: str,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: dict[str, Any] = Depends(get_current_user_from_token),
+) -> AttachmentsResponse:
+    """List a work order's attachments, newest first."""
+    supabase = get_read_client(credentials.credentials, current_user["id"])
+
+    try:
+        response = (
+            supabase.table(ATTACHMENTS_TABLE)
+            .select(ATTACHMENT_COLUMNS)
+            .eq("work_order_id", work_order_id)
+            .order("created_at", desc=True)
+            .execute()
+        )
+        return AttachmentsResponse(
+            data=[_to_attachment(row) for row in response.data or []]
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch attachments: {str(e)}",
+        ) from e
+
+
+@router.get(
+    "/{attachment_id}",
+    response_class=StreamingResponse,
+    responses={206: {"description": "Partial content"}},
+)
+async def download_attachment(
+    work_order_id: str,
+    attachment_id: str,
+    thumbnail: bool = Query(False, description="Download the image thumbnail"),
+    range_header: str | None = Header(None, alias="Range"),
+    if_range: str | None = Header(None),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: dict[str, Any] = Depends(get_current_user_from_token),
+    storage: StorageBackend = Depends(get_storage),
+) -> StreamingResponse:
+    """Download an attachment.
+
+    Supports single `Range` requests (206 Partial Content), e.g. to resume an
+    interrupted download; the file is streamed from storage in chunks.
+    """
+    supabase = get_read_client(credentials.credentials, current_user["id"])
+
+    try:
+        row = _get_attachment_row(supabase, work_order_id, attachment_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch attachment: {str(e)}",
+        ) from e
+
+    if thumbnail:
+        if not row.get("thumbnail_key"):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Attachment has no thumbnail",
+            )
+        return StreamingResponse(
+            storage.read(row["thumbnail_key"]),
+            media_type=THUMBNAIL_CONTENT_TYPE,
+            headers={"Cache-Control": "private, max-age=86400"},
+        )
+
+    size = row["size_bytes"]
+    etag = f'"{row["sha256"]}"'
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Content-Disposition": (
+            f"attachment; filename*=UTF-8''{quote(row['filename'])}"
+        ),
+    }
+
+    # A stale If-Range means the client's partial copy is of another version
+    byte_range = None
+    if if_range is None or if_range == etag:
+        byte_range = attachments.parse_range(range_header, size)
+
+    if byte_range is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(
+            storage.read(row["storage_key"]),
+            media_type=row["content_type"],
+            headers=headers,
+        )
+
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        storage.read(row["storage_key"], start, end),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type=row["content_type"],
+        headers=headers,
+    )
+
+
+@router.delete("/{attachment_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_attachment(
+    work_order_id: str,
+    attachment_id: str,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: dict[str, Any] = Depends(get_current_user_from_token),
+    storage: StorageBackend = Depends(get_storage),
+) -> Response:
+    """Delete an attachment (uploader or work order creator only)."""
+    supabase = get_supabase_client()
+    supabase.auth.set_session(credentials.credentials, "")
+
+    try:
+        delete_response = (
+            supabase.table(ATTACHMENTS_TABLE)
+            .delete()
+            .eq("id", attachment_id)
+            .eq("work_order_id", work_order_id)
+            .execute()
+        )
+        if not delete_response.data:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Attachment not found or not deletable",
+            )
+
+        await attachments.delete_blobs(storage, delete_response.data[0])
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to delete attachment: {str(e)}",
+        ) from e
@@ -1,6 +1,7 @@
 from typing import Any
 
 from fastapi import APIRouter, Depends
+from fastapi.security import HTTPAuthorizationCredentials
 
 from app.models.auth import (
     AuthResponse,
@@ -9,7 +10,8 @@ from app.models.auth import (
     UserSignIn,
     UserSignUp,
 )
-from app.services.auth import AuthService, get_current_user_from_token
+from app.services.auth import AuthService, get_current_user_from_token, security
+from app.services.revocation import revoke_token
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
@@ -30,14 +32,14 @@ async def sign_in(user_data: UserSignIn) -> Any:
 
 @router.post("/signout", response_model=MessageResponse)
 async def sign_out(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
     current_user: dict[str, Any] = Depends(get_current_user_from_token),
 ) -> MessageResponse:
-    """Sign out the current user."""
-    # Note: Supabase handles token invalidation on their end
-    # For a production app, you might want to:
-    # 1. Add the token to a blacklist
-    # 2. Clear any server-side sessions
-    # 3. Log the signout event
+    """Sign out the current user.
+
+    The token's session is revoked until it expires, on every worker.
+    """
+    revoke_token(credentials.credentials)
     return MessageResponse(message="Successfully signed out")
 
 
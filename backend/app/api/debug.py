@@ -0,0 +1,29 @@
+from typing import Literal
+
+from fastapi import APIRouter, Header, HTTPException, Query, Response, status
+
+from app.core.profiling import profile_store, profiling_allowed, render_profile
+
+router = APIRouter(prefix="/debug", tags=["debug"])
+
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(
+    profile_id: str,
+    output_format: Literal["html", "speedscope"] = Query("html", alias="format"),
+    profile_token: str | None = Header(None, alias="X-Profile-Token"),
+) -> Response:
+    """Get a request profile captured with the `X-Profile` header."""
+    if not profiling_allowed(profile_token):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Profiling not allowed"
+        )
+
+    session = profile_store.get(profile_id)
+    if session is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found"
+        )
+
+    body, media_type = render_profile(session, output_format)
+    return Response(content=body, media_type=media_type)
@@ -0,0 +1,111 @@
+from typing import Any
+
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from app.models.dispatch import Assignment, DispatchRequest, DispatchResponse
+from app.services import audit, dispatch
+from app.services.audit import audit_log
+from app.services.auth import get_current_user_from_token
+from app.services.rate_limit import rate_limit
+from app.services.replicas import track_writes
+from app.services.supabase import get_supabase_client
+
+security = HTTPBearer()
+
+router = APIRouter(
+    prefix="/dispatch",
+    tags=["dispatch"],
+    dependencies=[Depends(rate_limit), Depends(track_writes)],
+)
+
+
+@router.post("", response_model=DispatchResponse)
+async def dispatch_work_orders(
+    request: DispatchRequest,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: dict[str, Any] = Depends(get_current_user_from_token),
+) -> DispatchResponse:
+    """Assign open, unassigned work orders to technicians.
+
+    Minimises distance from each work order's location to the technician while
+    balancing load against each technician's capacity, then applies all
+    assignments in one call (unless `dry_run`). Work orders without
+    coordinates, beyond total capacity, not updatable by the caller, or
+    assigned or closed by someone else meanwhile are returned in `unassigned`.
+    """
+    supabase = get_supabase_client()
+    supabase.auth.set_session(credentials.credentials, "")
+
+    try:
+        orders, unassigned = dispatch.fetch_dispatchable_orders(
+            supabase, request.max_orders
+        )
+
+        order_coords = np.array(
+            [(o.latitude, o.longitude) for o in orders], dtype=np.float64
+        ).reshape(-1, 2)
+        tech_coords = np.array(
+            [(t.latitude, t.longitude) for t in request.technicians],
+            dtype=np.float64,
+        )
+        # CPU-bound; keep it off the event loop
+        assignment, distances = await run_in_threadpool(
+            dispatch.solve,
+            order_coords,
+            tech_coords,
+            [t.capacity for t in request.technicians],
+            request.load_weight,
+        )
+
+        assignments = []
+        for order, tech_index, distance in zip(
+            orders, assignment.tolist(), distances.tolist(), strict=True
+        ):
+            if tech_index == dispatch.UNASSIGNED:
+                unassigned.append(order.id)
+                continue
+            assignments.append(
+                Assignment(
+                    work_order_id=order.id,
+                    technician_id=str(request.technicians[tech_index].id),
+                    distance_km=round(distance, 3),
+                )
+            )
+
+        if not request.dry_run and assignments:
+            updated = dispatch.apply_assignments(
+                supabase, {a.work_order_id: a.technician_id for a in assignments}
+            )
+            unassigned.extend(
+                a.work_order_id for a in assignments if a.work_order_id not in updated
+            )
+            assignments = [a for a in assignments if a.work_order_id in updated]
+            # apply_assignments only touches work orders nobody was assigned to
+            await audit_log.record(
+                [
+                    row
+                    for a in assignments
+                    for row in audit.updated(
+                        a.work_order_id,
+                        {"assigned_to_user_id": None},
+                        {"assigned_to_user_id": a.technician_id},
+                        current_user["id"],
+                    )
+                ]
+            )
+
+        return DispatchResponse(
+            assignments=assignments,
+            unassigned=unassigned,
+            applied=not request.dry_run,
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to dispatch work orders: {str(e)}",
+        ) from e
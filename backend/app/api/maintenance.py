@@ -0,0 +1,266 @@
+from datetime import datetime
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from app.models.maintenance import (
+    MaintenanceTemplate,
+    MaintenanceTemplateCreate,
+    MaintenanceTemplatesResponse,
+    MaintenanceTemplateUpdate,
+)
+from app.models.work_orders import PaginationInfo
+from app.services import maintenance
+from app.services.auth import get_current_user_from_token
+from app.services.maintenance import TEMPLATES_TABLE, maintenance_scheduler
+from app.services.rate_limit import rate_limit
+from app.services.replicas import get_read_client, track_writes
+from app.services.supabase import get_supabase_client
+
+security = HTTPBearer()
+
+router = APIRouter(
+    prefix="/maintenance-templates",
+    tags=["maintenance"],
+    dependencies=[Depends(rate_limit), Depends(track_writes)],
+)
+
+
+def _to_template(row: dict[str, Any]) -> MaintenanceTemplate:
+    try:
+        next_due_at = maintenance.next_due(row)
+    except ValueError:
+        # Edited outside the API into something unparseable
+        next_due_at = None
+    return MaintenanceTemplate(**row, next_due_at=next_due_at)
+
+
+def _check_schedule(rrule: str, dtstart: datetime, timezone: str) -> str:
+    """Validate a schedule; returns ``dtstart`` as stored (localized, ISO)."""
+    try:
+        maintenance.parse_schedule(rrule, dtstart, timezone)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e)
+        ) from e
+    return maintenance.localize(dtstart, timezone).isoformat()
+
+
+async def _notify_scheduler(row: dict[str, Any]) -> None:
+    if maintenance_scheduler.running:
+        await maintenance_scheduler.schedule(row)
+
+
+@router.get("", response_model=MaintenanceTemplatesResponse)
+async def get_maintenance_templates(
+    page: int = Query(1, ge=1),
+    limit: int = Query(10, ge=1, le=100),
+    active: bool | None = None,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: dict[str, Any] = Depends(get_current_user_from_token),
+) -> MaintenanceTemplatesResponse:
+    """List maintenance templates, newest first."""
+    supabase = get_read_client(credentials.credentials, current_user["id"])
+
+    try:
+        offset = (page - 1) * limit
+        query = supabase.table(TEMPLATES_TABLE).select("*", count="exact")
+        if active is not None:
+            query = query.eq("active", active)
+        response = (
+            query.order("created_at", desc=True)
+            .order("id", desc=True)
+            .range(offset, offset + limit - 1)
+            .execute()
+        )
+        total_count = response.count or 0
+
+        return MaintenanceTemplatesResponse(
+            # Evaluating rules can be slow, so it stays off the event loop
+            data=await run_in_threadpool(
+                lambda: [_to_template(row) for row in response.data or []]
+            ),
+            count=total_count,
+            pagination=PaginationInfo(
+                page=page,
+                limit=limit,
+                total=total_count,
+                totalPages=(total_count + limit - 1) // limit,
+            ),
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch maintenance templates: {str(e)}",
+        ) from e
+
+
+@router.get("/{template_id}", response_model=MaintenanceTemplate)
+async def get_maintenance_template(
+    template_id: str,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: dict[str, Any] = Depends(get_current_user_from_token),
+) -> MaintenanceTemplate:
+    """Get a maintenance template and when it next generates a work order."""
+    supabase = get_read_client(credentials.credentials, current_user["id"])
+
+    try:
+        response = (
+            supabase.table(TEMPLATES_TABLE)
+            .select("*")
+            .eq("id", template_id)
+            .maybe_single()
+            .execute()
+        )
+        if not (response and response.data):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Maintenance template not found",
+            )
+        return await run_in_threadpool(_to_template, response.data)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch maintenance template: {str(e)}",
+        ) from e
+
+
+@router.post(
+    "", response_model=MaintenanceTemplate, status_code=status.HTTP_201_CREATED
+)
+async def create_maintenance_template(
+    template: MaintenanceTemplateCreate,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: dict[str, Any] = Depends(get_current_user_from_token),
+) -> MaintenanceTemplate:
+    """Create a recurring maintenance template.
+
+    `rrule` is an RFC 5545 recurrence rule, e.g. `FREQ=MONTHLY;BYMONTHDAY=1`,
+    evaluated from `dtstart` in `timezone` (a naive `dtstart` is local time
+    there). Occurrences before the template is created are not generated.
+    """
+    template_data = template.model_dump(mode="json")
+    template_data["dtstart"] = _check_schedule(
+        template.rrule, template.dtstart, template.timezone
+    )
+    template_data["created_by_user_id"] = current_user["id"]
+
+    supabase = get_supabase_client()
+    supabase.auth.set_session(credentials.credentials, "")
+
+    try:
+        response = supabase.table(TEMPLATES_TABLE).insert(template_data).execute()
+        if not response.data:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to create maintenance template",
+            )
+        row = response.data[0]
+        await _notify_scheduler(row)
+        return await run_in_threadpool(_to_template, row)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to create maintenance template: {str(e)}",
+        ) from e
+
+
+@router.put("/{template_id}", response_model=MaintenanceTemplate)
+async def update_maintenance_template(
+    template_id: str,
+    template_update: MaintenanceTemplateUpdate,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: dict[str, Any] = Depends(get_current_user_from_token),
+) -> MaintenanceTemplate:
+    """Update a maintenance template.
+
+    A new schedule takes effect after the last occurrence already generated.
+    """
+    supabase = get_supabase_client()
+    supabase.auth.set_session(credentials.credentials, "")
+
+    try:
+        update_data = template_update.model_dump(mode="json", exclude_unset=True)
+        if not update_data:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="No fields to update"
+            )
+
+        check_response = (
+            supabase.table(TEMPLATES_TABLE)
+            .select("*")
+            .eq("id", template_id)
+            .maybe_single()
+            .execute()
+        )
+        if not (check_response and check_response.data):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Maintenance template not found or not accessible",
+            )
+
+        if {"rrule", "dtstart", "timezone"} & update_data.keys():
+            current = check_response.data
+            update_data["dtstart"] = _check_schedule(
+                template_update.rrule or current["rrule"],
+                template_update.dtstart or datetime.fromisoformat(current["dtstart"]),
+                template_update.timezone or current["timezone"],
+            )
+
+        update_response = (
+            supabase.table(TEMPLATES_TABLE)
+            .update(update_data)
+            .eq("id", template_id)
+            .execute()
+        )
+        if not update_response.data:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Maintenance template not found or not accessible",
+            )
+        row = update_response.data[0]
+        await _notify_scheduler(row)
+        return await run_in_threadpool(_to_template, row)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to update maintenance template: {str(e)}",
+        ) from e
+
+
+@router.delete("/{template_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_maintenance_template(
+    template_id: str,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: dict[str, Any] = Depends(get_current_user_from_token),
+) -> Response:
+    """Delete a maintenance template; work orders it generated are kept."""
+    supabase = get_supabase_client()
+    supabase.auth.set_session(credentials.credentials, "")
+
+    try:
+        response = (
+            supabase.table(TEMPLATES_TABLE).delete().eq("id", template_id).execute()
+        )
+        if not response.data:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Maintenance template not found or not accessible",
+            )
+        maintenance_scheduler.remove(template_id)
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to delete maintenance template: {str(e)}",
+        ) from e
@@ -1,72 +1,118 @@
+from datetime import datetime
 from typing import Any
 
 from fastapi import (  # Added Response
     APIRouter,
     Depends,
+    Header,
     HTTPException,
     Query,
     Response,
     status,
 )
+from fastapi.responses import JSONResponse
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from postgrest.exceptions import APIError
 
+from app.core.config import settings
 from app.models.work_orders import (  # Added PaginationInfo
+    WORK_ORDER_SORT_PATTERN,
     PaginationInfo,
     WorkOrder,
+    WorkOrderBatchGet,
+    WorkOrderBatchItem,
+    WorkOrderBatchResponse,
+    WorkOrderChanges,
     WorkOrderCreate,
+    WorkOrderFilters,
+    WorkOrderHistoryResponse,
+    WorkOrderPriority,
     WorkOrdersResponse,
+    WorkOrderStatus,
     WorkOrderUpdate,
+    WorkOrderUpdateAccepted,
 )
+from app.services import archive, attachments, audit, sync, work_order_query
+from app.services.attachments import ATTACHMENTS_TABLE
+from app.services.audit import audit_log
 from app.services.auth import get_current_user_from_token
+from app.services.entity_cache import VERSION_SELECT, row_version, work_order_cache
+from app.services.loaders import WorkOrderLoader, get_work_order_loader, is_valid_id
+from app.services.rate_limit import rate_limit
+from app.services.replicas import get_read_client, track_writes
+from app.services.storage import StorageBackend, get_storage
 from app.services.supabase import get_supabase_client
+from app.services.users import expand_users, parse_expand
+from app.services.write_behind import write_behind
 
 security = HTTPBearer()
 
-router = APIRouter(prefix="/work-orders", tags=["work-orders"])
+EXPAND_DESCRIPTION = "Comma-separated users to include: `assignee`, `creator`"
+
+router = APIRouter(
+    prefix="/work-orders",
+    tags=["work-orders"],
+    dependencies=[Depends(rate_limit), Depends(track_writes)],
+)
 
 
 @router.get("", response_model=WorkOrdersResponse)
 async def get_work_orders(
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=100),
-    status_filter: str | None = Query(None, alias="status"),  # Modified
-    priority: str | None = None,  # Modified
-    assigned_to: str | None = None,  # Modified
+    status_filter: list[WorkOrderStatus] | None = Query(None, alias="status"),
+    priority: list[WorkOrderPriority] | None = Query(None),
+    assigned_to: list[str] | None = Query(None),
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+    updated_after: datetime | None = None,
+    updated_before: datetime | None = None,
+    sort: str = Query("-created_at", pattern=WORK_ORDER_SORT_PATTERN),
+    expand: str | None = Query(None, description=EXPAND_DESCRIPTION),
     credentials: HTTPAuthorizationCredentials = Depends(security),
     current_user: dict[str, Any] = Depends(get_current_user_from_token),
 ) -> WorkOrdersResponse:
-    """Get work orders with optional filtering and pagination."""
-    supabase = get_supabase_client()
-    supabase.auth.set_session(credentials.credentials, "")
+    """Get work orders with optional filtering and pagination.
+
+    `status`, `priority` and `assigned_to` may be repeated to match any of
+    several values. `expand=assignee,creator` includes those users' profiles,
+    resolved in one batched lookup for the whole page.
+    """
+    supabase = get_read_client(credentials.credentials, current_user["id"])
+    expanded = parse_expand(expand)
+
+    filters = WorkOrderFilters(
+        status=status_filter or [],
+        priority=priority or [],
+        assigned_to=assigned_to or [],
+        created_after=created_after,
+        created_before=created_before,
+        updated_after=updated_after,
+        updated_before=updated_before,
+        sort=sort,
+    )
 
     try:
-        base_query = supabase.table("work_orders")
-
-        filters = []
-        if status_filter:
-            filters.append(("status", "eq", status_filter))
-            base_query = base_query.eq("status", status_filter)
-        if priority:
-            filters.append(("priority", "eq", priority))
-            base_query = base_query.eq("priority", priority)
-        if assigned_to:
-            filters.append(("assigned_to_user_id", "eq", assigned_to))
-            base_query = base_query.eq("assigned_to_user_id", assigned_to)
-
+        table = work_order_query.source_table(filters)
         offset = (page - 1) * limit
 
-        data_response = (
-            base_query.select("*, location:locations(*)")
-            .range(offset, offset + limit - 1)
-            .execute()
-        )
-
-        count_query_builder = supabase.table("work_orders")
-        for col, op, val in filters:
-            count_query_builder = getattr(count_query_builder, op)(col, val)
-        count_response = count_query_builder.select("id", count="exact").execute()
+        query = supabase.table(table).select("*, location:locations(*)", count="exact")
+        query = work_order_query.apply_filters(query, filters)
+        try:
+            response = query.range(offset, offset + limit - 1).execute()
+            data = response.data or []
+            total_count = response.count if response.count is not None else 0
+        except APIError as e:
+            if e.code != "PGRST103":
+                raise
+            # Page past the end: PostgREST refuses the range, so count alone
+            count_query = supabase.table(table).select("id", count="exact").limit(0)
+            count_response = work_order_query.apply_filters(
+                count_query, filters
+            ).execute()
+            data = []
+            total_count = count_response.count or 0
 
-        total_count = count_response.count if count_response.count is not None else 0
         total_pages = (total_count + limit - 1) // limit if limit > 0 else 0
 
         pagination_info = {
@@ -76,8 +122,12 @@ async def get_work_orders(
             "totalPages": total_pages,
         }
 
+        if expanded:
+            data = [WorkOrder(**row) for row in data]
+            await expand_users(data, expanded)
+
         return WorkOrdersResponse(
-            data=data_response.data or [],
+            data=data,
             count=total_count,
             pagination=PaginationInfo(**pagination_info),
         )
@@ -91,17 +141,107 @@ async def get_work_orders(
         ) from e
 
 
+@router.get("/changes", response_model=WorkOrderChanges)
+async def get_work_order_changes(
+    since: str | None = Query(None, description="Token from a previous response"),
+    limit: int = Query(500, ge=1, le=1000),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: dict[str, Any] = Depends(get_current_user_from_token),
+) -> WorkOrderChanges:
+    """Get work orders created, updated or deleted since a sync token.
+
+    Without `since` this returns every work order and a token to continue
+    from. Keep calling with `next_token` while `has_more` is true. A token
+    older than the tombstone retention period gets 410 and needs a full
+    resync.
+    """
+    supabase = get_supabase_client()
+    supabase.auth.set_session(credentials.credentials, "")
+
+    token = sync.decode_token(since) if since else None
+
+    try:
+        page = sync.fetch_changes(supabase, token, limit)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch work order changes: {str(e)}",
+        ) from e
+
+    return WorkOrderChanges(
+        changes=[WorkOrder(**row) for row in page.changes],
+        deleted=page.deleted,
+        next_token=sync.encode_token(page.token),
+        has_more=page.has_more,
+    )
+
+
+@router.post(":batchGet", response_model=WorkOrderBatchResponse)
+async def batch_get_work_orders(
+    batch: WorkOrderBatchGet,
+    expand: str | None = Query(None, description=EXPAND_DESCRIPTION),
+    current_user: dict[str, Any] = Depends(get_current_user_from_token),
+    loader: WorkOrderLoader = Depends(get_work_order_loader),
+) -> WorkOrderBatchResponse:
+    """Get up to 100 work orders by ID in a single upstream query.
+
+    Each requested ID gets an item; IDs that are malformed, don't exist or
+    aren't visible to the caller are reported with an error instead of
+    failing the request.
+    """
+    ids = list(dict.fromkeys(batch.ids))
+    expanded = parse_expand(expand)
+
+    try:
+        # Malformed IDs come back as None without being queried
+        rows = await loader.load_many(ids)
+        work_orders = [WorkOrder(**row) if row else None for row in rows]
+        await expand_users([wo for wo in work_orders if wo], expanded)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch work orders: {str(e)}",
+        ) from e
+
+    items = []
+    for work_order_id, work_order in zip(ids, work_orders, strict=True):
+        if not is_valid_id(work_order_id):
+            items.append(
+                WorkOrderBatchItem(id=work_order_id, error="Invalid work order ID")
+            )
+        elif work_order is None:
+            items.append(
+                WorkOrderBatchItem(
+                    id=work_order_id, error="Work order not found or not accessible"
+                )
+            )
+        else:
+            items.append(WorkOrderBatchItem(id=work_order_id, data=work_order))
+
+    return WorkOrderBatchResponse(items=items)
+
+
 @router.get("/{work_order_id}", response_model=WorkOrder)
 async def get_work_order(
     work_order_id: str,
+    expand: str | None = Query(None, description=EXPAND_DESCRIPTION),
     credentials: HTTPAuthorizationCredentials = Depends(security),
     current_user: dict[str, Any] = Depends(get_current_user_from_token),
-) -> WorkOrder:
+) -> WorkOrder | Response:
     """Get a specific work order by ID."""
-    supabase = get_supabase_client()
-    supabase.auth.set_session(credentials.credentials, "")
+    supabase = get_read_client(credentials.credentials, current_user["id"])
+    expanded = parse_expand(expand)
+    # Cached bodies are unexpanded; user profiles change independently
+    use_cache = settings.entity_cache_enabled and not expanded
 
     try:
+        if use_cache:
+            cached = _get_cached_work_order(supabase, work_order_id)
+            if cached is not None:
+                return cached
+
         response = (
             supabase.table("work_orders")
             .select("*, location:locations(*)")
@@ -110,12 +250,30 @@ async def get_work_order(
             .execute()
         )
 
-        if not response.data:
+        if response and response.data and use_cache:
+            work_order = WorkOrder(**response.data)
+            body = work_order.model_dump_json().encode()
+            work_order_cache.put(work_order_id, row_version(response.data), body)
+            return Response(content=body, media_type="application/json")
+
+        if not (response and response.data):
+            # Closed work orders may have been moved to the archive
+            response = (
+                supabase.table(archive.ARCHIVE_TABLE)
+                .select("*, location:locations(*)")
+                .eq("id", work_order_id)
+                .maybe_single()
+                .execute()
+            )
+
+        if not (response and response.data):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Work order not found"
             )
 
-        return WorkOrder(**response.data)
+        work_order = WorkOrder(**response.data)
+        await expand_users([work_order], expanded)
+        return work_order
     except HTTPException:
         raise
     except Exception as e:
@@ -125,6 +283,82 @@ async def get_work_order(
         ) from e
 
 
+@router.get("/{work_order_id}/history", response_model=WorkOrderHistoryResponse)
+async def get_work_order_history(
+    work_order_id: str,
+    page: int = Query(1, ge=1),
+    limit: int = Query(50, ge=1, le=200),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: dict[str, Any] = Depends(get_current_user_from_token),
+) -> WorkOrderHistoryResponse:
+    """Get the change history of a work order, newest first.
+
+    History outlives the work order, so it is still available after deletion.
+    Changes from the last moment may not be listed yet: history is written in
+    the background.
+    """
+    supabase = get_read_client(credentials.credentials, current_user["id"])
+
+    try:
+        offset = (page - 1) * limit
+        response = (
+            supabase.table(audit.HISTORY_TABLE)
+            .select("*", count="exact")
+            .eq("work_order_id", work_order_id)
+            .order("changed_at", desc=True)
+            .order("id", desc=True)
+            .range(offset, offset + limit - 1)
+            .execute()
+        )
+        total_count = response.count or 0
+
+        return WorkOrderHistoryResponse(
+            data=response.data or [],
+            count=total_count,
+            pagination=PaginationInfo(
+                page=page,
+                limit=limit,
+                total=total_count,
+                totalPages=(total_count + limit - 1) // limit,
+            ),
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch work order history: {str(e)}",
+        ) from e
+
+
+def _cache_work_order(row: dict[str, Any]) -> WorkOrder:
+    """Validate a freshly written row and prime the cache with it."""
+    work_order = WorkOrder(**row)
+    if settings.entity_cache_enabled:
+        work_order_cache.put(
+            str(row["id"]),
+            row_version(row),
+            work_order.model_dump_json().encode(),
+        )
+    return work_order
+
+
+def _get_cached_work_order(supabase: Any, work_order_id: str) -> Response | None:
+    # Fetching just the versions doubles as the RLS visibility check
+    check_response = (
+        supabase.table("work_orders")
+        .select(VERSION_SELECT)
+        .eq("id", work_order_id)
+        .maybe_single()
+        .execute()
+    )
+    if not (check_response and check_response.data):
+        work_order_cache.invalidate(work_order_id)
+        return None
+    body = work_order_cache.get(work_order_id, row_version(check_response.data))
+    if body is None:
+        return None
+    return Response(content=body, media_type="application/json")
+
+
 @router.post("", response_model=WorkOrder, status_code=status.HTTP_201_CREATED)
 async def create_work_order(
     work_order: WorkOrderCreate,
@@ -170,7 +404,8 @@ async def create_work_order(
                 detail="Failed to fetch newly created work order with location details",
             )
 
-        return WorkOrder(**fetch_response.data)
+        await audit_log.record(audit.created(fetch_response.data, current_user["id"]))
+        return _cache_work_order(fetch_response.data)
     except HTTPException:
         raise
     except Exception as e:
@@ -180,14 +415,24 @@ async def create_work_order(
         ) from e
 
 
-@router.put("/{work_order_id}", response_model=WorkOrder)
+@router.put(
+    "/{work_order_id}",
+    response_model=WorkOrder,
+    responses={202: {"model": WorkOrderUpdateAccepted}},
+)
 async def update_work_order(
     work_order_id: str,
     work_order_update: WorkOrderUpdate,
+    prefer: str | None = Header(None),
     credentials: HTTPAuthorizationCredentials = Depends(security),
     current_user: dict[str, Any] = Depends(get_current_user_from_token),
-) -> WorkOrder:
-    """Update a work order."""
+) -> WorkOrder | JSONResponse:
+    """Update a work order.
+
+    When write-behind is enabled, sending `Prefer: respond-async` queues the
+    update instead: it is acknowledged with 202 once validated, merged with
+    other pending updates to the same work order and written shortly after.
+    """
     supabase = get_supabase_client()
     supabase.auth.set_session(credentials.credentials, "")
 
@@ -198,9 +443,15 @@ async def update_work_order(
                 status_code=status.HTTP_400_BAD_REQUEST, detail="No fields to update"
             )
 
+        if settings.write_behind_enabled and "respond-async" in (prefer or ""):
+            return await _queue_update(
+                supabase, work_order_id, work_order_update, current_user
+            )
+
+        # The prior state, for the history diff
         check_response = (
             supabase.table("work_orders")
-            .select("id")
+            .select("*")
             .eq("id", work_order_id)
             .maybe_single()
             .execute()
@@ -217,12 +468,22 @@ async def update_work_order(
             .eq("id", work_order_id)
             .execute()
         )
+        await write_behind.supersede(work_order_id, list(update_data))
+        work_order_cache.invalidate(work_order_id)
 
         if not update_response.data or len(update_response.data) == 0:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to update work order, or no effective changes made.",
             )
+        await audit_log.record(
+            audit.updated(
+                work_order_id,
+                check_response.data,
+                work_order_update.model_dump(mode="json", exclude_unset=True),
+                current_user["id"],
+            )
+        )
 
         fetch_response = (
             supabase.table("work_orders")
@@ -237,7 +498,7 @@ async def update_work_order(
                 detail="Failed to fetch updated work order details.",
             )
 
-        return WorkOrder(**fetch_response.data)
+        return _cache_work_order(fetch_response.data)
     except HTTPException:
         raise
     except Exception as e:
@@ -247,13 +508,57 @@ async def update_work_order(
         ) from e
 
 
+async def _queue_update(
+    supabase: Any,
+    work_order_id: str,
+    work_order_update: WorkOrderUpdate,
+    current_user: dict[str, Any],
+) -> JSONResponse:
+    # Queued updates are written with the service role, so enforce the
+    # update policy (creator or assignee) here
+    check_response = (
+        supabase.table("work_orders")
+        .select("*")
+        .eq("id", work_order_id)
+        .maybe_single()
+        .execute()
+    )
+    if not (check_response and check_response.data):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Work order not found or not accessible",
+        )
+    row = check_response.data
+    if current_user["id"] not in (
+        row.get("created_by_user_id"),
+        row.get("assigned_to_user_id"),
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not allowed to update this work order",
+        )
+
+    patch = work_order_update.model_dump(mode="json", exclude_unset=True)
+    await write_behind.submit(work_order_id, patch)
+    # Recorded at acceptance: the diff is against what the caller saw
+    await audit_log.record(audit.updated(work_order_id, row, patch, current_user["id"]))
+
+    accepted = WorkOrderUpdateAccepted(id=work_order_id, fields=list(patch))
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content=accepted.model_dump(),
+        headers={"Preference-Applied": "respond-async"},
+    )
+
+
 @router.delete("/{work_order_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_work_order(
     work_order_id: str,
     credentials: HTTPAuthorizationCredentials = Depends(security),
     current_user: dict[str, Any] = Depends(get_current_user_from_token),
+    storage: StorageBackend = Depends(get_storage),
 ) -> Response:
-    """Delete a work order."""
+    """Delete a work order and its attachments."""
     supabase = get_supabase_client()
     supabase.auth.set_session(credentials.credentials, "")
 
@@ -271,15 +576,27 @@ async def delete_work_order(
                 detail="Work order not found or not accessible",
             )
 
+        # The rows go with the work order (a trigger); the files are ours
+        blobs_response = (
+            supabase.table(ATTACHMENTS_TABLE)
+            .select("storage_key, thumbnail_key")
+            .eq("work_order_id", work_order_id)
+            .execute()
+        )
+
         delete_response = (
             supabase.table("work_orders").delete().eq("id", work_order_id).execute()
         )
+        work_order_cache.invalidate(work_order_id)
 
         if not delete_response.data or len(delete_response.data) == 0:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Work order not found, or no rows deleted.",
             )
+        await audit_log.record(audit.deleted(work_order_id, current_user["id"]))
+        for row in blobs_response.data or []:
+            await attachments.delete_blobs(storage, row)
 
         return Response(status_code=status.HTTP_204_NO_CONTENT)
     except HTTPException:
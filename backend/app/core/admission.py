@@ -0,0 +1,157 @@
+"""Admission control and load shedding.
+
+At most ``settings.admission_max_in_flight`` requests run at once. Up to
+``settings.admission_max_queue`` more wait, first come first served, for at
+most ``settings.admission_queue_timeout`` seconds; anything beyond that gets
+an immediate 503 instead of piling up behind slow upstream calls. Paths in
+``settings.admission_bypass_paths`` (health checks, token refresh) are always
+admitted.
+
+While requests are being shed, and for ``settings.admission_ready_cooldown``
+seconds after, :attr:`AdmissionController.shedding` is true and ``/ready``
+reports the instance as unready so load balancers send traffic elsewhere.
+"""
+
+import asyncio
+import json
+import math
+import time
+from collections import deque
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_in_flight: int,
+        max_queue: int,
+        queue_timeout: float,
+        ready_cooldown: float,
+    ) -> None:
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.ready_cooldown = ready_cooldown
+        self.in_flight = 0
+        self.rejected = 0
+        self._waiters: deque[asyncio.Future[None]] = deque()
+        self._last_rejected_at = -math.inf
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    @property
+    def shedding(self) -> bool:
+        return time.monotonic() - self._last_rejected_at < self.ready_cooldown
+
+    async def acquire(self) -> bool:
+        """Wait for a slot; False means the request should be shed."""
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            return True
+        if len(self._waiters) >= self.max_queue:
+            return self._reject()
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait({waiter}, timeout=self.queue_timeout)
+        except BaseException:
+            # Client went away while queued; give back a slot handed to us
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                self._abandon(waiter)
+            raise
+
+        if waiter.done():
+            return True
+        self._abandon(waiter)
+        return self._reject()
+
+    def release(self) -> None:
+        """Free a slot, handing it straight to the next live waiter if any."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def stats(self) -> dict[str, int | bool]:
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "shedding": self.shedding,
+        }
+
+    def _abandon(self, waiter: asyncio.Future[None]) -> None:
+        waiter.cancel()
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def _reject(self) -> bool:
+        self.rejected += 1
+        self._last_rejected_at = time.monotonic()
+        return False
+
+
+admission_controller = AdmissionController(
+    max_in_flight=settings.admission_max_in_flight,
+    max_queue=settings.admission_max_queue,
+    queue_timeout=settings.admission_queue_timeout,
+    ready_cooldown=settings.admission_ready_cooldown,
+)
+
+
+class AdmissionMiddleware:
+    """Run requests through an :class:`AdmissionController`."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        controller: AdmissionController = admission_controller,
+        bypass_paths: list[str] | None = None,
+    ) -> None:
+        self.app = app
+        self.controller = controller
+        self.bypass_paths = frozenset(
+            settings.admission_bypass_paths if bypass_paths is None else bypass_paths
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.bypass_paths:
+            await self.app(scope, receive, send)
+            return
+
+        if not await self.controller.acquire():
+            await self._overloaded(send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release()
+
+    async def _overloaded(self, send: Send) -> None:
+        body = json.dumps({"detail": "Server is overloaded, retry later"}).encode()
+        retry_after = max(1, math.ceil(self.controller.queue_timeout))
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(retry_after).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -13,6 +13,12 @@ class Settings(BaseSettings):
     supabase_key: str = ""
     supabase_service_key: str | None = None
 
+    # Read replicas: PostgREST URLs (GETs use the least busy healthy one;
+    # callers stay on the primary briefly after their own writes)
+    supabase_read_urls: list[str] = []
+    read_replica_cooldown: float = 30.0
+    read_replica_sticky_seconds: float = 5.0
+
     # Application
     app_name: str = "Work Order API"
     app_version: str = "0.1.0"
@@ -23,5 +29,102 @@ class Settings(BaseSettings):
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
 
+    # Token revocation (signed-out sessions)
+    revocation_sync_interval: float = 5.0
+    revocation_sync_overlap_seconds: float = 30.0
+    revocation_bloom_capacity: int = 100_000
+    revocation_bloom_error_rate: float = 0.001
+
+    # Archive (hot/cold tiering of closed work orders)
+    archive_after_days: int = 90
+    archive_batch_size: int = 1000
+
+    # Delta sync
+    sync_overlap_seconds: int = 5
+    sync_tombstone_retention_days: int = 30
+
+    # Write-behind for PUT /work-orders/{id} with "Prefer: respond-async"
+    # (needs the service key; the journal makes accepted updates durable,
+    # and extra workers use numbered journals next to it)
+    write_behind_enabled: bool = False
+    write_behind_window: float = 0.5
+    write_behind_max_pending: int = 1000
+    write_behind_journal_path: str | None = "write_behind.jsonl"
+
+    # Attachments (storage: local | supabase; thumbnails need the
+    # "attachments" extra)
+    attachments_storage: str = "local"
+    attachments_local_path: str = "attachments"
+    attachments_bucket: str = "work-order-attachments"
+    attachments_max_bytes: int = 25 * 1024 * 1024
+    attachments_chunk_size: int = 64 * 1024
+    attachments_thumbnail_size: int = 256
+    attachments_thumbnail_max_source_bytes: int = 20 * 1024 * 1024
+    attachments_thumbnail_workers: int = 2
+
+    # Serialized work order cache for GET /work-orders/{id}
+    entity_cache_enabled: bool = True
+    entity_cache_max_bytes: int = 32 * 1024 * 1024
+
+    # Analytics date ranges (days, inclusive)
+    analytics_default_days: int = 30
+    analytics_max_range_days: int = 366
+
+    # Work order history (written in batches with the service key)
+    audit_enabled: bool = True
+    audit_max_queue: int = 10_000
+    audit_batch_size: int = 500
+    audit_enqueue_timeout: float = 0.5
+
+    # Preventive maintenance scheduler (generates work orders with the
+    # service key; catch-up is per template and looks back at most
+    # maintenance_catch_up_window seconds)
+    maintenance_scheduler_enabled: bool = True
+    maintenance_batch_size: int = 500
+    maintenance_max_catch_up: int = 10
+    maintenance_catch_up_window: float = 7 * 24 * 3600.0
+    maintenance_reload_interval: float = 60.0
+    maintenance_min_interval: float = 3600.0
+
+    # User directory behind expand=assignee,creator (reads profiles with the
+    # service key)
+    user_directory_ttl: float = 300.0
+    user_directory_max_entries: int = 10_000
+
+    # Admission control / load shedding
+    admission_enabled: bool = True
+    admission_max_in_flight: int = 100
+    admission_max_queue: int = 200
+    admission_queue_timeout: float = 2.0
+    admission_ready_cooldown: float = 5.0
+    admission_bypass_paths: list[str] = [
+        "/health",
+        "/ready",
+        "/metrics",
+        "/api/v1/auth/refresh",
+    ]
+
+    # Rate limiting (per user, per route; keys are endpoint function names)
+    rate_limit_enabled: bool = True
+    rate_limit_default: str = "120/minute"
+    rate_limit_routes: dict[str, str] = {"get_work_orders": "60/minute"}
+    rate_limit_max_keys: int = 10_000
+
+    # Profiling (always available when debug is on; otherwise needs a signed
+    # X-Profile-Token, see app.core.profiling)
+    profiling_enabled: bool = False
+    profiling_interval: float = 0.001
+    profiling_max_stored: int = 20
+
+    # Tracing (exporter: console | file | otlp; needs the "tracing" extra)
+    tracing_enabled: bool = False
+    tracing_service_name: str = "workorder-api"
+    tracing_exporter: str = "console"
+    tracing_file_path: str = "traces.jsonl"
+    tracing_endpoint: str | None = (
+        None  # OTLP/HTTP, e.g. http://localhost:4318/v1/traces
+    )
+    tracing_sample_ratio: float = 1.0
+
 
 settings = Settings()
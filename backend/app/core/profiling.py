@@ -0,0 +1,147 @@
+"""Opt-in sampling profiler for single requests.
+
+Send ``X-Profile: 1`` with a request to profile it with pyinstrument. The
+response carries an ``X-Profile-Id`` header; fetch the result from
+``GET /api/v1/debug/profiles/{id}?format=html`` (or ``format=speedscope``).
+
+Outside ``settings.debug`` the request must also carry a valid
+``X-Profile-Token`` (see :func:`make_profile_token`). The middleware is only
+installed when ``settings.debug`` or ``settings.profiling_enabled`` is set, so
+with profiling off there is nothing in the request path at all.
+"""
+
+import hashlib
+import hmac
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+TOKEN_HEADER = b"x-profile-token"
+
+
+def profiling_available() -> bool:
+    """Whether profiling is switched on and pyinstrument is installed."""
+    if not (settings.debug or settings.profiling_enabled):
+        return False
+    try:
+        import pyinstrument  # noqa: F401
+    except ImportError:
+        logger.warning("Profiling requested but pyinstrument is not installed")
+        return False
+    return True
+
+
+def _sign(expires: int) -> str:
+    return hmac.new(
+        settings.secret_key.encode(), f"profile:{expires}".encode(), hashlib.sha256
+    ).hexdigest()
+
+
+def make_profile_token(ttl_seconds: int = 3600) -> str:
+    """Create a signed ``X-Profile-Token`` value valid for ``ttl_seconds``."""
+    expires = int(time.time()) + ttl_seconds
+    return f"{expires}.{_sign(expires)}"
+
+
+def verify_profile_token(token: str | None) -> bool:
+    """Check a token created by :func:`make_profile_token`."""
+    if not token:
+        return False
+    expires_str, _, signature = token.partition(".")
+    try:
+        expires = int(expires_str)
+    except ValueError:
+        return False
+    if expires < time.time():
+        return False
+    return hmac.compare_digest(signature, _sign(expires))
+
+
+def profiling_allowed(token: str | None) -> bool:
+    """Whether a caller presenting ``token`` may profile or read profiles."""
+    return settings.debug or verify_profile_token(token)
+
+
+class ProfileStore:
+    """Bounded in-memory store of recent profiler sessions."""
+
+    def __init__(self, max_profiles: int = 20) -> None:
+        self.max_profiles = max_profiles
+        self._sessions: OrderedDict[str, Any] = OrderedDict()
+
+    def add(self, profile_id: str, session: Any) -> None:
+        self._sessions[profile_id] = session
+        if len(self._sessions) > self.max_profiles:
+            self._sessions.popitem(last=False)
+
+    def get(self, profile_id: str) -> Any | None:
+        return self._sessions.get(profile_id)
+
+
+profile_store = ProfileStore(max_profiles=settings.profiling_max_stored)
+
+
+def render_profile(session: Any, output_format: str) -> tuple[str, str]:
+    """Render a stored session; returns ``(body, media_type)``."""
+    from pyinstrument.renderers import HTMLRenderer, SpeedscopeRenderer
+
+    if output_format == "speedscope":
+        return SpeedscopeRenderer().render(session), "application/json"
+    return HTMLRenderer().render(session), "text/html"
+
+
+class ProfilingMiddleware:
+    """Profile requests that ask for it; pass everything else straight through."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        wants_profile = False
+        token = None
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                wants_profile = value not in (b"", b"0")
+            elif name == TOKEN_HEADER:
+                token = value.decode("latin-1")
+
+        if not wants_profile or not profiling_allowed(token):
+            await self.app(scope, receive, send)
+            return
+
+        from pyinstrument import Profiler
+
+        profile_id = uuid.uuid4().hex
+
+        async def send_with_profile_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"x-profile-id", profile_id.encode()),
+                ]
+            await send(message)
+
+        profiler = Profiler(interval=settings.profiling_interval, async_mode="enabled")
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            session = profiler.stop()
+            profile_store.add(profile_id, session)
+
+
+if __name__ == "__main__":
+    print(make_profile_token())
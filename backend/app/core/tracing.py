@@ -0,0 +1,218 @@
+"""OpenTelemetry tracing.
+
+With ``settings.tracing_enabled`` every request gets a server span (continuing
+any incoming W3C ``traceparent``), and every PostgREST/GoTrue call made through
+the Supabase clients gets a client span carrying the table, operation and row
+count. The trace context is propagated to Supabase on those calls.
+
+Only ``opentelemetry-api`` is needed at import time; the SDK and exporters
+come from the ``tracing`` extra and are loaded by :func:`setup_tracing`.
+"""
+
+import json
+import logging
+import threading
+from collections.abc import Sequence
+from typing import Any
+
+import httpx
+from opentelemetry import propagate, trace
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+tracer = trace.get_tracer("app")
+
+POSTGREST_PREFIX = "/rest/v1/"
+GOTRUE_PREFIX = "/auth/v1/"
+STORAGE_PREFIX = "/storage/v1/"
+
+POSTGREST_OPERATIONS = {
+    "GET": "select",
+    "HEAD": "select",
+    "POST": "insert",
+    "PATCH": "update",
+    "PUT": "upsert",
+    "DELETE": "delete",
+}
+
+
+def setup_tracing() -> bool:
+    """Install the global tracer provider configured from settings.
+
+    Returns False (leaving tracing as a no-op) when the SDK is not installed.
+    """
+    try:
+        from opentelemetry.sdk.resources import SERVICE_NAME, Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import (
+            BatchSpanProcessor,
+            ConsoleSpanExporter,
+            SimpleSpanProcessor,
+        )
+        from opentelemetry.sdk.trace.sampling import ParentBasedTraceIdRatio
+    except ImportError:
+        logger.warning("Tracing enabled but opentelemetry-sdk is not installed")
+        return False
+
+    provider = TracerProvider(
+        resource=Resource.create({SERVICE_NAME: settings.tracing_service_name}),
+        sampler=ParentBasedTraceIdRatio(settings.tracing_sample_ratio),
+    )
+
+    exporter_name = settings.tracing_exporter
+    if exporter_name == "console":
+        provider.add_span_processor(SimpleSpanProcessor(ConsoleSpanExporter()))
+    elif exporter_name == "file":
+        provider.add_span_processor(
+            BatchSpanProcessor(_file_exporter(settings.tracing_file_path))
+        )
+    elif exporter_name == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+            OTLPSpanExporter,
+        )
+
+        provider.add_span_processor(
+            BatchSpanProcessor(OTLPSpanExporter(endpoint=settings.tracing_endpoint))
+        )
+    else:
+        raise ValueError(f"Unknown tracing exporter: {exporter_name!r}")
+
+    trace.set_tracer_provider(provider)
+    return True
+
+
+def _file_exporter(path: str) -> Any:
+    """Build a span exporter appending one JSON object per span to ``path``."""
+    from opentelemetry.sdk.trace import ReadableSpan
+    from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+    class JsonLinesSpanExporter(SpanExporter):
+        def __init__(self) -> None:
+            self._lock = threading.Lock()
+
+        def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+            lines = [json.dumps(json.loads(span.to_json())) + "\n" for span in spans]
+            with self._lock, open(path, "a", encoding="utf-8") as f:
+                f.writelines(lines)
+            return SpanExportResult.SUCCESS
+
+    return JsonLinesSpanExporter()
+
+
+def _row_counts(content_range: str | None) -> tuple[int | None, int | None]:
+    """Parse PostgREST's ``Content-Range`` (``0-9/120``, ``*/0``)."""
+    if not content_range:
+        return None, None
+    rows, _, total = content_range.partition("/")
+    returned = 0
+    if rows != "*":
+        start, _, end = rows.partition("-")
+        returned = int(end) - int(start) + 1
+    return returned, (int(total) if total.isdigit() else None)
+
+
+class TracingTransport(httpx.BaseTransport):
+    """httpx transport wrapping each upstream call in a client span."""
+
+    def __init__(self, transport: httpx.BaseTransport) -> None:
+        self.transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        attributes: dict[str, Any] = {
+            "http.request.method": request.method,
+            "server.address": request.url.host,
+        }
+        if path.startswith(POSTGREST_PREFIX):
+            target = path[len(POSTGREST_PREFIX) :]
+            if target.startswith("rpc/"):
+                operation, table = "rpc", target[len("rpc/") :]
+            else:
+                operation, table = POSTGREST_OPERATIONS.get(request.method, ""), target
+            if "resolution=" in request.headers.get("prefer", ""):
+                operation = "upsert"
+            name = f"PostgREST {operation} {table}"
+            attributes.update(
+                {
+                    "db.system": "postgresql",
+                    "db.operation.name": operation,
+                    "db.collection.name": table,
+                }
+            )
+        elif path.startswith(GOTRUE_PREFIX):
+            name = f"GoTrue {request.method} {path[len(GOTRUE_PREFIX) :]}"
+        elif path.startswith(STORAGE_PREFIX):
+            name = f"Storage {request.method}"
+        else:
+            name = f"HTTP {request.method}"
+
+        with tracer.start_as_current_span(
+            name, kind=SpanKind.CLIENT, attributes=attributes
+        ) as span:
+            propagate.inject(request.headers)
+            response = self.transport.handle_request(request)
+            span.set_attribute("http.response.status_code", response.status_code)
+            returned, total = _row_counts(response.headers.get("content-range"))
+            if returned is not None:
+                span.set_attribute("db.response.returned_rows", returned)
+            if total is not None:
+                span.set_attribute("db.response.total_rows", total)
+            if response.status_code >= 400:
+                span.set_status(Status(StatusCode.ERROR))
+            return response
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+def traced_http_client() -> httpx.Client:
+    """httpx client for the Supabase clients, with a span per request."""
+    return httpx.Client(
+        transport=TracingTransport(httpx.HTTPTransport(http2=True)),
+        timeout=120,
+        follow_redirects=True,
+    )
+
+
+class TracingMiddleware:
+    """Open a server span per request, continuing an incoming trace context."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        carrier = {
+            name.decode("latin-1"): value.decode("latin-1")
+            for name, value in scope["headers"]
+        }
+        method = scope["method"]
+        with tracer.start_as_current_span(
+            f"{method} {scope['path']}",
+            context=propagate.extract(carrier),
+            kind=SpanKind.SERVER,
+            attributes={"http.request.method": method, "url.path": scope["path"]},
+        ) as span:
+
+            async def send_with_status(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    status_code = message["status"]
+                    span.set_attribute("http.response.status_code", status_code)
+                    if status_code >= 500:
+                        span.set_status(Status(StatusCode.ERROR))
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                route = scope.get("route")
+                if route is not None and hasattr(route, "path"):
+                    span.update_name(f"{method} {route.path}")
+                    span.set_attribute("http.route", route.path)
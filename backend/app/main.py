@@ -1,15 +1,76 @@
-from fastapi import FastAPI
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+
+from fastapi import FastAPI, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.api import auth, work_orders
+from app.api import (
+    analytics,
+    attachments,
+    auth,
+    debug,
+    dispatch,
+    maintenance,
+    work_orders,
+)
+from app.core.admission import AdmissionMiddleware, admission_controller
 from app.core.config import settings
+from app.core.profiling import ProfilingMiddleware, profiling_available
+from app.core.tracing import TracingMiddleware, setup_tracing
+from app.services.audit import audit_active, audit_log
+from app.services.entity_cache import work_order_cache
+from app.services.maintenance import maintenance_scheduler, scheduler_active
+from app.services.revocation import RevocationSync
+from app.services.thumbnails import shutdown_thumbnail_executor
+from app.services.users import user_directory
+from app.services.write_behind import write_behind
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # Revocations are shared between workers through the service client
+    revocation_sync = RevocationSync(
+        settings.revocation_sync_interval, settings.revocation_sync_overlap_seconds
+    )
+    if settings.supabase_service_key:
+        revocation_sync.start()
+    if settings.write_behind_enabled:
+        await write_behind.start()
+    if audit_active():
+        audit_log.start()
+    elif settings.audit_enabled:
+        logger.warning("Work order history is not recorded without the service key")
+    if scheduler_active():
+        maintenance_scheduler.start()
+
+    yield
+
+    await revocation_sync.stop()
+    await maintenance_scheduler.close()
+    if settings.write_behind_enabled:
+        # Queued updates were already acknowledged; don't lose them
+        await write_behind.close()
+    # After write-behind, which may still have been recording
+    await audit_log.close()
+    shutdown_thumbnail_executor()
+
 
 app = FastAPI(
     title=settings.app_name,
     version=settings.app_version,
     debug=settings.debug,
+    lifespan=lifespan,
 )
 
+# Admission control: bounded concurrency and queueing, 503 when overloaded.
+# Added before CORS so shed responses still get CORS headers.
+if settings.admission_enabled:
+    app.add_middleware(AdmissionMiddleware, controller=admission_controller)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -19,9 +80,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Tracing: server span per request, client spans per Supabase call
+if settings.tracing_enabled and setup_tracing():
+    app.add_middleware(TracingMiddleware)
+
+# Opt-in request profiling; not installed at all unless enabled
+if profiling_available():
+    app.add_middleware(ProfilingMiddleware)
+
 # Include routers
 app.include_router(auth.router, prefix="/api/v1")
 app.include_router(work_orders.router, prefix="/api/v1")
+app.include_router(attachments.router, prefix="/api/v1")
+app.include_router(dispatch.router, prefix="/api/v1")
+app.include_router(analytics.router, prefix="/api/v1")
+app.include_router(maintenance.router, prefix="/api/v1")
+if profiling_available():
+    app.include_router(debug.router, prefix="/api/v1")
 
 
 @app.get("/")
@@ -32,3 +107,26 @@ async def root() -> dict[str, str]:
 @app.get("/health")
 async def health_check() -> dict[str, str]:
     return {"status": "healthy"}
+
+
+@app.get("/ready")
+async def readiness_check(response: Response) -> dict[str, Any]:
+    """Report unready while the instance is shedding load."""
+    stats = admission_controller.stats()
+    if stats["shedding"]:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return {"status": "shedding", **stats}
+    return {"status": "ready", **stats}
+
+
+@app.get("/metrics")
+async def metrics() -> dict[str, Any]:
+    """Queue depths and counters of the in-process background subsystems."""
+    return {
+        "admission": admission_controller.stats(),
+        "audit": audit_log.stats(),
+        "write_behind": write_behind.stats(),
+        "entity_cache": work_order_cache.stats(),
+        "maintenance": maintenance_scheduler.stats(),
+        "user_directory": user_directory.stats(),
+    }
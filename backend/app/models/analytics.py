@@ -0,0 +1,40 @@
+from datetime import date
+
+from pydantic import BaseModel
+
+
+class DailyThroughput(BaseModel):
+    day: date
+    opened: int
+    closed: int
+
+
+class ThroughputResponse(BaseModel):
+    start: date
+    end: date
+    data: list[DailyThroughput]
+
+
+class ResolutionStats(BaseModel):
+    priority: str | None = None
+    resolved: int
+    mean_resolution_hours: float | None = None
+
+
+class ResolutionTimeResponse(BaseModel):
+    start: date
+    end: date
+    overall: ResolutionStats
+    by_priority: list[ResolutionStats]
+
+
+class BacklogGroup(BaseModel):
+    priority: str | None = None
+    location_id: str | None = None
+    open_count: int
+    mean_age_hours: float | None = None
+
+
+class BacklogResponse(BaseModel):
+    total: int
+    data: list[BacklogGroup]
@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+
+
+class Attachment(BaseModel):
+    id: str
+    work_order_id: str
+    filename: str
+    content_type: str
+    size_bytes: int
+    sha256: str
+    has_thumbnail: bool = False
+    uploaded_by_user_id: str
+    created_at: str
+
+
+class AttachmentsResponse(BaseModel):
+    data: list[Attachment]
@@ -25,6 +25,13 @@ class UserResponse(BaseModel):
     last_sign_in_at: str | None = None
 
 
+class UserSummary(BaseModel):
+    """Public profile of a user, for expanded work order fields."""
+
+    id: str
+    full_name: str | None = None
+
+
 class SessionResponse(BaseModel):
     access_token: str
     refresh_token: str
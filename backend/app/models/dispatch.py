@@ -0,0 +1,41 @@
+from typing import Self
+from uuid import UUID
+
+from pydantic import BaseModel, Field, model_validator
+
+# Order/technician pairs priced per request (max_orders x technicians)
+MAX_DISTANCE_PAIRS = 50_000_000
+
+
+class Technician(BaseModel):
+    id: UUID
+    latitude: float = Field(..., ge=-90, le=90)
+    longitude: float = Field(..., ge=-180, le=180)
+    capacity: int = Field(..., ge=0)
+
+
+class DispatchRequest(BaseModel):
+    technicians: list[Technician] = Field(..., min_length=1, max_length=5000)
+    max_orders: int = Field(10_000, ge=1, le=50_000)
+    load_weight: float = Field(1.0, ge=0)
+    dry_run: bool = False
+
+    @model_validator(mode="after")
+    def check_problem_size(self) -> Self:
+        if self.max_orders * len(self.technicians) > MAX_DISTANCE_PAIRS:
+            raise ValueError(
+                f"max_orders x technicians must be at most {MAX_DISTANCE_PAIRS:,}"
+            )
+        return self
+
+
+class Assignment(BaseModel):
+    work_order_id: str
+    technician_id: str
+    distance_km: float
+
+
+class DispatchResponse(BaseModel):
+    assignments: list[Assignment]
+    unassigned: list[str]
+    applied: bool
@@ -0,0 +1,53 @@
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+from app.models.work_orders import PaginationInfo, WorkOrderPriority
+
+
+class MaintenanceTemplateCreate(BaseModel):
+    title: str
+    description: str | None = None
+    priority: WorkOrderPriority = WorkOrderPriority.MEDIUM
+    location_id: str | None = None
+    assigned_to_user_id: str | None = None
+    rrule: str = Field(..., examples=["FREQ=MONTHLY;BYMONTHDAY=1;BYHOUR=9"])
+    dtstart: datetime
+    timezone: str = "UTC"
+    active: bool = True
+
+
+class MaintenanceTemplateUpdate(BaseModel):
+    title: str | None = None
+    description: str | None = None
+    priority: WorkOrderPriority | None = None
+    location_id: str | None = None
+    assigned_to_user_id: str | None = None
+    rrule: str | None = None
+    dtstart: datetime | None = None
+    timezone: str | None = None
+    active: bool | None = None
+
+
+class MaintenanceTemplate(BaseModel):
+    id: str
+    title: str
+    description: str | None = None
+    priority: WorkOrderPriority
+    location_id: str | None = None
+    assigned_to_user_id: str | None = None
+    rrule: str
+    dtstart: datetime
+    timezone: str
+    active: bool
+    last_generated_at: datetime | None = None
+    next_due_at: datetime | None = None
+    created_by_user_id: str
+    created_at: str
+    updated_at: str
+
+
+class MaintenanceTemplatesResponse(BaseModel):
+    data: list[MaintenanceTemplate]
+    count: int
+    pagination: PaginationInfo
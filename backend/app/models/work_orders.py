@@ -1,6 +1,10 @@
+from datetime import datetime
 from enum import Enum
+from typing import Any
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from app.models.auth import UserSummary
 
 
 class WorkOrderStatus(str, Enum):
@@ -25,6 +29,8 @@ class Location(BaseModel):
     state_province: str | None = None
     postal_code: str | None = None
     country: str | None = None
+    latitude: float | None = None
+    longitude: float | None = None
 
 
 class WorkOrder(BaseModel):
@@ -37,6 +43,12 @@ class WorkOrder(BaseModel):
     location_id: int | None = None
     assigned_to_user_id: str | None = None
     created_by_user_id: str
+    # Only filled in when requested with expand=assignee,creator
+    assignee: UserSummary | None = None
+    creator: UserSummary | None = None
+    # Set on work orders generated from a maintenance template
+    maintenance_template_id: str | None = None
+    occurrence_at: str | None = None
     created_at: str
     updated_at: str
 
@@ -59,6 +71,28 @@ class WorkOrderUpdate(BaseModel):
     assigned_to_user_id: str | None = None
 
 
+class WorkOrderUpdateAccepted(BaseModel):
+    """Acknowledgement of an update queued with ``Prefer: respond-async``."""
+
+    id: str
+    fields: list[str]
+
+
+WORK_ORDER_SORT_KEYS = ("created_at", "updated_at", "priority", "status", "title")
+WORK_ORDER_SORT_PATTERN = rf"^-?({'|'.join(WORK_ORDER_SORT_KEYS)})$"
+
+
+class WorkOrderFilters(BaseModel):
+    status: list[WorkOrderStatus] = []
+    priority: list[WorkOrderPriority] = []
+    assigned_to: list[str] = []
+    created_after: datetime | None = None
+    created_before: datetime | None = None
+    updated_after: datetime | None = None
+    updated_before: datetime | None = None
+    sort: str = Field("-created_at", pattern=WORK_ORDER_SORT_PATTERN)
+
+
 class PaginationInfo(BaseModel):
     page: int
     limit: int
@@ -70,3 +104,41 @@ class WorkOrdersResponse(BaseModel):
     data: list[WorkOrder]
     count: int
     pagination: PaginationInfo | None = None
+
+
+class WorkOrderBatchGet(BaseModel):
+    ids: list[str] = Field(..., min_length=1, max_length=100)
+
+
+class WorkOrderBatchItem(BaseModel):
+    id: str
+    data: WorkOrder | None = None
+    error: str | None = None
+
+
+class WorkOrderBatchResponse(BaseModel):
+    items: list[WorkOrderBatchItem]
+
+
+class WorkOrderChanges(BaseModel):
+    changes: list[WorkOrder]
+    deleted: list[str]
+    next_token: str
+    has_more: bool
+
+
+class WorkOrderHistoryEntry(BaseModel):
+    id: int
+    work_order_id: str
+    action: str
+    field: str | None = None
+    old_value: Any = None
+    new_value: Any = None
+    changed_by_user_id: str | None = None
+    changed_at: datetime
+
+
+class WorkOrderHistoryResponse(BaseModel):
+    data: list[WorkOrderHistoryEntry]
+    count: int
+    pagination: PaginationInfo
@@ -0,0 +1,173 @@
+"""Work order analytics served from the rollup tables.
+
+The rollups (``database/create_analytics_tables.sql``) are maintained by
+triggers on ``work_orders``, so each query here reads one row per day per
+priority and location at most, or one row per priority and location for the
+backlog. Cost depends on the date range and the number of groups, never on
+how many work orders exist.
+"""
+
+import time
+from collections.abc import Iterable
+from datetime import UTC, date, datetime, timedelta
+from typing import Any
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.models.analytics import (
+    BacklogGroup,
+    BacklogResponse,
+    DailyThroughput,
+    ResolutionStats,
+    ResolutionTimeResponse,
+    ThroughputResponse,
+)
+from app.services.replicas import ReadClient
+
+BACKLOG_TABLE = "work_order_backlog"
+BACKLOG_PAGE_SIZE = 1000
+BACKLOG_GROUP_KEYS = {"priority": "priority", "location": "location_id"}
+
+
+def resolve_range(start: date | None, end: date | None) -> tuple[date, date]:
+    """Default to the last ``settings.analytics_default_days`` days, inclusive."""
+    end = end or datetime.now(UTC).date()
+    start = start or end - timedelta(days=settings.analytics_default_days - 1)
+    if start > end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must not be after end",
+        )
+    if (end - start).days + 1 > settings.analytics_max_range_days:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Date range is limited to {settings.analytics_max_range_days} days",
+        )
+    return start, end
+
+
+def _hours(seconds: float, count: int) -> float | None:
+    return round(seconds / count / 3600, 2) if count else None
+
+
+def throughput(
+    supabase: ReadClient,
+    start: date,
+    end: date,
+    priority: str | None = None,
+    location_id: str | None = None,
+) -> ThroughputResponse:
+    """Opened and closed counts per day, with empty days filled in."""
+    response = supabase.rpc(
+        "analytics_throughput",
+        {
+            "start_day": start.isoformat(),
+            "end_day": end.isoformat(),
+            "p_priority": priority,
+            "p_location_id": location_id,
+        },
+    ).execute()
+    by_day = {row["day"]: row for row in response.data or []}
+
+    data = []
+    for offset in range((end - start).days + 1):
+        day = start + timedelta(days=offset)
+        row = by_day.get(day.isoformat(), {})
+        data.append(
+            DailyThroughput(
+                day=day, opened=row.get("opened") or 0, closed=row.get("closed") or 0
+            )
+        )
+    return ThroughputResponse(start=start, end=end, data=data)
+
+
+def resolution_time(
+    supabase: ReadClient,
+    start: date,
+    end: date,
+    location_id: str | None = None,
+) -> ResolutionTimeResponse:
+    """Mean time from creation to completion, overall and per priority."""
+    response = supabase.rpc(
+        "analytics_resolution",
+        {
+            "start_day": start.isoformat(),
+            "end_day": end.isoformat(),
+            "p_location_id": location_id,
+        },
+    ).execute()
+
+    by_priority = []
+    total_resolved, total_seconds = 0, 0.0
+    for row in response.data or []:
+        resolved = row["resolved"] or 0
+        seconds = row["resolution_seconds_sum"] or 0.0
+        total_resolved += resolved
+        total_seconds += seconds
+        by_priority.append(
+            ResolutionStats(
+                priority=row["priority"],
+                resolved=resolved,
+                mean_resolution_hours=_hours(seconds, resolved),
+            )
+        )
+
+    return ResolutionTimeResponse(
+        start=start,
+        end=end,
+        overall=ResolutionStats(
+            resolved=total_resolved,
+            mean_resolution_hours=_hours(total_seconds, total_resolved),
+        ),
+        by_priority=by_priority,
+    )
+
+
+def _fetch_backlog(supabase: ReadClient) -> list[dict[str, Any]]:
+    rows: list[dict[str, Any]] = []
+    while True:
+        response = (
+            supabase.table(BACKLOG_TABLE)
+            .select("priority, location_id, open_count, created_epoch_sum")
+            .gt("open_count", 0)
+            .order("priority")
+            .order("location_id")
+            .range(len(rows), len(rows) + BACKLOG_PAGE_SIZE - 1)
+            .execute()
+        )
+        page = response.data or []
+        rows.extend(page)
+        if len(page) < BACKLOG_PAGE_SIZE:
+            return rows
+
+
+def backlog(
+    supabase: ReadClient,
+    group_by: Iterable[str] = ("priority",),
+    now: float | None = None,
+) -> BacklogResponse:
+    """Open work orders and their mean age, grouped by priority and/or location."""
+    now = time.time() if now is None else now
+    columns = [BACKLOG_GROUP_KEYS[key] for key in group_by]
+
+    groups: dict[tuple[Any, ...], list[float]] = {}
+    for row in _fetch_backlog(supabase):
+        key = tuple(row[column] for column in columns)
+        totals = groups.setdefault(key, [0, 0.0])
+        totals[0] += row["open_count"]
+        totals[1] += row["created_epoch_sum"]
+
+    data = []
+    for key, (count, epoch_sum) in sorted(
+        groups.items(), key=lambda item: tuple(str(part) for part in item[0])
+    ):
+        age_seconds = count * now - epoch_sum
+        data.append(
+            BacklogGroup(
+                **dict(zip(columns, key, strict=True)),
+                open_count=int(count),
+                mean_age_hours=_hours(age_seconds, int(count)),
+            )
+        )
+    return BacklogResponse(total=sum(group.open_count for group in data), data=data)
@@ -0,0 +1,114 @@
+"""Hot/cold tiering of closed work orders.
+
+Completed and cancelled work orders are moved out of ``work_orders`` into
+``work_orders_archive`` once they have been untouched for
+``settings.archive_after_days``. Reads only consult the archive (through the
+``work_orders_all`` view) when the filters can actually match archived rows.
+"""
+
+from collections.abc import Iterable
+from datetime import UTC, datetime, timedelta
+
+from supabase import Client
+
+from app.core.config import settings
+from app.models.work_orders import WorkOrderStatus
+from app.services.supabase import get_supabase_service_client
+
+HOT_TABLE = "work_orders"
+ARCHIVE_TABLE = "work_orders_archive"
+ALL_TABLE = "work_orders_all"
+
+ARCHIVED_STATUSES = frozenset(
+    {WorkOrderStatus.COMPLETED.value, WorkOrderStatus.CANCELLED.value}
+)
+
+
+def archive_cutoff(now: datetime | None = None) -> datetime:
+    """Return the instant before which closed work orders may be archived."""
+    now = now or datetime.now(UTC)
+    return now - timedelta(days=settings.archive_after_days)
+
+
+def reads_archive(
+    statuses: Iterable[str] | None = None,
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+    updated_after: datetime | None = None,
+    updated_before: datetime | None = None,
+) -> bool:
+    """Whether a list query with these filters can match archived rows.
+
+    Unfiltered listings stay on the hot table. The archive is read when the
+    caller asks for a closed status, or for a created or updated date range
+    reaching back past the archive cutoff (archived rows were last updated,
+    and so created, before it).
+    """
+    requested = set(statuses) if statuses else set()
+    if requested:
+        return bool(requested & ARCHIVED_STATUSES)
+    bounds = (created_after, created_before, updated_after, updated_before)
+    if all(bound is None for bound in bounds):
+        return False
+    cutoff = archive_cutoff()
+    for after in (created_after, updated_after):
+        if after is None:
+            continue
+        if after.tzinfo is None:
+            after = after.replace(tzinfo=UTC)
+        if after >= cutoff:
+            return False
+    return True
+
+
+def source_table(
+    statuses: Iterable[str] | None = None,
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+    updated_after: datetime | None = None,
+    updated_before: datetime | None = None,
+) -> str:
+    """Pick the relation a list query should read from."""
+    if reads_archive(
+        statuses, created_after, created_before, updated_after, updated_before
+    ):
+        return ALL_TABLE
+    return HOT_TABLE
+
+
+def archive_closed_work_orders(
+    client: Client | None = None,
+    batch_size: int | None = None,
+    older_than_days: int | None = None,
+    max_batches: int | None = None,
+) -> int:
+    """Move closed work orders to the archive in batches.
+
+    Each batch is a single transaction in ``archive_work_orders`` (rows are
+    deleted from the hot table and inserted into the archive atomically), so
+    the job can be interrupted at any point and simply run again.
+    """
+    client = client or get_supabase_service_client()
+    batch_size = batch_size or settings.archive_batch_size
+    older_than_days = (
+        settings.archive_after_days if older_than_days is None else older_than_days
+    )
+
+    total = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        response = client.rpc(
+            "archive_work_orders",
+            {"batch_size": batch_size, "older_than": f"{older_than_days} days"},
+        ).execute()
+        moved = int(response.data or 0)
+        total += moved
+        batches += 1
+        if moved < batch_size:
+            break
+    return total
+
+
+if __name__ == "__main__":
+    moved = archive_closed_work_orders()
+    print(f"Archived {moved} work orders")
@@ -0,0 +1,259 @@
+"""Work order attachment uploads and downloads.
+
+Uploads are parsed with python-multipart's push parser straight off
+``request.stream()``: each network chunk is fed to the parser and the file
+part's bytes are passed on to the storage backend as they arrive, hashing
+(SHA-256) and counting along the way. Memory use is bounded by the chunk size
+regardless of file size, except that images up to
+``settings.attachments_thumbnail_max_source_bytes`` are also kept for the
+thumbnail worker.
+"""
+
+import hashlib
+import logging
+import re
+import uuid
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+from typing import Any
+
+from fastapi import HTTPException, status
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+from app.core.config import settings
+from app.services import thumbnails
+from app.services.storage import StorageBackend
+
+logger = logging.getLogger(__name__)
+
+ATTACHMENTS_TABLE = "work_order_attachments"
+DEFAULT_CONTENT_TYPE = "application/octet-stream"
+
+_RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+@dataclass
+class UploadedFile:
+    filename: str = ""
+    content_type: str = DEFAULT_CONTENT_TYPE
+    size: int = 0
+    sha256: str = ""
+    thumbnail_source: bytes | None = field(default=None, repr=False)
+
+
+class MultipartFileReader:
+    """Extract a single file field from a streamed multipart/form-data body.
+
+    Other fields are ignored, as are further file parts after the first.
+    """
+
+    def __init__(
+        self,
+        content_type: str,
+        field_name: str = "file",
+        max_bytes: int | None = None,
+    ) -> None:
+        mime, options = parse_options_header(content_type)
+        boundary = options.get(b"boundary")
+        if mime != b"multipart/form-data" or not boundary:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="Expected a multipart/form-data upload",
+            )
+        self.field_name = field_name
+        self.max_bytes = (
+            settings.attachments_max_bytes if max_bytes is None else max_bytes
+        )
+        self.file = UploadedFile()
+
+        self._pending: list[bytes] = []
+        self._headers: dict[str, str] = {}
+        self._header_field = bytearray()
+        self._header_value = bytearray()
+        self._in_file = False
+        self._found = False
+        self._parser = MultipartParser(
+            boundary,
+            callbacks={
+                "on_part_begin": self._on_part_begin,
+                "on_header_field": self._on_header_field,
+                "on_header_value": self._on_header_value,
+                "on_header_end": self._on_header_end,
+                "on_headers_finished": self._on_headers_finished,
+                "on_part_data": self._on_part_data,
+                "on_part_end": self._on_part_end,
+            },
+        )
+
+    async def iter_file(self, stream: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        """Feed ``stream`` to the parser and yield the file part's bytes."""
+        digest = hashlib.sha256()
+        keep_for_thumbnail = False
+        thumbnail_source = bytearray()
+
+        async for chunk in stream:
+            self._parser.write(chunk)
+            for piece in self._pending:
+                if not self.file.size:
+                    keep_for_thumbnail = self.file.content_type.startswith("image/")
+                self.file.size += len(piece)
+                if self.file.size > self.max_bytes:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"Attachment exceeds {self.max_bytes} bytes",
+                    )
+                digest.update(piece)
+                if keep_for_thumbnail:
+                    thumbnail_source += piece
+                    if (
+                        len(thumbnail_source)
+                        > settings.attachments_thumbnail_max_source_bytes
+                    ):
+                        keep_for_thumbnail = False
+                        thumbnail_source = bytearray()
+                yield piece
+            self._pending.clear()
+
+        self._parser.finalize()
+        if not self._found:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"No file in form field '{self.field_name}'",
+            )
+        self.file.sha256 = digest.hexdigest()
+        if keep_for_thumbnail and thumbnail_source:
+            self.file.thumbnail_source = bytes(thumbnail_source)
+
+    def _on_part_begin(self) -> None:
+        self._headers = {}
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        name = self._header_field.decode("latin-1").lower()
+        self._headers[name] = self._header_value.decode("utf-8", "replace")
+        self._header_field.clear()
+        self._header_value.clear()
+
+    def _on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get("content-disposition"))
+        name = options.get(b"name", b"").decode()
+        filename = options.get(b"filename")
+        self._in_file = (
+            not self._found and name == self.field_name and filename is not None
+        )
+        if self._in_file:
+            self._found = True
+            self.file.filename = filename.decode("utf-8", "replace") or "upload"
+            self.file.content_type = self._headers.get(
+                "content-type", DEFAULT_CONTENT_TYPE
+            )
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._in_file:
+            self._pending.append(bytes(data[start:end]))
+
+    def _on_part_end(self) -> None:
+        self._in_file = False
+
+
+def storage_key(work_order_id: str) -> str:
+    return f"work-orders/{work_order_id}/{uuid.uuid4().hex}"
+
+
+async def store_upload(
+    storage: StorageBackend,
+    work_order_id: str,
+    content_type: str,
+    stream: AsyncIterator[bytes],
+) -> dict[str, Any]:
+    """Stream an upload into storage; returns the attachment row to insert."""
+    reader = MultipartFileReader(content_type)
+    key = storage_key(work_order_id)
+
+    # Read up to the first file bytes so the part's content type is known
+    # before the storage request goes out
+    chunks = reader.iter_file(stream)
+    first = await anext(chunks, b"")
+
+    try:
+        await storage.write(key, _prepend(first, chunks), reader.file.content_type)
+    except HTTPException:
+        await storage.delete(key)
+        raise
+
+    upload = reader.file
+    thumbnail_key = None
+    if upload.thumbnail_source and thumbnails.thumbnails_available():
+        thumbnail = await thumbnails.create_thumbnail(upload.thumbnail_source)
+        if thumbnail is not None:
+            thumbnail_key = f"{key}.thumb.jpg"
+            await storage.write(
+                thumbnail_key, _once(thumbnail), thumbnails.THUMBNAIL_CONTENT_TYPE
+            )
+
+    return {
+        "work_order_id": work_order_id,
+        "filename": upload.filename,
+        "content_type": upload.content_type,
+        "size_bytes": upload.size,
+        "sha256": upload.sha256,
+        "storage_key": key,
+        "thumbnail_key": thumbnail_key,
+    }
+
+
+async def delete_blobs(storage: StorageBackend, row: dict[str, Any]) -> None:
+    """Best-effort removal of an attachment's file and thumbnail."""
+    for key in (row.get("storage_key"), row.get("thumbnail_key")):
+        if key:
+            try:
+                await storage.delete(key)
+            except Exception:
+                logger.warning("Failed to delete attachment blob %s", key)
+
+
+async def _once(data: bytes) -> AsyncIterator[bytes]:
+    yield data
+
+
+async def _prepend(first: bytes, rest: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    if first:
+        yield first
+    async for chunk in rest:
+        yield chunk
+
+
+def parse_range(header: str | None, size: int) -> tuple[int, int] | None:
+    """Parse a single ``Range: bytes=...`` header into inclusive offsets.
+
+    Returns None when the whole file should be sent (no header, or a form
+    such as multiple ranges that servers may ignore) and raises 416 when the
+    range can't be satisfied.
+    """
+    if not header:
+        return None
+    match = _RANGE_PATTERN.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        # Suffix range: the final N bytes
+        start = max(size - int(last), 0)
+        end = size - 1
+
+    if start > end or start >= size:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end
@@ -0,0 +1,195 @@
+"""Asynchronous, batched audit log of work order changes.
+
+Handlers describe each change as history rows (one per changed field) and
+hand them to :data:`audit_log`, which queues them in memory and returns. A
+background task writes queued rows to the append-only ``work_order_history``
+table in batches of up to ``settings.audit_batch_size``, so auditing adds no
+upstream round trip to the request path.
+
+The queue is bounded by ``settings.audit_max_queue``. When it is full,
+handlers wait up to ``settings.audit_enqueue_timeout`` seconds for room
+(backpressure) before the record is dropped and counted; :meth:`AuditLog.stats`
+exposes queue depth, waits, drops and failures. On shutdown the queue is
+drained before the process exits.
+"""
+
+import asyncio
+import logging
+from collections.abc import Callable
+from contextlib import suppress
+from datetime import UTC, datetime
+from typing import Any
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.services.supabase import get_supabase_service_client
+
+logger = logging.getLogger(__name__)
+
+HISTORY_TABLE = "work_order_history"
+HistoryRow = dict[str, Any]
+
+
+def _now() -> str:
+    return datetime.now(UTC).isoformat()
+
+
+def _row(
+    work_order_id: Any,
+    user_id: str,
+    action: str,
+    field: str | None = None,
+    old_value: Any = None,
+    new_value: Any = None,
+) -> HistoryRow:
+    return {
+        "work_order_id": str(work_order_id),
+        "changed_by_user_id": user_id,
+        "action": action,
+        "field": field,
+        "old_value": old_value,
+        "new_value": new_value,
+        "changed_at": _now(),
+    }
+
+
+def created(row: dict[str, Any], user_id: str) -> list[HistoryRow]:
+    return [_row(row["id"], user_id, "create")]
+
+
+def deleted(work_order_id: str, user_id: str) -> list[HistoryRow]:
+    return [_row(work_order_id, user_id, "delete")]
+
+
+def updated(
+    work_order_id: str,
+    before: dict[str, Any],
+    changes: dict[str, Any],
+    user_id: str,
+) -> list[HistoryRow]:
+    """One row per field whose value actually changed.
+
+    ``changes`` is a JSON-mode ``WorkOrderUpdate`` dump with ``exclude_unset``;
+    ``before`` is the row as it was read before the update.
+    """
+    return [
+        _row(work_order_id, user_id, "update", field, before.get(field), value)
+        for field, value in changes.items()
+        if before.get(field) != value
+    ]
+
+
+def insert_history(rows: list[HistoryRow]) -> None:
+    get_supabase_service_client().table(HISTORY_TABLE).insert(rows).execute()
+
+
+class AuditLog:
+    def __init__(
+        self,
+        max_queue: int,
+        batch_size: int,
+        enqueue_timeout: float,
+        max_retries: int = 3,
+        write: Callable[[list[HistoryRow]], None] = insert_history,
+    ) -> None:
+        self.batch_size = batch_size
+        self.enqueue_timeout = enqueue_timeout
+        self.max_retries = max_retries
+        self.write = write
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.backpressure_waits = 0
+        self.failed_batches = 0
+        self.high_water = 0
+        self._queue: asyncio.Queue[HistoryRow] = asyncio.Queue(maxsize=max_queue)
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "queued": self.queued,
+            "max_queue": self._queue.maxsize,
+            "high_water": self.high_water,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "backpressure_waits": self.backpressure_waits,
+            "failed_batches": self.failed_batches,
+        }
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self, timeout: float = 10.0) -> None:
+        """Write out everything queued, then stop the writer."""
+        if self._task is None:
+            return
+        with suppress(TimeoutError):
+            await asyncio.wait_for(self._queue.join(), timeout)
+        if self.queued:
+            logger.error("Shutting down with %d audit records unwritten", self.queued)
+        self._task.cancel()
+        with suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    async def record(self, rows: list[HistoryRow]) -> None:
+        """Queue history rows, waiting briefly for room if the queue is full."""
+        if self._task is None:
+            return
+        for row in rows:
+            try:
+                self._queue.put_nowait(row)
+            except asyncio.QueueFull:
+                self.backpressure_waits += 1
+                try:
+                    await asyncio.wait_for(self._queue.put(row), self.enqueue_timeout)
+                except TimeoutError:
+                    self.dropped += 1
+                    logger.error("Audit queue full, dropped %s", row)
+                    continue
+            self.enqueued += 1
+            self.high_water = max(self.high_water, self.queued)
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                await self._write(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _write(self, batch: list[HistoryRow]) -> None:
+        for attempt in range(self.max_retries + 1):
+            try:
+                await run_in_threadpool(self.write, batch)
+            except Exception:
+                if attempt == self.max_retries:
+                    self.failed_batches += 1
+                    self.dropped += len(batch)
+                    logger.exception("Dropped %d audit records", len(batch))
+                    return
+                await asyncio.sleep(min(2**attempt * 0.1, 5.0))
+            else:
+                self.written += len(batch)
+                return
+
+
+audit_log = AuditLog(
+    max_queue=settings.audit_max_queue,
+    batch_size=settings.audit_batch_size,
+    enqueue_timeout=settings.audit_enqueue_timeout,
+)
+
+
+def audit_active() -> bool:
+    """Whether history is being recorded (the writer needs the service key)."""
+    return settings.audit_enabled and bool(settings.supabase_service_key)
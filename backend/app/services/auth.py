@@ -3,6 +3,8 @@ from typing import Any
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
+from app.core.tracing import tracer
+from app.services.revocation import is_token_revoked
 from app.services.supabase import get_supabase_client
 
 security = HTTPBearer()
@@ -111,5 +113,13 @@ async def get_current_user_from_token(
     credentials: HTTPAuthorizationCredentials = Depends(security),
 ) -> dict[str, Any]:
     """Dependency to get current user from JWT token."""
-    auth_service = AuthService()
-    return await auth_service.get_current_user(credentials.credentials)
+    with tracer.start_as_current_span("auth.get_current_user_from_token") as span:
+        if is_token_revoked(credentials.credentials):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token has been revoked",
+            )
+        auth_service = AuthService()
+        user = await auth_service.get_current_user(credentials.credentials)
+        span.set_attribute("enduser.id", user["id"])
+        return user
@@ -0,0 +1,180 @@
+"""Batch auto-dispatch of open work orders to technicians.
+
+Assignments minimise travel distance while spreading load: the cost of giving
+an order to a technician is the great-circle distance scaled by
+``1 + load_weight * load / capacity``. Orders are assigned greedily, cheapest
+first, from a heap whose entries are re-priced lazily as technicians fill up.
+Each order only considers its ``candidates`` nearest technicians, widening to
+every technician with spare capacity if all of those are full.
+
+Distances are computed a block of orders at a time and only each order's
+nearest candidates are kept, so memory doesn't grow with orders x technicians.
+"""
+
+import heapq
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+from numpy.typing import NDArray
+from supabase import Client
+
+from app.services.archive import HOT_TABLE
+
+EARTH_RADIUS_KM = 6371.0
+UNASSIGNED = -1
+PAGE_SIZE = 1000
+# Distances held at once while finding each order's nearest technicians
+BLOCK_CELLS = 1 << 20
+
+
+@dataclass
+class DispatchOrder:
+    id: str
+    latitude: float
+    longitude: float
+
+
+def haversine_matrix(
+    from_coords: NDArray[np.floating[Any]], to_coords: NDArray[np.floating[Any]]
+) -> NDArray[np.float32]:
+    """Great-circle distances in km between two ``(n, 2)`` lat/long arrays."""
+    a = np.radians(from_coords.astype(np.float32))
+    b = np.radians(to_coords.astype(np.float32))
+    lat1, lon1 = a[:, 0:1], a[:, 1:2]
+    lat2, lon2 = b[:, 0], b[:, 1]
+    h = (
+        np.sin((lat2 - lat1) * 0.5) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) * 0.5) ** 2
+    )
+    return (2 * EARTH_RADIUS_KM) * np.arcsin(np.sqrt(np.clip(h, 0, 1)))
+
+
+def solve(
+    order_coords: NDArray[np.floating[Any]],
+    tech_coords: NDArray[np.floating[Any]],
+    capacities: Sequence[int],
+    load_weight: float = 1.0,
+    candidates: int = 8,
+) -> tuple[NDArray[np.intp], NDArray[np.float32]]:
+    """Assign orders to technicians.
+
+    Returns ``(assignment, distances)`` where ``assignment[i]`` is the index
+    of the technician given order ``i`` (or ``UNASSIGNED`` when no capacity is
+    left) and ``distances[i]`` the distance in km.
+    """
+    n, m = len(order_coords), len(tech_coords)
+    assignment = np.full(n, UNASSIGNED, dtype=np.intp)
+    distances = np.zeros(n, dtype=np.float32)
+    capacity = np.asarray(capacities, dtype=np.float64)
+    if n == 0 or m == 0 or capacity.sum() <= 0:
+        return assignment, distances
+
+    k = min(candidates, m)
+    nearest = np.empty((n, k), dtype=np.intp)
+    nearest_dist = np.empty((n, k), dtype=np.float32)
+    rows = max(1, BLOCK_CELLS // m)
+    for start in range(0, n, rows):
+        block = haversine_matrix(order_coords[start : start + rows], tech_coords)
+        block[:, capacity <= 0] = np.inf
+        top = np.argpartition(block, k - 1, axis=1)[:, :k]
+        top_dist = np.take_along_axis(block, top, axis=1)
+        by_distance = np.argsort(top_dist, axis=1)
+        end = start + len(block)
+        nearest[start:end] = np.take_along_axis(top, by_distance, axis=1)
+        nearest_dist[start:end] = np.take_along_axis(top_dist, by_distance, axis=1)
+    cand = nearest.tolist()
+    cand_dist = nearest_dist.tolist()
+
+    load = [0] * m
+    cap = capacity.tolist()
+    remaining = int(min(capacity.sum(), n))
+
+    def best(i: int) -> tuple[float, int, float]:
+        best_cost, best_tech, best_dist = np.inf, UNASSIGNED, np.inf
+        for tech, dist in zip(cand[i], cand_dist[i], strict=True):
+            if load[tech] < cap[tech]:
+                cost = dist * (1 + load_weight * load[tech] / cap[tech])
+                if cost < best_cost:
+                    best_cost, best_tech, best_dist = cost, tech, dist
+        return best_cost, best_tech, best_dist
+
+    def widen(i: int) -> None:
+        # All nearby technicians are full: look again among those with room
+        open_techs = np.flatnonzero(np.asarray(load) < capacity)
+        row = haversine_matrix(order_coords[i : i + 1], tech_coords[open_techs])[0]
+        top = np.argsort(row)[:k]
+        cand[i] = open_techs[top].tolist()
+        cand_dist[i] = row[top].tolist()
+
+    heap = [(cand_dist[i][0], i) for i in range(n)]
+    heapq.heapify(heap)
+    while heap and remaining:
+        popped_cost, i = heapq.heappop(heap)
+        cost, tech, dist = best(i)
+        if tech == UNASSIGNED:
+            widen(i)
+            cost, tech, dist = best(i)
+            if tech == UNASSIGNED or not np.isfinite(cost):
+                continue
+        if cost > popped_cost:
+            # Stale: technicians filled up since this entry was priced
+            heapq.heappush(heap, (cost, i))
+            continue
+        assignment[i] = tech
+        distances[i] = dist
+        load[tech] += 1
+        remaining -= 1
+
+    return assignment, distances
+
+
+def fetch_dispatchable_orders(
+    supabase: Client, max_orders: int
+) -> tuple[list[DispatchOrder], list[str]]:
+    """Open, unassigned work orders; returns ``(with_location, without)``."""
+    orders: list[DispatchOrder] = []
+    missing_location: list[str] = []
+    offset = 0
+    while offset < max_orders:
+        upper = min(offset + PAGE_SIZE, max_orders) - 1
+        rows = (
+            supabase.table(HOT_TABLE)
+            .select("id, location:locations(latitude, longitude)")
+            .eq("status", "Open")
+            .is_("assigned_to_user_id", "null")
+            .order("created_at")
+            .order("id")
+            .range(offset, upper)
+            .execute()
+            .data
+            or []
+        )
+        for row in rows:
+            location = row.get("location") or {}
+            lat, lon = location.get("latitude"), location.get("longitude")
+            if lat is None or lon is None:
+                missing_location.append(str(row["id"]))
+            else:
+                orders.append(DispatchOrder(str(row["id"]), float(lat), float(lon)))
+        if len(rows) < upper - offset + 1:
+            break
+        offset = upper + 1
+    return orders, missing_location
+
+
+def apply_assignments(supabase: Client, assignments: dict[str, str]) -> set[str]:
+    """Write all assignments in one call; returns the ids assigned.
+
+    Work orders assigned by hand or closed since they were fetched are
+    skipped, so every id returned was unassigned until now.
+    """
+    if not assignments:
+        return set()
+    rows = [
+        {"id": work_order_id, "assigned_to_user_id": technician_id}
+        for work_order_id, technician_id in assignments.items()
+    ]
+    response = supabase.rpc("assign_open_work_orders", {"assignments": rows}).execute()
+    return {str(row["id"]) for row in response.data or []}
@@ -0,0 +1,78 @@
+"""Versioned cache of serialized work orders.
+
+``GET /work-orders/{id}`` normally fetches the row with its location,
+validates it into a :class:`~app.models.work_orders.WorkOrder` and serializes
+it again. Rows change far less often than they are read, so the final JSON
+bytes are kept here, keyed by id and version. The version is the row's
+``updated_at`` plus its location's, which a cheap ``select`` (through RLS, so
+it is also the visibility check) returns; a matching entry is sent as is.
+
+Entries are evicted least recently used once ``settings.entity_cache_max_bytes``
+is exceeded. Versioning keeps the cache correct across workers and writers
+that bypass this process; the write handlers also invalidate eagerly so the
+memory isn't held by dead versions.
+"""
+
+from collections import OrderedDict
+from typing import Any
+
+from app.core.config import settings
+
+# Version check: own and location updated_at, no other columns
+VERSION_SELECT = "updated_at, location:locations(updated_at)"
+
+
+def row_version(row: dict[str, Any]) -> str:
+    location = row.get("location") or {}
+    return f"{row['updated_at']}|{location.get('updated_at', '')}"
+
+
+class EntityCache:
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[str, bytes]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str, version: str) -> bytes | None:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != version:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: str, version: str, data: bytes) -> None:
+        self.invalidate(key)
+        if len(data) > self.max_bytes:
+            return
+        self._entries[key] = (version, data)
+        self.size += len(data)
+        while self.size > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    def invalidate(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[1])
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size = 0
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+work_order_cache = EntityCache(settings.entity_cache_max_bytes)
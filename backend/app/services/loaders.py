@@ -0,0 +1,138 @@
+"""Request-scoped batch loaders.
+
+A loader collects the ids requested during one tick of the event loop and
+fetches them with a single ``in.(...)`` query, so code that looks work orders
+up one at a time still makes one upstream call per batch.
+
+Ids are matched case-insensitively, since PostgREST returns UUIDs in lower
+case whatever case they were asked for in. Ids that aren't UUIDs resolve to
+``None`` without being queried: PostgREST rejects the whole ``in.(...)``
+query over one malformed id, which would fail every other load in the batch.
+"""
+
+import asyncio
+import uuid
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from fastapi import Depends
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.services import archive
+from app.services.auth import get_current_user_from_token, security
+from app.services.replicas import ReadClient, get_read_client
+
+WORK_ORDER_SELECT = "*, location:locations(*)"
+
+
+class WorkOrderLoader:
+    """DataLoader-style batcher for work-order rows, keyed by id.
+
+    Results (including misses, as ``None``) are cached for the lifetime of the
+    loader, which is one request when obtained through
+    :func:`get_work_order_loader`.
+
+    ``connect`` returns the client to query with and is called right before
+    each query rather than once up front: batches run later, from the event
+    loop, by which time a shared client may be acting for another user.
+    """
+
+    def __init__(
+        self, connect: Callable[[], ReadClient], max_batch_size: int = 100
+    ) -> None:
+        self.connect = connect
+        self.max_batch_size = max_batch_size
+        self._cache: dict[str, asyncio.Future[dict[str, Any] | None]] = {}
+        self._pending: list[tuple[str, asyncio.Future[dict[str, Any] | None]]] = []
+
+    def load(self, work_order_id: str) -> asyncio.Future[dict[str, Any] | None]:
+        """Return a future resolving to the row for ``work_order_id`` or None."""
+        work_order_id = _key(work_order_id)
+        future = self._cache.get(work_order_id)
+        if future is not None:
+            return future
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._cache[work_order_id] = future
+        if not self._pending:
+            loop.call_soon(self._dispatch)
+        self._pending.append((work_order_id, future))
+        return future
+
+    async def load_many(self, ids: Iterable[str]) -> list[dict[str, Any] | None]:
+        """Load several rows at once, in the order given."""
+        return list(await asyncio.gather(*(self.load(i) for i in ids)))
+
+    def prime(self, work_order_id: str, row: dict[str, Any] | None) -> None:
+        """Seed the cache with a row the caller already has."""
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(row)
+        self._cache[_key(work_order_id)] = future
+
+    def clear(self, work_order_id: str) -> None:
+        """Forget a cached row, e.g. after the caller modified it."""
+        self._cache.pop(_key(work_order_id), None)
+
+    def _dispatch(self) -> None:
+        pending, self._pending = self._pending, []
+        for start in range(0, len(pending), self.max_batch_size):
+            batch = pending[start : start + self.max_batch_size]
+            keys = [key for key, _ in batch]
+            try:
+                rows = self._fetch(keys)
+            except Exception as e:
+                for key, future in batch:
+                    # Failures are not cached; a later load() retries
+                    if self._cache.get(key) is future:
+                        del self._cache[key]
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for key, future in batch:
+                if not future.done():
+                    future.set_result(rows.get(key))
+
+    def _fetch(self, keys: list[str]) -> dict[str, dict[str, Any]]:
+        keys = [key for key in keys if is_valid_id(key)]
+        if not keys:
+            return {}
+        rows = self._fetch_from(archive.HOT_TABLE, keys)
+        missing = [key for key in keys if key not in rows]
+        if missing:
+            # Closed work orders may have been moved to the archive
+            rows.update(self._fetch_from(archive.ARCHIVE_TABLE, missing))
+        return rows
+
+    def _fetch_from(self, table: str, keys: list[str]) -> dict[str, dict[str, Any]]:
+        response = (
+            self.connect()
+            .table(table)
+            .select(WORK_ORDER_SELECT)
+            .in_("id", keys)
+            .execute()
+        )
+        return {_key(str(row["id"])): row for row in response.data or []}
+
+
+def is_valid_id(work_order_id: str) -> bool:
+    """Whether ``work_order_id`` can be looked up (work order ids are UUIDs)."""
+    try:
+        uuid.UUID(work_order_id)
+    except ValueError:
+        return False
+    return True
+
+
+def _key(work_order_id: str) -> str:
+    return work_order_id.lower()
+
+
+def get_work_order_loader(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: dict[str, Any] = Depends(get_current_user_from_token),
+) -> WorkOrderLoader:
+    """Dependency providing a work-order loader for the current request."""
+    return WorkOrderLoader(
+        lambda: get_read_client(credentials.credentials, current_user["id"])
+    )
@@ -0,0 +1,469 @@
+"""Recurring preventive maintenance.
+
+A maintenance template is a work order blueprint plus an RFC 5545 recurrence
+rule (``FREQ=MONTHLY;BYMONTHDAY=1;BYHOUR=9``) evaluated in the template's
+timezone, so "9am on the 1st" stays 9am across DST changes.
+
+:class:`MaintenanceScheduler` keeps a min-heap keyed by each template's next
+occurrence, so a tick only touches templates that are actually due. Due
+occurrences are materialized in batches of ``settings.maintenance_batch_size``
+with one ``generate_maintenance_work_orders`` call each, which inserts the
+work orders and advances the templates' ``last_generated_at`` together.
+
+Generation is idempotent: work orders are unique per template and
+occurrence, so retries, restarts and several API instances running the
+scheduler never create duplicates. After downtime, missed occurrences are
+generated on the first tick, at most ``settings.maintenance_max_catch_up``
+(the most recent) per template and none older than
+``settings.maintenance_catch_up_window`` seconds. Templates changed elsewhere
+are picked up every ``settings.maintenance_reload_interval`` seconds.
+
+Evaluating a rule walks it from ``dtstart``, so rules are restarted at the
+last occurrence generated where that's equivalent (:func:`rebase`), loading
+templates and catching up run in a worker thread, and schedules repeating
+more often than every ``settings.maintenance_min_interval`` seconds are
+rejected. A template whose batch fails isn't generated any further until its
+retry, so later occurrences can't advance its progress past the failed ones.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+from collections import deque
+from collections.abc import Callable
+from contextlib import suppress
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from typing import Any
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from dateutil.rrule import rrule, rrulebase, rrulestr
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.services.supabase import get_supabase_service_client
+
+logger = logging.getLogger(__name__)
+
+TEMPLATES_TABLE = "maintenance_templates"
+TEMPLATE_COLUMNS = (
+    "id, rrule, dtstart, timezone, active, last_generated_at, created_at, updated_at"
+)
+PAGE_SIZE = 1000
+# Occurrences checked against the minimum interval
+FREQUENCY_SAMPLE = 50
+
+Occurrence = dict[str, str]
+
+
+def localize(dtstart: datetime, timezone: str) -> datetime:
+    """``dtstart`` in ``timezone``; naive values are wall-clock time there."""
+    tz = ZoneInfo(timezone)
+    if dtstart.tzinfo is None:
+        return dtstart.replace(tzinfo=tz)
+    return dtstart.astimezone(tz)
+
+
+def parse_schedule(rrule: str, dtstart: datetime, timezone: str) -> rrulebase:
+    """Parse a recurrence rule; raises ValueError if it or the timezone is invalid."""
+    try:
+        start = localize(dtstart, timezone)
+    except (ZoneInfoNotFoundError, ValueError) as e:
+        raise ValueError(f"Unknown timezone: {timezone}") from e
+    try:
+        schedule = rrulestr(rrule, dtstart=start)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid recurrence rule: {e}") from e
+    sample = list(itertools.islice(schedule, FREQUENCY_SAMPLE))
+    min_interval = timedelta(seconds=settings.maintenance_min_interval)
+    if any(b - a < min_interval for a, b in itertools.pairwise(sample)):
+        raise ValueError(
+            "Recurrence rule repeats more often than every"
+            f" {settings.maintenance_min_interval:g} seconds"
+        )
+    return schedule
+
+
+def rebase(schedule: rrulebase, occurrence: datetime) -> rrulebase:
+    """``schedule`` restarted at ``occurrence``, one of its occurrences.
+
+    Later occurrences are unchanged, but looking them up no longer walks the
+    rule from its original ``dtstart``. Rules that can't be restarted (with a
+    COUNT, or whose restarted form differs) are returned as they are.
+    """
+    # dateutil has no public accessors for these
+    if not isinstance(schedule, rrule) or schedule._count is not None:
+        return schedule
+    restarted = schedule.replace(
+        dtstart=occurrence.astimezone(schedule._dtstart.tzinfo)
+    )
+    if next(iter(restarted), None) != occurrence:
+        return schedule
+    return restarted
+
+
+def _parse_time(value: str | None) -> datetime | None:
+    return datetime.fromisoformat(value) if value else None
+
+
+@dataclass
+class Template:
+    id: str
+    schedule: rrulebase
+    # Occurrences strictly after this are still to be generated
+    after: datetime
+    version: int = 0
+    # Set while a failed batch waits to be retried
+    retry_at: datetime | None = None
+
+    @classmethod
+    def from_row(cls, row: dict[str, Any]) -> "Template":
+        schedule = parse_schedule(
+            row["rrule"], datetime.fromisoformat(row["dtstart"]), row["timezone"]
+        )
+        after = _parse_time(row.get("last_generated_at"))
+        if after is None:
+            # New templates don't backfill occurrences from before they existed
+            created_at = _parse_time(row.get("created_at")) or datetime.now(UTC)
+            after = created_at - timedelta(microseconds=1)
+        else:
+            schedule = rebase(schedule, after)
+        return cls(id=str(row["id"]), schedule=schedule, after=after)
+
+    def next_after(self, moment: datetime) -> datetime | None:
+        occurrence: datetime | None = self.schedule.after(moment)
+        return occurrence
+
+
+def next_due(row: dict[str, Any]) -> datetime | None:
+    """The next occurrence a template row will generate, if any."""
+    if not row.get("active", True):
+        return None
+    template = Template.from_row(row)
+    return template.next_after(template.after)
+
+
+def fetch_templates(since: str | None) -> list[dict[str, Any]]:
+    """Active templates, or all templates changed at or after ``since``."""
+    supabase = get_supabase_service_client()
+    rows: list[dict[str, Any]] = []
+    while True:
+        query = (
+            supabase.table(TEMPLATES_TABLE)
+            .select(TEMPLATE_COLUMNS)
+            .order("updated_at")
+            .order("id")
+        )
+        if since is None:
+            query = query.eq("active", True)
+        else:
+            query = query.gte("updated_at", since)
+        page = query.range(len(rows), len(rows) + PAGE_SIZE - 1).execute().data or []
+        rows.extend(page)
+        if len(page) < PAGE_SIZE:
+            return rows
+
+
+def generate_work_orders(occurrences: list[Occurrence]) -> dict[str, datetime]:
+    """Materialize occurrences as the service role.
+
+    Returns the new ``last_generated_at`` of each template that still exists.
+    """
+    supabase = get_supabase_service_client()
+    response = supabase.rpc(
+        "generate_maintenance_work_orders", {"occurrences": occurrences}
+    ).execute()
+    return {
+        str(row["template_id"]): datetime.fromisoformat(row["last_generated_at"])
+        for row in response.data or []
+    }
+
+
+def _load_templates(
+    rows: list[dict[str, Any]], progress: dict[str, datetime]
+) -> list[tuple[str, Template | None, datetime | None]]:
+    """Parse rows and find each template's next occurrence.
+
+    ``progress`` is how far this instance has generated each known template.
+    Inactive and unparseable templates come back as None, to be removed.
+    """
+    loaded: list[tuple[str, Template | None, datetime | None]] = []
+    for row in rows:
+        template_id = str(row["id"])
+        if not row.get("active", True):
+            loaded.append((template_id, None, None))
+            continue
+        try:
+            template = Template.from_row(row)
+        except ValueError:
+            logger.exception("Skipping maintenance template %s", template_id)
+            loaded.append((template_id, None, None))
+            continue
+        after = max(template.after, progress.get(template_id, template.after))
+        loaded.append((template_id, template, template.next_after(after)))
+    return loaded
+
+
+class MaintenanceScheduler:
+    def __init__(
+        self,
+        batch_size: int,
+        max_catch_up: int,
+        catch_up_window: float,
+        reload_interval: float,
+        fetch: Callable[[str | None], list[dict[str, Any]]] = fetch_templates,
+        generate: Callable[
+            [list[Occurrence]], dict[str, datetime]
+        ] = generate_work_orders,
+    ) -> None:
+        self.batch_size = batch_size
+        self.max_catch_up = max_catch_up
+        self.catch_up_window = timedelta(seconds=catch_up_window)
+        self.reload_interval = reload_interval
+        self.fetch = fetch
+        self.generate = generate
+        self.generated = 0
+        self.skipped = 0
+        self.failed_batches = 0
+        self._templates: dict[str, Template] = {}
+        # (due, tiebreak, template id, version); entries for an older version
+        # of a template are stale and skipped when they reach the top
+        self._heap: list[tuple[datetime, int, str, int]] = []
+        self._counter = itertools.count()
+        self._since: str | None = None
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def stats(self) -> dict[str, Any]:
+        upcoming = self.peek()
+        return {
+            "templates": len(self._templates),
+            "heap": len(self._heap),
+            "next_due_at": upcoming.isoformat() if upcoming else None,
+            "generated": self.generated,
+            "skipped": self.skipped,
+            "failed_batches": self.failed_batches,
+        }
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        with suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    async def schedule(self, row: dict[str, Any]) -> None:
+        """Add or replace a template from its row."""
+        await self.load([row])
+
+    async def load(self, rows: list[dict[str, Any]]) -> None:
+        """Add or replace templates from their rows.
+
+        Rules are parsed and evaluated in a worker thread.
+        """
+        progress = {
+            template_id: template.after
+            for row in rows
+            if (template := self._templates.get(template_id := str(row["id"])))
+        }
+        loaded = await run_in_threadpool(_load_templates, rows, progress)
+        for template_id, template, due in loaded:
+            if template is None:
+                self.remove(template_id)
+                continue
+            previous = self._templates.get(template_id)
+            if previous is not None:
+                template.version = previous.version + 1
+                # Keep progress this instance made that the row may not show yet
+                template.after = max(template.after, previous.after)
+                # A reload doesn't cut a failed batch's backoff short
+                template.retry_at = previous.retry_at
+            if template.retry_at is not None:
+                due = max(due, template.retry_at) if due else template.retry_at
+            self._templates[template_id] = template
+            self._push(template, due)
+        self._wake.set()
+
+    def remove(self, template_id: str) -> None:
+        # Its heap entries become stale and are discarded lazily
+        self._templates.pop(template_id, None)
+
+    def peek(self) -> datetime | None:
+        """When the next template is due."""
+        while self._heap:
+            due, _, template_id, version = self._heap[0]
+            template = self._templates.get(template_id)
+            if template is not None and template.version == version:
+                return due
+            heapq.heappop(self._heap)
+        return None
+
+    async def due(self, now: datetime) -> list[Occurrence]:
+        """Pop every template due by ``now`` and list its occurrences to generate."""
+        occurrences: list[Occurrence] = []
+        while (upcoming := self.peek()) is not None and upcoming <= now:
+            _, _, template_id, _ = heapq.heappop(self._heap)
+            template = self._templates[template_id]
+            version = template.version
+            missed, count, following = await run_in_threadpool(
+                self._missed, template, now
+            )
+            if self._templates.get(template_id) is not template or (
+                template.version != version
+            ):
+                # Replaced or removed meanwhile; a new heap entry covers it
+                continue
+            if count > len(missed):
+                self.skipped += count - len(missed)
+                logger.warning(
+                    "Maintenance template %s missed %d occurrences; generating"
+                    " the latest %d",
+                    template_id,
+                    count,
+                    len(missed),
+                )
+            occurrences.extend(
+                {"template_id": template_id, "occurrence_at": o.isoformat()}
+                for o in missed
+            )
+            template.version += 1
+            template.retry_at = None
+            self._push(template, following)
+        return occurrences
+
+    async def run_due(self, now: datetime) -> None:
+        """Generate work orders for everything due by ``now``."""
+        occurrences = await self.due(now)
+        # Templates with a failed batch; their later occurrences would move
+        # progress past the failed ones, so they wait for the retry
+        failed: set[str] = set()
+        for start in range(0, len(occurrences), self.batch_size):
+            batch = [
+                o
+                for o in occurrences[start : start + self.batch_size]
+                if o["template_id"] not in failed
+            ]
+            if not batch:
+                continue
+            try:
+                progress = await run_in_threadpool(self.generate, batch)
+            except Exception:
+                self.failed_batches += 1
+                logger.exception(
+                    "Generating %d maintenance work orders failed", len(batch)
+                )
+                failed.update(o["template_id"] for o in batch)
+                self._retry(batch, now + timedelta(seconds=self.reload_interval))
+                continue
+            self.generated += len(batch)
+            for template_id in {o["template_id"] for o in batch}:
+                template = self._templates.get(template_id)
+                if template is None:
+                    continue
+                if template_id not in progress:
+                    # Deleted since it was loaded
+                    self.remove(template_id)
+                    continue
+                if progress[template_id] > template.after:
+                    template.after = progress[template_id]
+                    template.schedule = rebase(template.schedule, template.after)
+
+    def _missed(
+        self, template: Template, now: datetime
+    ) -> tuple[list[datetime], int, datetime | None]:
+        """The latest occurrences due by ``now``, how many were due, and the next.
+
+        Only the catch-up window is looked at, however far behind the template is.
+        """
+        missed: deque[datetime] = deque(maxlen=self.max_catch_up)
+        count = 0
+        start = max(template.after, now - self.catch_up_window)
+        for occurrence in template.schedule.xafter(start):
+            if occurrence > now:
+                return list(missed), count, occurrence
+            missed.append(occurrence)
+            count += 1
+        return list(missed), count, None
+
+    async def reload(self) -> None:
+        """Load templates changed since the last reload (all on the first)."""
+        rows = await run_in_threadpool(self.fetch, self._since)
+        await self.load(rows)
+        for row in rows:
+            if self._since is None or row["updated_at"] > self._since:
+                self._since = row["updated_at"]
+        if self._since is None:
+            self._since = datetime.now(UTC).isoformat()
+
+    def _push(self, template: Template, due: datetime | None) -> None:
+        if due is None:
+            return
+        heapq.heappush(
+            self._heap, (due, next(self._counter), template.id, template.version)
+        )
+        if len(self._heap) > 2 * len(self._templates) + 64:
+            self._compact()
+
+    def _compact(self) -> None:
+        live = self._templates
+        self._heap = [
+            entry
+            for entry in self._heap
+            if entry[2] in live and live[entry[2]].version == entry[3]
+        ]
+        heapq.heapify(self._heap)
+
+    def _retry(self, batch: list[Occurrence], at: datetime) -> None:
+        # ``after`` only advances on success, so the retry regenerates from
+        # the same point; anything already inserted is skipped upstream
+        for template_id in {o["template_id"] for o in batch}:
+            template = self._templates.get(template_id)
+            if template is not None:
+                template.version += 1
+                template.retry_at = at
+                self._push(template, at)
+
+    async def _run(self) -> None:
+        next_reload = 0.0
+        loop = asyncio.get_running_loop()
+        while True:
+            if loop.time() >= next_reload:
+                try:
+                    await self.reload()
+                except Exception:
+                    logger.exception("Reloading maintenance templates failed")
+                next_reload = loop.time() + self.reload_interval
+
+            await self.run_due(datetime.now(UTC))
+
+            delay = next_reload - loop.time()
+            upcoming = self.peek()
+            if upcoming is not None:
+                delay = min(delay, (upcoming - datetime.now(UTC)).total_seconds())
+            self._wake.clear()
+            with suppress(TimeoutError):
+                await asyncio.wait_for(self._wake.wait(), max(delay, 0.0))
+
+
+maintenance_scheduler = MaintenanceScheduler(
+    batch_size=settings.maintenance_batch_size,
+    max_catch_up=settings.maintenance_max_catch_up,
+    catch_up_window=settings.maintenance_catch_up_window,
+    reload_interval=settings.maintenance_reload_interval,
+)
+
+
+def scheduler_active() -> bool:
+    """Whether this instance generates work orders (needs the service key)."""
+    return settings.maintenance_scheduler_enabled and bool(
+        settings.supabase_service_key
+    )
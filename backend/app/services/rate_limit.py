@@ -0,0 +1,141 @@
+"""Per-user token-bucket rate limiting.
+
+Buckets are keyed on ``(user id, route)``. The limit for a route comes from
+``settings.rate_limit_routes`` (keyed on the endpoint function name), falling
+back to ``settings.rate_limit_default``. Limits are written as
+``"<requests>/<period>"``, e.g. ``"60/minute"``; the request count is also the
+bucket capacity, so a client may burst up to it after being idle.
+
+The in-memory store is per process. To share buckets between workers, provide
+another :class:`RateLimitStore` by overriding the ``get_rate_limiter``
+dependency.
+"""
+
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Protocol
+
+from fastapi import Depends, HTTPException, Request, status
+
+from app.core.config import settings
+from app.services.auth import get_current_user_from_token
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    capacity: float
+    refill_per_second: float
+
+
+def parse_rate(value: str) -> RateLimit:
+    """Parse a ``"<requests>/<period>"`` limit string."""
+    try:
+        count, period = value.split("/", 1)
+        requests = float(count)
+        seconds = PERIODS[period.strip().rstrip("s")]
+    except (ValueError, KeyError) as e:
+        raise ValueError(f"Invalid rate limit: {value!r}") from e
+    return RateLimit(capacity=requests, refill_per_second=requests / seconds)
+
+
+class RateLimitStore(Protocol):
+    def acquire(self, key: str, limit: RateLimit) -> float:
+        """Take one token for ``key``.
+
+        Returns 0 when the request is allowed, otherwise the number of seconds
+        until a token becomes available.
+        """
+        ...
+
+
+class InMemoryRateLimitStore:
+    """Token buckets held in a bounded LRU map.
+
+    Each bucket is two floats, updated lazily on access, so ``acquire`` is O(1).
+    When ``max_keys`` is exceeded the least recently used bucket is dropped;
+    an evicted client simply starts again with a full bucket.
+    """
+
+    def __init__(self, max_keys: int = 10_000) -> None:
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, list[float]] = OrderedDict()
+
+    def acquire(self, key: str, limit: RateLimit) -> float:
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = [limit.capacity, now]
+            self._buckets[key] = bucket
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            tokens, updated = bucket
+            bucket[0] = min(
+                limit.capacity, tokens + (now - updated) * limit.refill_per_second
+            )
+            bucket[1] = now
+
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0.0
+        return (1 - bucket[0]) / limit.refill_per_second
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        store: RateLimitStore,
+        default: str,
+        routes: dict[str, str] | None = None,
+    ) -> None:
+        self.store = store
+        self.default = parse_rate(default)
+        self.routes = {name: parse_rate(rate) for name, rate in (routes or {}).items()}
+
+    def check(self, user_id: str, route: str) -> float:
+        """Consume a token for ``user_id`` on ``route``; see ``acquire``."""
+        limit = self.routes.get(route, self.default)
+        return self.store.acquire(f"{user_id}:{route}", limit)
+
+
+@lru_cache
+def get_rate_limiter() -> RateLimiter:
+    """Get the process-wide rate limiter (cached)."""
+    return RateLimiter(
+        store=InMemoryRateLimitStore(max_keys=settings.rate_limit_max_keys),
+        default=settings.rate_limit_default,
+        routes=settings.rate_limit_routes,
+    )
+
+
+async def rate_limit(
+    request: Request,
+    current_user: dict[str, Any] = Depends(get_current_user_from_token),
+    limiter: RateLimiter = Depends(get_rate_limiter),
+) -> None:
+    """Dependency rejecting requests over the caller's limit for this route.
+
+    Runs before the endpoint body, so a rejected request makes no PostgREST
+    calls.
+    """
+    if not settings.rate_limit_enabled:
+        return
+
+    endpoint = request.scope.get("endpoint")
+    route = getattr(endpoint, "__name__", request.url.path)
+    retry_after = limiter.check(current_user["id"], route)
+    if retry_after > 0:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Rate limit exceeded",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
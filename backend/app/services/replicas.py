@@ -0,0 +1,260 @@
+"""Read-replica routing.
+
+``settings.supabase_read_urls`` lists PostgREST endpoints serving read
+replicas of the primary database (e.g. Supabase read replica API URLs). Read
+endpoints get their client from :func:`get_read_client`, which picks the
+healthy replica with the fewest requests in flight. A replica that fails at
+the transport level or answers 502/503/504 is taken out of rotation for
+``settings.read_replica_cooldown`` seconds, and the failed GET is retried
+against the primary, so a dead replica costs one slow request rather than an
+error.
+
+Each caller gets its own PostgREST client for a replica, carrying the
+caller's JWT, over connections shared by everyone using that replica; no
+per-user state lives on anything shared.
+
+Replicas lag the primary slightly, so callers read from the primary for
+``settings.read_replica_sticky_seconds`` after their own writes (see
+:func:`track_writes`) and see what they just wrote.
+
+Only PostgREST URLs are supported: the data layer talks to PostgREST, not to
+Postgres directly, so a replica reachable only by DSN needs a PostgREST in
+front of it.
+"""
+
+import logging
+import threading
+import time
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any
+from urllib.parse import urlsplit
+
+import httpx
+from fastapi import Depends, Request
+from postgrest import SyncPostgrestClient
+from supabase import Client
+
+from app.core.config import settings
+from app.core.tracing import TracingTransport
+from app.services.auth import get_current_user_from_token
+from app.services.supabase import get_supabase_client
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = frozenset({502, 503, 504})
+READ_METHODS = frozenset({"GET", "HEAD"})
+
+# What read endpoints query: the primary's client or a replica's data API
+ReadClient = Client | SyncPostgrestClient
+
+
+@dataclass(eq=False)
+class Replica:
+    url: str
+    transport: httpx.BaseTransport | None = None
+    outstanding: int = 0
+    unhealthy_until: float = 0.0
+    failures: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.unhealthy_until
+
+
+class ReplicaTransport(httpx.BaseTransport):
+    """Count in-flight requests to a replica and fail reads over to the primary."""
+
+    def __init__(
+        self,
+        pool: "ReplicaPool",
+        replica: Replica,
+        transport: httpx.BaseTransport,
+    ) -> None:
+        self.pool = pool
+        self.replica = replica
+        self.transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        with self.replica._lock:
+            self.replica.outstanding += 1
+        try:
+            response = self.transport.handle_request(request)
+        except httpx.TransportError:
+            self.pool.mark_unhealthy(self.replica)
+            if request.method not in READ_METHODS:
+                raise
+            return self.pool.send_to_primary(request)
+        finally:
+            with self.replica._lock:
+                self.replica.outstanding -= 1
+
+        if (
+            response.status_code in RETRYABLE_STATUS_CODES
+            and request.method in READ_METHODS
+        ):
+            response.close()
+            self.pool.mark_unhealthy(self.replica)
+            return self.pool.send_to_primary(request)
+        return response
+
+
+class ReplicaPool:
+    def __init__(
+        self,
+        urls: list[str],
+        primary_url: str,
+        key: str,
+        cooldown: float = 30.0,
+        sticky_seconds: float = 5.0,
+        max_sticky_users: int = 10_000,
+        transport: httpx.BaseTransport | None = None,
+    ) -> None:
+        self.primary_url = httpx.URL(primary_url)
+        self.key = key
+        self.cooldown = cooldown
+        self.sticky_seconds = sticky_seconds
+        self.max_sticky_users = max_sticky_users
+        self._transport = transport
+        self._primary_transport = transport or self._base_transport()
+        self._sticky_until: dict[str, float] = {}
+        self._next = 0
+        self.replicas = [Replica(url) for url in urls]
+        for replica in self.replicas:
+            replica.transport = ReplicaTransport(
+                self, replica, self._transport or self._base_transport()
+            )
+
+    def _base_transport(self) -> httpx.BaseTransport:
+        transport: httpx.BaseTransport = httpx.HTTPTransport(http2=True)
+        if settings.tracing_enabled:
+            transport = TracingTransport(transport)
+        return transport
+
+    def client(self, replica: Replica, access_token: str) -> SyncPostgrestClient:
+        """A data API client acting as ``access_token`` on ``replica``."""
+        # A throwaway httpx client per caller, so its headers are its own;
+        # the connection pool lives in the shared transport
+        http_client = httpx.Client(
+            transport=replica.transport,
+            timeout=120,
+            follow_redirects=True,
+            trust_env=False,
+        )
+        return SyncPostgrestClient(
+            f"{replica.url.rstrip('/')}/rest/v1",
+            headers={"apikey": self.key, "Authorization": f"Bearer {access_token}"},
+            http_client=http_client,
+        )
+
+    def choose(self, user_id: str | None = None) -> Replica | None:
+        """The replica to read from, or None to read from the primary."""
+        if user_id is not None and self.is_sticky(user_id):
+            return None
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        # Rotate the starting point so ties don't all land on one replica
+        self._next = (self._next + 1) % len(healthy)
+        rotated = healthy[self._next :] + healthy[: self._next]
+        return min(rotated, key=lambda replica: replica.outstanding)
+
+    def mark_unhealthy(self, replica: Replica) -> None:
+        replica.failures += 1
+        replica.unhealthy_until = time.monotonic() + self.cooldown
+        logger.warning(
+            "Read replica %s failed, out of rotation for %ss",
+            urlsplit(replica.url).hostname,
+            self.cooldown,
+        )
+
+    def note_write(self, user_id: str) -> None:
+        """Send ``user_id``'s reads to the primary for the sticky window."""
+        now = time.monotonic()
+        if len(self._sticky_until) >= self.max_sticky_users:
+            self._sticky_until = {
+                user: until for user, until in self._sticky_until.items() if until > now
+            }
+        self._sticky_until[user_id] = now + self.sticky_seconds
+
+    def is_sticky(self, user_id: str) -> bool:
+        return self._sticky_until.get(user_id, 0.0) > time.monotonic()
+
+    def send_to_primary(self, request: httpx.Request) -> httpx.Response:
+        url = request.url.copy_with(
+            scheme=self.primary_url.scheme,
+            host=self.primary_url.host,
+            port=self.primary_url.port,
+        )
+        headers = [(k, v) for k, v in request.headers.raw if k.lower() != b"host"]
+        retry = httpx.Request(
+            request.method, url, headers=headers, extensions=request.extensions
+        )
+        return self._primary_transport.handle_request(retry)
+
+    def stats(self) -> list[dict[str, Any]]:
+        return [
+            {
+                "host": urlsplit(replica.url).hostname,
+                "healthy": replica.healthy,
+                "outstanding": replica.outstanding,
+                "failures": replica.failures,
+            }
+            for replica in self.replicas
+        ]
+
+
+@lru_cache
+def get_replica_pool() -> ReplicaPool:
+    """Get the replica pool for ``settings.supabase_read_urls`` (cached)."""
+    urls = []
+    for url in settings.supabase_read_urls:
+        if url.startswith(("postgres://", "postgresql://")):
+            logger.warning(
+                "Ignoring read replica DSN %s: replicas must be PostgREST URLs",
+                urlsplit(url).hostname,
+            )
+            continue
+        urls.append(url)
+    return ReplicaPool(
+        urls,
+        primary_url=settings.supabase_url,
+        key=settings.supabase_key,
+        cooldown=settings.read_replica_cooldown,
+        sticky_seconds=settings.read_replica_sticky_seconds,
+    )
+
+
+def get_read_client(access_token: str, user_id: str | None = None) -> ReadClient:
+    """Client for a read-only query on behalf of the caller.
+
+    Falls back to the primary when there are no healthy replicas or the
+    caller wrote recently.
+    """
+    pool = get_replica_pool()
+    replica = pool.choose(user_id)
+    if replica is None:
+        supabase = get_supabase_client()
+        supabase.auth.set_session(access_token, "")
+        return supabase
+    # Replicas only serve the data API; PostgREST checks the JWT itself
+    return pool.client(replica, access_token)
+
+
+async def track_writes(
+    request: Request,
+    current_user: dict[str, Any] = Depends(get_current_user_from_token),
+) -> AsyncIterator[None]:
+    """Router dependency making callers' reads sticky after their writes."""
+    if request.method in READ_METHODS or not settings.supabase_read_urls:
+        yield
+        return
+    pool = get_replica_pool()
+    # Before, for reads racing the write, and after, for the replica lag
+    pool.note_write(current_user["id"])
+    try:
+        yield
+    finally:
+        pool.note_write(current_user["id"])
@@ -0,0 +1,203 @@
+"""Access-token revocation.
+
+Signing out records the token's session id (or ``jti``) with its expiry. Every
+authenticated request is checked against an in-memory Bloom filter first; only
+on a filter hit is the exact set consulted, so the common case costs a couple
+of hashes and no network round trip.
+
+Revocations are persisted to the ``revoked_tokens`` table and each worker
+pulls new rows from it every ``settings.revocation_sync_interval`` seconds,
+so a sign-out on one worker reaches the others within one interval. Each
+pull re-reads the last ``settings.revocation_sync_overlap_seconds`` before
+the newest row seen, since ``revoked_at`` is stamped when a transaction
+starts and a slow one can commit a row older than rows already read. Entries
+are dropped once the token would have expired anyway.
+"""
+
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from contextlib import suppress
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from fastapi.concurrency import run_in_threadpool
+from jose import JWTError, jwt
+
+from app.core.config import settings
+from app.services.supabase import get_supabase_service_client
+
+logger = logging.getLogger(__name__)
+
+REVOKED_TOKENS_TABLE = "revoked_tokens"
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (no false negatives)."""
+
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        self.capacity = max(1, capacity)
+        self.num_bits = max(
+            8, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.num_hashes = max(1, round(self.num_bits / self.capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, key: str) -> list[int]:
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, key: str) -> None:
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(
+            self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key)
+        )
+
+
+class RevocationList:
+    """Revoked token keys with expiry, fronted by a Bloom filter."""
+
+    def __init__(self, capacity: int = 100_000, error_rate: float = 0.001) -> None:
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._expiry: dict[str, float] = {}
+        self._bloom = BloomFilter(capacity, error_rate)
+
+    def __len__(self) -> int:
+        return len(self._expiry)
+
+    def revoke(self, key: str, expires_at: float) -> None:
+        if expires_at <= time.time():
+            return
+        self._expiry[key] = max(expires_at, self._expiry.get(key, 0))
+        self._bloom.add(key)
+        if len(self._expiry) > self.capacity:
+            self.purge(force_rebuild=True)
+
+    def is_revoked(self, key: str) -> bool:
+        if key not in self._bloom:
+            return False
+        expires_at = self._expiry.get(key)
+        return expires_at is not None and expires_at > time.time()
+
+    def purge(self, force_rebuild: bool = False) -> int:
+        """Drop expired entries and rebuild the filter (Bloom bits can't be unset)."""
+        now = time.time()
+        expired = [key for key, exp in self._expiry.items() if exp <= now]
+        for key in expired:
+            del self._expiry[key]
+        if expired or force_rebuild:
+            self.capacity = max(self.capacity, 2 * len(self._expiry))
+            self._bloom = BloomFilter(self.capacity, self.error_rate)
+            for key in self._expiry:
+                self._bloom.add(key)
+        return len(expired)
+
+
+revocation_list = RevocationList(
+    capacity=settings.revocation_bloom_capacity,
+    error_rate=settings.revocation_bloom_error_rate,
+)
+
+
+def token_revocation_key(access_token: str) -> tuple[str, float]:
+    """Return ``(key, expires_at)`` identifying a token for revocation.
+
+    The claims are read without verifying the signature; this only decides
+    what to look up, and Supabase still verifies the token itself.
+    """
+    try:
+        claims: dict[str, Any] = jwt.get_unverified_claims(access_token)
+    except JWTError:
+        claims = {}
+    key = claims.get("session_id") or claims.get("jti")
+    if not key:
+        key = "sha256:" + hashlib.sha256(access_token.encode()).hexdigest()
+    expires_at = claims.get("exp")
+    if not isinstance(expires_at, int | float):
+        expires_at = time.time() + settings.access_token_expire_minutes * 60
+    return str(key), float(expires_at)
+
+
+def is_token_revoked(access_token: str) -> bool:
+    key, _ = token_revocation_key(access_token)
+    return revocation_list.is_revoked(key)
+
+
+def revoke_token(access_token: str) -> None:
+    """Revoke a token locally and record it for the other workers."""
+    key, expires_at = token_revocation_key(access_token)
+    revocation_list.revoke(key, expires_at)
+    if not settings.supabase_service_key:
+        return
+    try:
+        get_supabase_service_client().table(REVOKED_TOKENS_TABLE).upsert(
+            {
+                "token_key": key,
+                "expires_at": datetime.fromtimestamp(expires_at, UTC).isoformat(),
+            }
+        ).execute()
+    except Exception:
+        logger.exception("Failed to persist token revocation")
+
+
+class RevocationSync:
+    """Background task pulling revocations recorded by other workers."""
+
+    def __init__(self, interval: float, overlap: float = 0.0) -> None:
+        self.interval = interval
+        self.overlap = timedelta(seconds=overlap)
+        self._since: str | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+
+    def fetch(self) -> list[dict[str, Any]]:
+        """Read revocations newer than the last sync (blocking)."""
+        supabase = get_supabase_service_client()
+        query = (
+            supabase.table(REVOKED_TOKENS_TABLE)
+            .select("token_key, expires_at, revoked_at")
+            .gt("expires_at", datetime.now(UTC).isoformat())
+        )
+        if self._since is not None:
+            since = datetime.fromisoformat(self._since) - self.overlap
+            query = query.gte("revoked_at", since.isoformat())
+        rows: list[dict[str, Any]] = query.order("revoked_at").execute().data or []
+        return rows
+
+    def apply(self, rows: list[dict[str, Any]]) -> None:
+        """Merge fetched rows into the local list and drop expired entries."""
+        for row in rows:
+            if revocation_list.is_revoked(row["token_key"]):
+                # Already applied, by an earlier overlapping pull or locally
+                continue
+            expires_at = datetime.fromisoformat(row["expires_at"]).timestamp()
+            revocation_list.revoke(row["token_key"], expires_at)
+        if rows:
+            self._since = rows[-1]["revoked_at"]
+        revocation_list.purge()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                # Only the upstream read runs off the loop; the list itself is
+                # only ever touched from the event loop thread
+                self.apply(await run_in_threadpool(self.fetch))
+            except Exception:
+                logger.exception("Token revocation sync failed")
+            await asyncio.sleep(self.interval)
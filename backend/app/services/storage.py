@@ -0,0 +1,161 @@
+"""Blob storage for work order attachments.
+
+Backends stream in both directions: writes consume an async iterator of
+chunks and reads yield chunks of a byte range, so no file is ever held in
+memory whole. ``settings.attachments_storage`` picks the backend:
+
+- ``local``: files under ``settings.attachments_local_path`` (development,
+  single-host deployments)
+- ``supabase``: a private Supabase Storage bucket, accessed with the service
+  key; access control is enforced on the attachment rows instead
+"""
+
+import os
+from collections.abc import AsyncIterator
+from functools import lru_cache
+from pathlib import Path
+from typing import Protocol
+from urllib.parse import quote
+
+import anyio
+import httpx
+
+from app.core.config import settings
+
+
+class StorageBackend(Protocol):
+    async def write(
+        self, key: str, chunks: AsyncIterator[bytes], content_type: str
+    ) -> None:
+        """Store the chunks under ``key``, replacing any existing object."""
+        ...
+
+    def read(
+        self, key: str, start: int = 0, end: int | None = None
+    ) -> AsyncIterator[bytes]:
+        """Yield bytes ``start``..``end`` (inclusive; ``None`` for the rest)."""
+        ...
+
+    async def delete(self, key: str) -> None:
+        """Remove ``key``; missing keys are ignored."""
+        ...
+
+
+class LocalStorage:
+    """Filesystem backend; keys are relative paths under ``root``."""
+
+    def __init__(self, root: str | Path, chunk_size: int = 64 * 1024) -> None:
+        self.root = Path(root).resolve()
+        self.chunk_size = chunk_size
+
+    def _path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if not path.is_relative_to(self.root):
+            raise ValueError(f"Invalid storage key: {key}")
+        return path
+
+    async def write(
+        self, key: str, chunks: AsyncIterator[bytes], content_type: str
+    ) -> None:
+        path = self._path(key)
+        partial = path.with_name(path.name + ".partial")
+        await anyio.Path(path.parent).mkdir(parents=True, exist_ok=True)
+        try:
+            async with await anyio.open_file(partial, "wb") as f:
+                async for chunk in chunks:
+                    await f.write(chunk)
+            # Readers never see a half-written file
+            await anyio.to_thread.run_sync(os.replace, partial, path)
+        except BaseException:
+            await anyio.Path(partial).unlink(missing_ok=True)
+            raise
+
+    async def read(
+        self, key: str, start: int = 0, end: int | None = None
+    ) -> AsyncIterator[bytes]:
+        async with await anyio.open_file(self._path(key), "rb") as f:
+            await f.seek(start)
+            remaining = None if end is None else end - start + 1
+            while remaining is None or remaining > 0:
+                size = self.chunk_size
+                if remaining is not None:
+                    size = min(size, remaining)
+                chunk = await f.read(size)
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    async def delete(self, key: str) -> None:
+        await anyio.Path(self._path(key)).unlink(missing_ok=True)
+
+
+class SupabaseStorage:
+    """Supabase Storage backend (``/storage/v1`` object API)."""
+
+    def __init__(
+        self,
+        url: str,
+        service_key: str,
+        bucket: str,
+        client: httpx.AsyncClient | None = None,
+    ) -> None:
+        self.base_url = f"{url.rstrip('/')}/storage/v1/object/{quote(bucket)}"
+        self.headers = {
+            "Authorization": f"Bearer {service_key}",
+            "apikey": service_key,
+        }
+        self.client = client or httpx.AsyncClient(
+            timeout=httpx.Timeout(30.0, read=None)
+        )
+
+    def _url(self, key: str) -> str:
+        return f"{self.base_url}/{quote(key)}"
+
+    async def write(
+        self, key: str, chunks: AsyncIterator[bytes], content_type: str
+    ) -> None:
+        # An async iterator body is sent with chunked transfer encoding
+        response = await self.client.post(
+            self._url(key),
+            content=chunks,
+            headers={
+                **self.headers,
+                "Content-Type": content_type,
+                "x-upsert": "true",
+            },
+        )
+        response.raise_for_status()
+
+    async def read(
+        self, key: str, start: int = 0, end: int | None = None
+    ) -> AsyncIterator[bytes]:
+        headers = dict(self.headers)
+        if start or end is not None:
+            headers["Range"] = f"bytes={start}-{'' if end is None else end}"
+        async with self.client.stream("GET", self._url(key), headers=headers) as r:
+            r.raise_for_status()
+            async for chunk in r.aiter_bytes():
+                yield chunk
+
+    async def delete(self, key: str) -> None:
+        response = await self.client.delete(self._url(key), headers=self.headers)
+        if response.status_code != 404:
+            response.raise_for_status()
+
+
+@lru_cache
+def get_storage() -> StorageBackend:
+    """Get the configured storage backend (cached)."""
+    if settings.attachments_storage == "supabase":
+        if not settings.supabase_service_key:
+            raise ValueError("SUPABASE_SERVICE_KEY not configured")
+        return SupabaseStorage(
+            settings.supabase_url,
+            settings.supabase_service_key,
+            settings.attachments_bucket,
+        )
+    return LocalStorage(
+        settings.attachments_local_path, chunk_size=settings.attachments_chunk_size
+    )
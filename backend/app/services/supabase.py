@@ -1,8 +1,16 @@
 from functools import lru_cache
 
-from supabase import Client, create_client
+from supabase import Client, ClientOptions, create_client
 
 from app.core.config import settings
+from app.core.tracing import traced_http_client
+
+
+def _client_options() -> ClientOptions | None:
+    """Client options shared by all Supabase clients."""
+    if settings.tracing_enabled:
+        return ClientOptions(httpx_client=traced_http_client())
+    return None
 
 
 @lru_cache
@@ -11,6 +19,7 @@ def get_supabase_client() -> Client:
     return create_client(
         supabase_url=settings.supabase_url,
         supabase_key=settings.supabase_key,
+        options=_client_options(),
     )
 
 
@@ -23,4 +32,5 @@ def get_supabase_service_client() -> Client:
     return create_client(
         supabase_url=settings.supabase_url,
         supabase_key=settings.supabase_service_key,
+        options=_client_options(),
     )
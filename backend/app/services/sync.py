@@ -0,0 +1,181 @@
+"""Delta sync of work orders for offline-capable clients.
+
+A sync token records how far a client has read two streams: changed rows in
+``(updated_at, id)`` order and tombstones from ``work_order_deletions`` in
+``(deleted_at, work_order_id)`` order. Each call returns what happened after
+the token plus a new token, so reconnect traffic scales with the number of
+changes rather than the size of the table.
+
+Rows written in the last ``settings.sync_overlap_seconds`` are sent again on
+the next call, so a transaction that commits after a later-stamped one is not
+missed. Clients must therefore apply changes idempotently (upsert by id).
+"""
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from fastapi import HTTPException, status
+from supabase import Client
+
+from app.core.config import settings
+from app.services.archive import HOT_TABLE
+
+DELETIONS_TABLE = "work_order_deletions"
+EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+
+
+@dataclass(frozen=True)
+class SyncCursor:
+    at: datetime
+    id: str = ""
+
+
+@dataclass(frozen=True)
+class SyncToken:
+    changes: SyncCursor
+    deletions: SyncCursor
+
+
+@dataclass
+class SyncPage:
+    changes: list[dict[str, Any]]
+    deleted: list[str]
+    token: SyncToken
+    has_more: bool
+
+
+def encode_token(token: SyncToken) -> str:
+    """Serialize a token into an opaque URL-safe string."""
+    payload = [
+        token.changes.at.isoformat(),
+        token.changes.id,
+        token.deletions.at.isoformat(),
+        token.deletions.id,
+    ]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def decode_token(value: str) -> SyncToken:
+    """Parse a token produced by :func:`encode_token`."""
+    try:
+        padded = value + "=" * (-len(value) % 4)
+        changes_at, changes_id, deletions_at, deletions_id = json.loads(
+            base64.urlsafe_b64decode(padded)
+        )
+        return SyncToken(
+            changes=SyncCursor(datetime.fromisoformat(changes_at), str(changes_id)),
+            deletions=SyncCursor(
+                datetime.fromisoformat(deletions_at), str(deletions_id)
+            ),
+        )
+    except (ValueError, TypeError, binascii.Error) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid sync token"
+        ) from e
+
+
+def _quote(value: str) -> str:
+    return '"' + value.replace('"', '\\"') + '"'
+
+
+def _after(query: Any, at_column: str, id_column: str, cursor: SyncCursor) -> Any:
+    """Filter to rows strictly after ``cursor`` in (at, id) order."""
+    at = cursor.at.isoformat()
+    if not cursor.id:
+        return query.gte(at_column, at)
+    return query.or_(
+        f"{at_column}.gt.{_quote(at)},"
+        f"and({at_column}.eq.{_quote(at)},{id_column}.gt.{_quote(cursor.id)})"
+    )
+
+
+def _advance(
+    cursor: SyncCursor, last: SyncCursor | None, has_more: bool, horizon: datetime
+) -> SyncCursor:
+    """Next cursor; never past ``horizon`` once the stream is caught up.
+
+    Only a page with more to come may leave the cursor inside the overlap
+    window; the page that catches up pulls it back, so the window is always
+    read again, however it was paged through.
+    """
+    if has_more:
+        assert last is not None
+        return last
+    if last is None:
+        # Nothing after the cursor. An idle stream moves up to the horizon,
+        # or its cursor would age past tombstone retention
+        return SyncCursor(horizon)
+    if last.at > horizon:
+        return SyncCursor(horizon)
+    return last
+
+
+def fetch_changes(supabase: Client, token: SyncToken | None, limit: int) -> SyncPage:
+    """Read changes and tombstones after ``token`` (everything when None)."""
+    now = datetime.now(UTC)
+    horizon = now - timedelta(seconds=settings.sync_overlap_seconds)
+
+    if token is None:
+        # Initial sync: every live row, and only tombstones from now on
+        token = SyncToken(changes=SyncCursor(EPOCH), deletions=SyncCursor(horizon))
+    elif token.deletions.at < now - timedelta(
+        days=settings.sync_tombstone_retention_days
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Sync token expired, a full resync is required",
+        )
+
+    changes_query = supabase.table(HOT_TABLE).select("*, location:locations(*)")
+    changes_query = _after(changes_query, "updated_at", "id", token.changes)
+    rows = (
+        changes_query.order("updated_at").order("id").limit(limit + 1).execute().data
+        or []
+    )
+    more_changes = len(rows) > limit
+    rows = rows[:limit]
+
+    deletions_query = supabase.table(DELETIONS_TABLE).select(
+        "work_order_id, deleted_at"
+    )
+    deletions_query = _after(
+        deletions_query, "deleted_at", "work_order_id", token.deletions
+    )
+    tombstones = (
+        deletions_query.order("deleted_at")
+        .order("work_order_id")
+        .limit(limit + 1)
+        .execute()
+        .data
+        or []
+    )
+    more_deletions = len(tombstones) > limit
+    tombstones = tombstones[:limit]
+
+    last_change = (
+        SyncCursor(datetime.fromisoformat(rows[-1]["updated_at"]), str(rows[-1]["id"]))
+        if rows
+        else None
+    )
+    last_deletion = (
+        SyncCursor(
+            datetime.fromisoformat(tombstones[-1]["deleted_at"]),
+            str(tombstones[-1]["work_order_id"]),
+        )
+        if tombstones
+        else None
+    )
+
+    return SyncPage(
+        changes=rows,
+        deleted=[str(t["work_order_id"]) for t in tombstones],
+        token=SyncToken(
+            changes=_advance(token.changes, last_change, more_changes, horizon),
+            deletions=_advance(token.deletions, last_deletion, more_deletions, horizon),
+        ),
+        has_more=more_changes or more_deletions,
+    )
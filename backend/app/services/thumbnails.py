@@ -0,0 +1,67 @@
+"""Image thumbnails, rendered in a process pool.
+
+Decoding and resizing photos is CPU bound and would stall the event loop, so
+it runs in worker processes. Pillow comes from the "attachments" extra;
+without it uploads still work but get no thumbnail.
+"""
+
+import asyncio
+import io
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_CONTENT_TYPE = "image/jpeg"
+
+
+def thumbnails_available() -> bool:
+    """Whether Pillow is installed."""
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def render_thumbnail(data: bytes, max_size: int) -> bytes:
+    """Return a JPEG no larger than ``max_size`` pixels on either side."""
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as image:
+        # Phone photos are often stored sideways with an EXIF orientation tag
+        thumbnail = ImageOps.exif_transpose(image).convert("RGB")
+        thumbnail.thumbnail((max_size, max_size))
+        out = io.BytesIO()
+        thumbnail.save(out, format="JPEG", quality=85)
+    return out.getvalue()
+
+
+@lru_cache
+def get_thumbnail_executor() -> ProcessPoolExecutor:
+    """Get the shared thumbnail worker pool (created on first use)."""
+    return ProcessPoolExecutor(max_workers=settings.attachments_thumbnail_workers)
+
+
+def shutdown_thumbnail_executor() -> None:
+    if get_thumbnail_executor.cache_info().currsize:
+        get_thumbnail_executor().shutdown(cancel_futures=True)
+        get_thumbnail_executor.cache_clear()
+
+
+async def create_thumbnail(data: bytes) -> bytes | None:
+    """Render a thumbnail off the event loop; None if the image can't be read."""
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(
+            get_thumbnail_executor(),
+            render_thumbnail,
+            data,
+            settings.attachments_thumbnail_size,
+        )
+    except Exception:
+        logger.warning("Failed to render thumbnail", exc_info=True)
+        return None
@@ -0,0 +1,159 @@
+"""User directory for expanding work order assignees and creators.
+
+Work orders only carry user ids. Reads called with ``expand=assignee,creator``
+resolve every id on the page through :data:`user_directory`: ids seen within
+``settings.user_directory_ttl`` seconds come from memory, and the rest are
+fetched from ``profiles`` in a single query, so a page costs at most one
+extra upstream call however many rows it has.
+
+Profiles are read with the service key, since RLS only lets users read their
+own profile, so only the public columns (id and name) are selected; without
+``SUPABASE_SERVICE_KEY`` expansion is refused with a 503. Unknown ids are
+cached too, so a deleted user doesn't cause a lookup on every page. The cache
+holds at most ``settings.user_directory_max_entries`` users, least recently
+used first out.
+"""
+
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.models.auth import UserSummary
+from app.models.work_orders import WorkOrder
+from app.services.supabase import get_supabase_service_client
+
+PROFILES_TABLE = "profiles"
+PROFILE_COLUMNS = "id, full_name"
+
+# expand= value -> the work order field holding that user's id
+EXPANDABLE = {"assignee": "assigned_to_user_id", "creator": "created_by_user_id"}
+
+
+def parse_expand(value: str | None) -> set[str]:
+    """Parse a comma-separated ``expand`` parameter.
+
+    400 on unknown names; 503 if users can't be looked up on this server.
+    """
+    names = {name.strip() for name in (value or "").split(",") if name.strip()}
+    unknown = names - EXPANDABLE.keys()
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Cannot expand: {', '.join(sorted(unknown))}",
+        )
+    if names and not settings.supabase_service_key:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Expanding users is not available on this server",
+        )
+    return names
+
+
+def fetch_profiles(user_ids: list[str]) -> list[dict[str, Any]]:
+    supabase = get_supabase_service_client()
+    response = (
+        supabase.table(PROFILES_TABLE)
+        .select(PROFILE_COLUMNS)
+        .in_("id", user_ids)
+        .execute()
+    )
+    return response.data or []
+
+
+class UserDirectory:
+    def __init__(
+        self,
+        ttl: float,
+        max_entries: int,
+        lookup: Callable[[list[str]], list[dict[str, Any]]] = fetch_profiles,
+    ) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lookup = lookup
+        self.hits = 0
+        self.misses = 0
+        self.lookups = 0
+        # id -> (expires at, user or None if there is no such user)
+        self._entries: OrderedDict[str, tuple[float, UserSummary | None]] = (
+            OrderedDict()
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get_many(self, user_ids: Iterable[str]) -> dict[str, UserSummary]:
+        """Users by id, with at most one upstream query for the uncached ones."""
+        now = time.monotonic()
+        found: dict[str, UserSummary] = {}
+        missing: list[str] = []
+        for user_id in dict.fromkeys(user_ids):
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] <= now:
+                missing.append(user_id)
+                continue
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            if entry[1] is not None:
+                found[user_id] = entry[1]
+
+        if missing:
+            self.misses += len(missing)
+            self.lookups += 1
+            rows = await run_in_threadpool(self.lookup, missing)
+            fetched = {str(row["id"]): UserSummary(**row) for row in rows}
+            expires_at = time.monotonic() + self.ttl
+            for user_id in missing:
+                user = fetched.get(user_id)
+                self._store(user_id, expires_at, user)
+                if user is not None:
+                    found[user_id] = user
+        return found
+
+    def invalidate(self, user_id: str) -> None:
+        self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "lookups": self.lookups,
+        }
+
+    def _store(self, user_id: str, expires_at: float, user: UserSummary | None) -> None:
+        self._entries[user_id] = (expires_at, user)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+user_directory = UserDirectory(
+    ttl=settings.user_directory_ttl,
+    max_entries=settings.user_directory_max_entries,
+)
+
+
+async def expand_users(work_orders: list[WorkOrder], expand: set[str]) -> None:
+    """Fill in the ``expand``-ed user fields of ``work_orders`` in place."""
+    if not expand or not work_orders:
+        return
+    fields = [(name, EXPANDABLE[name]) for name in sorted(expand)]
+    user_ids = {
+        user_id
+        for work_order in work_orders
+        for _, field in fields
+        if (user_id := getattr(work_order, field))
+    }
+    users = await user_directory.get_many(user_ids)
+    for work_order in work_orders:
+        for name, field in fields:
+            user_id = getattr(work_order, field)
+            setattr(work_order, name, users.get(user_id) if user_id else None)
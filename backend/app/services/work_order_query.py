@@ -0,0 +1,51 @@
+"""Compile work-order list filters onto a PostgREST query.
+
+The same compiled query returns both the requested page and, via
+``count="exact"``, the total number of matching rows, so listing takes one
+upstream round trip.
+"""
+
+from typing import Any
+
+from app.models.work_orders import WorkOrderFilters
+from app.services import archive
+
+
+def source_table(filters: WorkOrderFilters) -> str:
+    """Relation to read for these filters (hot table, or hot plus archive)."""
+    return archive.source_table(
+        [s.value for s in filters.status],
+        filters.created_after,
+        filters.created_before,
+        filters.updated_after,
+        filters.updated_before,
+    )
+
+
+def apply_filters(query: Any, filters: WorkOrderFilters) -> Any:
+    """Apply filters and ordering to a PostgREST select builder."""
+    multi_value = (
+        ("status", [s.value for s in filters.status]),
+        ("priority", [p.value for p in filters.priority]),
+        ("assigned_to_user_id", filters.assigned_to),
+    )
+    for column, values in multi_value:
+        if len(values) == 1:
+            query = query.eq(column, values[0])
+        elif values:
+            query = query.in_(column, values)
+
+    ranges = (
+        ("created_at", "gte", filters.created_after),
+        ("created_at", "lt", filters.created_before),
+        ("updated_at", "gte", filters.updated_after),
+        ("updated_at", "lt", filters.updated_before),
+    )
+    for column, op, value in ranges:
+        if value is not None:
+            query = getattr(query, op)(column, value.isoformat())
+
+    # Tie-break on id so pages are stable when sort values repeat
+    desc = filters.sort.startswith("-")
+    query = query.order(filters.sort.lstrip("-"), desc=desc)
+    return query.order("id", desc=desc)
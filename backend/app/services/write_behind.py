@@ -0,0 +1,343 @@
+"""Write-behind coalescing of work order updates.
+
+Field devices send bursts of small updates (status, assignee) for the same
+work orders. With ``settings.write_behind_enabled``, a ``PUT
+/work-orders/{id}`` sent with ``Prefer: respond-async`` is validated against
+the caller's permissions, acknowledged with 202 and merged into a per-id
+patch: later values win per field, and fields the client didn't send are
+left alone (``WorkOrderUpdate.model_dump(exclude_unset=True)``). Every
+``settings.write_behind_window`` seconds the pending patches go upstream in
+a single ``bulk_update_work_orders`` call.
+
+Durability: each accepted patch is appended to a JSONL journal before it is
+acknowledged, the journal is compacted after each successful flush, and
+anything left in it is replayed on startup. Appends are fsynced in a worker
+thread, one fsync covering every request that arrived while the previous one
+ran. A synchronous update that overwrites queued fields appends a ``drop``
+record, so a replay can't resurrect the older queued values. Pending patches
+are also flushed on shutdown. Failed flushes are retried; a batch the
+database rejects is retried one patch at a time so a single bad patch can't
+wedge the rest.
+
+Each process locks a journal of its own: the first takes
+``settings.write_behind_journal_path``, further workers take
+``write_behind.1.jsonl``, ``write_behind.2.jsonl`` and so on. On startup a
+worker also replays, then removes, the journals of workers that are gone.
+"""
+
+import asyncio
+import fcntl
+import json
+import logging
+import os
+from collections.abc import Callable
+from contextlib import suppress
+from pathlib import Path
+from typing import IO, Any
+
+from fastapi.concurrency import run_in_threadpool
+from postgrest.exceptions import APIError
+
+from app.core.config import settings
+from app.services.entity_cache import work_order_cache
+from app.services.supabase import get_supabase_service_client
+
+logger = logging.getLogger(__name__)
+
+Patch = dict[str, Any]
+
+
+def bulk_update(patches: list[Patch]) -> set[str]:
+    """Apply patches in one RPC as the service role; returns the ids updated.
+
+    The caller must already have checked the user may update each row, since
+    the service role bypasses RLS.
+    """
+    supabase = get_supabase_service_client()
+    response = supabase.rpc("bulk_update_work_orders", {"patches": patches}).execute()
+    return {str(row["id"]) for row in response.data or []}
+
+
+class WriteBehindBuffer:
+    def __init__(
+        self,
+        window: float,
+        max_pending: int,
+        journal_path: str | Path | None = None,
+        apply: Callable[[list[Patch]], set[str]] = bulk_update,
+    ) -> None:
+        self.window = window
+        self.max_pending = max_pending
+        # The configured path; this process's journal may be a numbered sibling
+        self.journal_base = Path(journal_path) if journal_path else None
+        self.journal_path = self.journal_base
+        self.apply = apply
+        self.flushed = 0
+        self.failed_flushes = 0
+        self.dropped = 0
+        self._pending: dict[str, Patch] = {}
+        # The batch a flush is sending, until it succeeds or is put back
+        self._inflight: dict[str, Patch] = {}
+        self._lock = asyncio.Lock()
+        self._timer: asyncio.TimerHandle | None = None
+        self._flush_task: asyncio.Task[None] | None = None
+        self._journal: IO[str] | None = None
+        self._journal_lock: IO[str] | None = None
+        # Journal records written, and how many of those are fsynced
+        self._written = 0
+        self._synced = 0
+        self._syncing: asyncio.Task[None] | None = None
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "pending": self.pending,
+            "flushed": self.flushed,
+            "failed_flushes": self.failed_flushes,
+            "dropped": self.dropped,
+        }
+
+    async def start(self) -> None:
+        """Lock a journal, replaying anything previous processes left."""
+        if self.journal_base is None:
+            return
+        self.journal_path, self._journal_lock = self._claim_journal()
+        adopted: list[tuple[Path, IO[str]]] = []
+        for path in self._journal_paths():
+            if path == self.journal_path:
+                self._replay(path)
+            elif (lock := _try_lock(path)) is not None:
+                # Left behind by a worker that no longer runs
+                self._replay(path)
+                adopted.append((path, lock))
+        if self._pending:
+            logger.info("Replaying %d journalled work order updates", self.pending)
+        self._rewrite_journal()
+        for path, lock in adopted:
+            path.unlink(missing_ok=True)
+            lock.close()
+        if self._pending:
+            await self.flush()
+
+    async def close(self) -> None:
+        """Flush everything still pending and close the journal."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._flush_task is not None:
+            with suppress(Exception):
+                await self._flush_task
+        await self.flush()
+        await self._wait_for_sync()
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        if self._journal_lock is not None:
+            self._journal_lock.close()
+            self._journal_lock = None
+
+    async def submit(self, work_order_id: str, patch: Patch) -> None:
+        """Accept a validated patch; it is durable once this returns."""
+        # Merged before waiting for the fsync, so a flush that compacts the
+        # journal meanwhile rewrites it rather than losing the record
+        written = self._write({"id": work_order_id, "patch": patch})
+        self._merge(work_order_id, patch)
+
+        if self.pending >= self.max_pending:
+            self._schedule(0)
+        elif self._timer is None:
+            self._schedule(self.window)
+        await self._wait_for_fsync(written)
+
+    async def supersede(self, work_order_id: str, fields: list[str]) -> None:
+        """Drop queued values for fields a synchronous update just wrote."""
+        queued = [
+            batch[work_order_id]
+            for batch in (self._pending, self._inflight)
+            if work_order_id in batch
+        ]
+        if not any(name in patch for patch in queued for name in fields):
+            return
+        written = self._write({"id": work_order_id, "drop": fields})
+        self._drop(work_order_id, fields)
+        await self._wait_for_fsync(written)
+
+    async def flush(self) -> None:
+        """Send all pending patches upstream now."""
+        async with self._lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, {}
+            self._inflight = batch
+            patches = [{"id": key, **patch} for key, patch in batch.items()]
+            try:
+                try:
+                    await run_in_threadpool(self.apply, patches)
+                except APIError:
+                    await self._apply_one_by_one(patches)
+            except Exception:
+                self.failed_flushes += 1
+                logger.exception("Write-behind flush of %d updates failed", len(batch))
+                # Put the batch back underneath anything that arrived since;
+                # superseded fields are already gone from it
+                for key, patch in batch.items():
+                    if patch:
+                        self._pending[key] = {**patch, **self._pending.get(key, {})}
+                self._schedule(self.window)
+                return
+            finally:
+                self._inflight = {}
+
+            self.flushed += len(batch)
+            for key in batch:
+                work_order_cache.invalidate(key)
+            await self._wait_for_sync()
+            self._rewrite_journal()
+
+    async def _apply_one_by_one(self, patches: list[Patch]) -> None:
+        for patch in patches:
+            try:
+                await run_in_threadpool(self.apply, [patch])
+            except APIError as e:
+                self.dropped += 1
+                logger.error("Dropping rejected work order update %s: %s", patch, e)
+
+    def _merge(self, work_order_id: str, patch: Patch) -> None:
+        self._pending.setdefault(work_order_id, {}).update(patch)
+
+    def _drop(self, work_order_id: str, fields: list[str]) -> None:
+        for batch in (self._pending, self._inflight):
+            patch = batch.get(work_order_id)
+            if patch is None:
+                continue
+            for name in fields:
+                patch.pop(name, None)
+            if not patch and batch is self._pending:
+                del batch[work_order_id]
+
+    def _write(self, entry: dict[str, Any]) -> int:
+        """Write a journal record; returns its number for _wait_for_fsync."""
+        if self._journal is None:
+            return 0
+        self._journal.write(json.dumps(entry) + "\n")
+        self._journal.flush()
+        self._written += 1
+        return self._written
+
+    async def _wait_for_fsync(self, written: int) -> None:
+        """Wait until the first ``written`` journal records are on disk."""
+        while self._synced < written:
+            if self._syncing is None:
+                self._syncing = asyncio.create_task(self._sync())
+            await asyncio.shield(self._syncing)
+
+    async def _sync(self) -> None:
+        # Covers every record written before it starts, so concurrent
+        # requests share one fsync
+        assert self._journal is not None
+        written = self._written
+        try:
+            await run_in_threadpool(os.fsync, self._journal.fileno())
+            self._synced = max(self._synced, written)
+        finally:
+            self._syncing = None
+
+    async def _wait_for_sync(self) -> None:
+        # The journal file mustn't be swapped out under a running fsync
+        while self._syncing is not None:
+            with suppress(Exception):
+                await asyncio.shield(self._syncing)
+
+    def _replay(self, path: Path) -> None:
+        if not path.exists():
+            return
+        with path.open() as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from a crash mid-write
+                    continue
+                if "drop" in entry:
+                    self._drop(entry["id"], entry["drop"])
+                else:
+                    self._merge(entry["id"], entry["patch"])
+
+    def _claim_journal(self) -> tuple[Path, IO[str]]:
+        """Lock the first journal no other process holds."""
+        slot = 0
+        while (lock := _try_lock(self._journal_slot(slot))) is None:
+            slot += 1
+        return self._journal_slot(slot), lock
+
+    def _journal_slot(self, slot: int) -> Path:
+        assert self.journal_base is not None
+        base = self.journal_base
+        if slot == 0:
+            return base
+        return base.with_name(f"{base.stem}.{slot}{base.suffix}")
+
+    def _journal_paths(self) -> list[Path]:
+        """Every existing journal, this process's included."""
+        assert self.journal_base is not None
+        base = self.journal_base
+        numbered = [
+            path
+            for path in base.parent.glob(f"{base.stem}.*{base.suffix}")
+            if path.name[len(base.stem) + 1 : -len(base.suffix) or None].isdigit()
+        ]
+        paths = [base, *sorted(numbered)]
+        if self.journal_path is not None and self.journal_path not in paths:
+            paths.append(self.journal_path)
+        return paths
+
+    def _schedule(self, delay: float) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+        loop = asyncio.get_running_loop()
+        self._timer = loop.call_later(delay, self._start_flush)
+
+    def _start_flush(self) -> None:
+        self._timer = None
+        self._flush_task = asyncio.create_task(self.flush())
+
+    def _rewrite_journal(self) -> None:
+        """Compact the journal down to what is still pending."""
+        if self.journal_path is None:
+            return
+        if self._journal is not None:
+            self._journal.close()
+        partial = self.journal_path.with_name(self.journal_path.name + ".tmp")
+        with partial.open("w") as f:
+            for key, patch in self._pending.items():
+                f.write(json.dumps({"id": key, "patch": patch}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(partial, self.journal_path)
+        self._journal = self.journal_path.open("a")
+        # Everything pending was just written and fsynced
+        self._synced = self._written
+
+
+def _try_lock(journal: Path) -> IO[str] | None:
+    """Lock a journal for this process, or None if another process holds it.
+
+    The lock is on a sidecar file, since compaction replaces the journal.
+    """
+    lock = journal.with_name(journal.name + ".lock").open("a")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock.close()
+        return None
+    return lock
+
+
+write_behind = WriteBehindBuffer(
+    window=settings.write_behind_window,
+    max_pending=settings.write_behind_max_pending,
+    journal_path=settings.write_behind_journal_path,
+)
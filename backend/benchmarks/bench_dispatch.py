@@ -0,0 +1,52 @@
+"""Benchmark the dispatch solver on synthetic data.
+
+    uv run python -m benchmarks.bench_dispatch --orders 10000 --technicians 500
+
+Orders and technicians are scattered over a metro-sized area; total capacity
+is set slightly above the number of orders.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from app.services.dispatch import UNASSIGNED, solve
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, default=10_000)
+    parser.add_argument("--technicians", type=int, default=500)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    center = np.array([40.7128, -74.0060])
+    orders = center + rng.normal(scale=0.3, size=(args.orders, 2))
+    techs = center + rng.normal(scale=0.3, size=(args.technicians, 2))
+    per_tech = -(-args.orders * 11 // 10 // args.technicians)
+    capacities = [per_tech] * args.technicians
+
+    timings = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        assignment, distances = solve(orders, techs, capacities)
+        timings.append(time.perf_counter() - start)
+
+    assigned = assignment != UNASSIGNED
+    loads = np.bincount(assignment[assigned], minlength=args.technicians)
+    print(f"{args.orders} orders x {args.technicians} technicians")
+    print(
+        f"solve: best={min(timings) * 1000:.0f}ms "
+        f"median={sorted(timings)[len(timings) // 2] * 1000:.0f}ms"
+    )
+    print(
+        f"assigned={assigned.sum()} mean_km={distances[assigned].mean():.2f} "
+        f"load min/max={loads.min()}/{loads.max()} (capacity {per_tech})"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Time the work-order list and exact-count queries on the hot table.
+
+Run once before and once after archiving to compare:
+
+    uv run python -m benchmarks.bench_list_latency
+    uv run python -m app.services.archive
+    uv run python -m benchmarks.bench_list_latency
+
+Requires SUPABASE_URL and SUPABASE_SERVICE_KEY in the environment or .env.
+"""
+
+import argparse
+import statistics
+import time
+from collections.abc import Callable
+from typing import Any
+
+from app.services.archive import HOT_TABLE
+from app.services.supabase import get_supabase_service_client
+
+
+def _time(fn: Callable[[], Any], runs: int) -> list[float]:
+    fn()  # warm up connection
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def _report(name: str, samples: list[float]) -> None:
+    samples = sorted(samples)
+    p95 = samples[max(0, int(len(samples) * 0.95) - 1)]
+    print(
+        f"{name:<12} p50={statistics.median(samples):7.1f}ms "
+        f"p95={p95:7.1f}ms max={samples[-1]:7.1f}ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    client = get_supabase_service_client()
+
+    def list_page() -> Any:
+        return (
+            client.table(HOT_TABLE)
+            .select("*, location:locations(*)")
+            .range(0, args.limit - 1)
+            .execute()
+        )
+
+    def count_rows() -> Any:
+        return client.table(HOT_TABLE).select("id", count="exact").execute()
+
+    total = count_rows().count
+    print(f"{HOT_TABLE}: {total} rows, {args.runs} runs each")
+    _report("list", _time(list_page, args.runs))
+    _report("count", _time(count_rows, args.runs))
+
+
+if __name__ == "__main__":
+    main()
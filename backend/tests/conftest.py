@@ -1,7 +1,7 @@
 import os
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, Generator
 from typing import Any
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 import pytest
 import pytest_asyncio
@@ -63,6 +63,22 @@ def mock_session_response() -> dict[str, Any]:
     }
 
 
+@pytest.fixture
+def mock_auth(
+    mock_supabase_client: MagicMock,
+    mock_user_response: dict[str, Any],
+) -> Generator[MagicMock, None, None]:
+    """Authenticate bearer-token requests as the mock user."""
+    mock_response = MagicMock()
+    mock_response.user.model_dump.return_value = mock_user_response
+    mock_supabase_client.auth.get_user.return_value = mock_response
+
+    with patch(
+        "app.services.auth.get_supabase_client", return_value=mock_supabase_client
+    ):
+        yield mock_supabase_client
+
+
 @pytest.fixture(autouse=True)
 def set_test_env_vars() -> None:
     """Set test environment variables."""
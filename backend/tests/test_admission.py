@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI, status
+from httpx import ASGITransport, AsyncClient
+
+from app.core.admission import AdmissionController, AdmissionMiddleware
+
+
+def controller(max_queue: int = 1, queue_timeout: float = 0.05) -> AdmissionController:
+    return AdmissionController(
+        max_in_flight=1,
+        max_queue=max_queue,
+        queue_timeout=queue_timeout,
+        ready_cooldown=60.0,
+    )
+
+
+class TestAdmissionController:
+    """Test concurrency limiting and queueing."""
+
+    @pytest.mark.asyncio
+    async def test_queued_request_gets_released_slot(self) -> None:
+        """Test a waiter is admitted when a running request finishes."""
+        admission = controller(queue_timeout=1.0)
+        assert await admission.acquire()
+
+        waiting = asyncio.create_task(admission.acquire())
+        await asyncio.sleep(0)
+        assert admission.queued == 1
+
+        admission.release()
+        assert await waiting
+        assert admission.in_flight == 1
+        assert admission.queued == 0
+
+    @pytest.mark.asyncio
+    async def test_sheds_when_queue_full_or_deadline_passes(self) -> None:
+        """Test full queues reject immediately and waiters time out."""
+        admission = controller()
+        assert await admission.acquire()
+
+        waiting = asyncio.create_task(admission.acquire())
+        await asyncio.sleep(0)
+        assert not await admission.acquire()  # queue is full
+        assert not await waiting  # deadline passed
+
+        assert admission.rejected == 2
+        assert admission.queued == 0
+        assert admission.shedding
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_does_not_leak_slot(self) -> None:
+        """Test a client disconnecting while queued leaves no stale waiter."""
+        admission = controller(queue_timeout=1.0)
+        assert await admission.acquire()
+
+        waiting = asyncio.create_task(admission.acquire())
+        await asyncio.sleep(0)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+
+        admission.release()
+        assert admission.in_flight == 0
+        assert admission.queued == 0
+
+
+class TestAdmissionMiddleware:
+    """Test load shedding at the HTTP layer."""
+
+    @pytest.mark.asyncio
+    async def test_overloaded_returns_503_but_health_admitted(self) -> None:
+        """Test excess requests get 503 while bypass paths still succeed."""
+        admission = controller(max_queue=0)
+        app = FastAPI()
+        app.add_middleware(
+            AdmissionMiddleware, controller=admission, bypass_paths=["/health"]
+        )
+        release = asyncio.Event()
+
+        @app.get("/slow")
+        async def slow() -> dict[str, str]:
+            await release.wait()
+            return {"status": "done"}
+
+        @app.get("/health")
+        async def health() -> dict[str, str]:
+            return {"status": "healthy"}
+
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            first = asyncio.create_task(client.get("/slow"))
+            while admission.in_flight == 0:
+                await asyncio.sleep(0)
+
+            shed = await client.get("/slow")
+            health = await client.get("/health")
+            release.set()
+            assert (await first).status_code == status.HTTP_200_OK
+
+        assert shed.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert shed.headers["Retry-After"] == "1"
+        assert health.status_code == status.HTTP_200_OK
+
+
+class TestReadiness:
+    """Test the /ready endpoint."""
+
+    @pytest.mark.asyncio
+    async def test_ready(self, async_client: AsyncClient) -> None:
+        """Test /ready is 200 when not shedding."""
+        response = await async_client.get("/ready")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["status"] == "ready"
@@ -0,0 +1,132 @@
+from datetime import date
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi import HTTPException, status
+from httpx import AsyncClient
+
+from app.services import analytics
+
+
+def rpc_client(rows: list[dict[str, Any]]) -> MagicMock:
+    supabase = MagicMock()
+    supabase.rpc.return_value.execute.return_value = MagicMock(data=rows)
+    return supabase
+
+
+class TestAnalytics:
+    """Test shaping of rollup rows into analytics responses."""
+
+    def test_throughput_fills_missing_days(self) -> None:
+        """Test days without rollup rows are reported as zero."""
+        supabase = rpc_client([{"day": "2024-01-02", "opened": 5, "closed": 3}])
+
+        result = analytics.throughput(supabase, date(2024, 1, 1), date(2024, 1, 3))
+
+        assert [(d.day.day, d.opened, d.closed) for d in result.data] == [
+            (1, 0, 0),
+            (2, 5, 3),
+            (3, 0, 0),
+        ]
+        params = supabase.rpc.call_args.args[1]
+        assert params["start_day"] == "2024-01-01"
+        assert params["end_day"] == "2024-01-03"
+
+    def test_resolution_time_weights_by_count(self) -> None:
+        """Test the overall mean is weighted by resolved counts, not averaged."""
+        supabase = rpc_client(
+            [
+                {"priority": "high", "resolved": 3, "resolution_seconds_sum": 3 * 3600},
+                {"priority": "low", "resolved": 1, "resolution_seconds_sum": 9 * 3600},
+                {"priority": "medium", "resolved": 0, "resolution_seconds_sum": 0},
+            ]
+        )
+
+        result = analytics.resolution_time(
+            supabase, date(2024, 1, 1), date(2024, 1, 31)
+        )
+
+        assert result.overall.resolved == 4
+        assert result.overall.mean_resolution_hours == 3.0
+        assert [s.mean_resolution_hours for s in result.by_priority] == [1.0, 9.0, None]
+
+    def test_backlog_groups_and_ages(self) -> None:
+        """Test backlog rows are regrouped and mean age derived from epoch sums."""
+        now = 1_700_000_000.0
+        rows = [
+            {
+                "priority": "high",
+                "location_id": "loc-1",
+                "open_count": 2,
+                "created_epoch_sum": 2 * now - 2 * 7200,
+            },
+            {
+                "priority": "high",
+                "location_id": None,
+                "open_count": 1,
+                "created_epoch_sum": now - 3600,
+            },
+            {
+                "priority": "low",
+                "location_id": "loc-1",
+                "open_count": 1,
+                "created_epoch_sum": now,
+            },
+        ]
+        supabase = MagicMock()
+        query = supabase.table.return_value
+        for method in ("select", "gt", "order", "range"):
+            getattr(query, method).return_value = query
+        query.execute.return_value = MagicMock(data=rows)
+
+        by_priority = analytics.backlog(supabase, ["priority"], now=now)
+        by_location = analytics.backlog(supabase, ["location"], now=now)
+
+        assert by_priority.total == 4
+        assert [
+            (g.priority, g.open_count, g.mean_age_hours) for g in by_priority.data
+        ] == [
+            ("high", 3, pytest.approx(5 / 3, abs=0.01)),
+            ("low", 1, 0.0),
+        ]
+        assert [(g.location_id, g.open_count) for g in by_location.data] == [
+            (None, 1),
+            ("loc-1", 3),
+        ]
+
+    def test_range_validation(self) -> None:
+        """Test inverted and overlong ranges are rejected."""
+        start, end = analytics.resolve_range(None, date(2024, 1, 30))
+        assert (start, end) == (date(2024, 1, 1), date(2024, 1, 30))
+
+        for bad in [(date(2024, 2, 1), date(2024, 1, 1)), (date(2020, 1, 1), None)]:
+            with pytest.raises(HTTPException) as exc_info:
+                analytics.resolve_range(*bad)
+            assert exc_info.value.status_code == status.HTTP_400_BAD_REQUEST
+
+
+class TestAnalyticsEndpoints:
+    """Test the /analytics routes."""
+
+    @pytest.mark.asyncio
+    async def test_throughput_endpoint(
+        self,
+        async_client: AsyncClient,
+        mock_auth: MagicMock,
+    ) -> None:
+        """Test throughput is served from a single RPC call."""
+        supabase = rpc_client([{"day": "2024-01-01", "opened": 2, "closed": 1}])
+
+        with patch("app.services.replicas.get_supabase_client", return_value=supabase):
+            response = await async_client.get(
+                "/api/v1/analytics/throughput",
+                params={"start": "2024-01-01", "end": "2024-01-07"},
+                headers={"Authorization": "Bearer test-access-token"},
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()["data"]
+        assert len(data) == 7
+        assert data[0] == {"day": "2024-01-01", "opened": 2, "closed": 1}
+        supabase.rpc.assert_called_once()
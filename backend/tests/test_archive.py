@@ -0,0 +1,78 @@
+from datetime import UTC, datetime, timedelta
+from unittest.mock import MagicMock
+
+from app.services import archive
+
+
+class TestArchiveRouting:
+    """Test which relation list queries read from."""
+
+    def test_unfiltered_reads_hot_table(self) -> None:
+        """Test default listing stays on the hot table."""
+        assert archive.source_table() == archive.HOT_TABLE
+
+    def test_open_status_reads_hot_table(self) -> None:
+        """Test open statuses never touch the archive, even with old dates."""
+        old = datetime.now(UTC) - timedelta(days=3650)
+        assert archive.source_table(["Open"], created_after=old) == archive.HOT_TABLE
+
+    def test_closed_status_reads_archive(self) -> None:
+        """Test closed statuses read hot and archived rows."""
+        assert archive.source_table(["Completed"]) == archive.ALL_TABLE
+        assert archive.source_table(["Open", "Cancelled"]) == archive.ALL_TABLE
+
+    def test_date_range_past_cutoff_reads_archive(self) -> None:
+        """Test only ranges reaching past the cutoff read the archive."""
+        recent = datetime.now(UTC) - timedelta(days=1)
+        old = datetime.now(UTC) - timedelta(days=3650)
+        assert archive.source_table(created_after=recent) == archive.HOT_TABLE
+        assert archive.source_table(created_after=old) == archive.ALL_TABLE
+        assert archive.source_table(created_before=recent) == archive.ALL_TABLE
+
+    def test_updated_range_past_cutoff_reads_archive(self) -> None:
+        """Test updated_at ranges route like created_at ones."""
+        recent = datetime.now(UTC) - timedelta(days=1)
+        old = datetime.now(UTC) - timedelta(days=3650)
+        assert archive.source_table(updated_before=old) == archive.ALL_TABLE
+        assert archive.source_table(updated_after=old) == archive.ALL_TABLE
+        assert archive.source_table(updated_after=recent) == archive.HOT_TABLE
+        # Archived rows can't have been updated after the cutoff
+        assert (
+            archive.source_table(created_after=old, updated_after=recent)
+            == archive.HOT_TABLE
+        )
+
+
+class TestArchiveMover:
+    """Test the batched archive mover."""
+
+    def test_moves_until_short_batch(self) -> None:
+        """Test the mover keeps going until a batch comes back short."""
+        client = MagicMock()
+        client.rpc.return_value.execute.side_effect = [
+            MagicMock(data=10),
+            MagicMock(data=10),
+            MagicMock(data=3),
+        ]
+
+        moved = archive.archive_closed_work_orders(
+            client=client, batch_size=10, older_than_days=30
+        )
+
+        assert moved == 23
+        assert client.rpc.call_count == 3
+        client.rpc.assert_called_with(
+            "archive_work_orders", {"batch_size": 10, "older_than": "30 days"}
+        )
+
+    def test_respects_max_batches(self) -> None:
+        """Test the mover stops after max_batches."""
+        client = MagicMock()
+        client.rpc.return_value.execute.return_value = MagicMock(data=10)
+
+        moved = archive.archive_closed_work_orders(
+            client=client, batch_size=10, max_batches=2
+        )
+
+        assert moved == 20
+        assert client.rpc.call_count == 2
@@ -0,0 +1,232 @@
+import hashlib
+import io
+from collections.abc import AsyncIterator
+from pathlib import Path
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi import HTTPException, status
+from httpx import AsyncClient
+from PIL import Image
+
+from app.main import app
+from app.services.attachments import MultipartFileReader, parse_range
+from app.services.storage import LocalStorage, get_storage
+from app.services.thumbnails import render_thumbnail
+
+BOUNDARY = "test-boundary"
+CONTENT_TYPE = f"multipart/form-data; boundary={BOUNDARY}"
+
+
+def multipart_body(data: bytes, content_type: str = "image/png") -> bytes:
+    return (
+        (
+            f"--{BOUNDARY}\r\n"
+            'Content-Disposition: form-data; name="note"\r\n\r\n'
+            "ignored\r\n"
+            f"--{BOUNDARY}\r\n"
+            'Content-Disposition: form-data; name="file"; filename="pump.png"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode()
+        + data
+        + f"\r\n--{BOUNDARY}--\r\n".encode()
+    )
+
+
+async def chunked(body: bytes, size: int) -> AsyncIterator[bytes]:
+    for i in range(0, len(body), size):
+        yield body[i : i + size]
+
+
+def png(width: int = 800, height: int = 600) -> bytes:
+    out = io.BytesIO()
+    Image.new("RGB", (width, height), "red").save(out, format="PNG")
+    return out.getvalue()
+
+
+class TestMultipartFileReader:
+    """Test streaming extraction of the uploaded file."""
+
+    @pytest.mark.asyncio
+    async def test_extracts_file_across_chunk_boundaries(self) -> None:
+        """Test the file bytes, checksum and metadata survive tiny chunks."""
+        data = bytes(range(256)) * 50
+        reader = MultipartFileReader(CONTENT_TYPE)
+
+        received = b"".join(
+            [
+                piece
+                async for piece in reader.iter_file(chunked(multipart_body(data), 7))
+            ]
+        )
+
+        assert received == data
+        assert reader.file.filename == "pump.png"
+        assert reader.file.content_type == "image/png"
+        assert reader.file.size == len(data)
+        assert reader.file.sha256 == hashlib.sha256(data).hexdigest()
+
+    @pytest.mark.asyncio
+    async def test_rejects_oversized_upload(self) -> None:
+        """Test the upload is aborted as soon as it passes the limit."""
+        reader = MultipartFileReader(CONTENT_TYPE, max_bytes=100)
+
+        with pytest.raises(HTTPException) as exc_info:
+            async for _ in reader.iter_file(chunked(multipart_body(b"x" * 1000), 64)):
+                pass
+
+        assert exc_info.value.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+
+    def test_requires_multipart(self) -> None:
+        """Test non-multipart bodies are refused."""
+        with pytest.raises(HTTPException) as exc_info:
+            MultipartFileReader("application/json")
+
+        assert exc_info.value.status_code == status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+
+
+class TestRanges:
+    """Test Range header parsing and ranged reads."""
+
+    def test_parse_range(self) -> None:
+        """Test explicit, open-ended, suffix and ignored ranges."""
+        assert parse_range(None, 100) is None
+        assert parse_range("bytes=0-9", 100) == (0, 9)
+        assert parse_range("bytes=90-", 100) == (90, 99)
+        assert parse_range("bytes=50-500", 100) == (50, 99)
+        assert parse_range("bytes=-10", 100) == (90, 99)
+        assert parse_range("bytes=0-1,5-6", 100) is None
+
+        with pytest.raises(HTTPException) as exc_info:
+            parse_range("bytes=100-", 100)
+        assert exc_info.value.headers == {"Content-Range": "bytes */100"}
+
+    @pytest.mark.asyncio
+    async def test_local_storage_reads_range(self, tmp_path: Path) -> None:
+        """Test ranged reads span chunk boundaries correctly."""
+        storage = LocalStorage(tmp_path, chunk_size=4)
+        data = bytes(range(100))
+        await storage.write("a/b", chunked(data, 10), "application/octet-stream")
+
+        assert b"".join([c async for c in storage.read("a/b", 10, 29)]) == data[10:30]
+        assert b"".join([c async for c in storage.read("a/b")]) == data
+
+        with pytest.raises(ValueError):
+            storage._path("../outside")
+
+    def test_render_thumbnail(self) -> None:
+        """Test thumbnails are bounded JPEGs."""
+        thumbnail = Image.open(io.BytesIO(render_thumbnail(png(), 256)))
+
+        assert thumbnail.format == "JPEG"
+        assert thumbnail.size == (256, 192)
+
+
+class TestAttachmentEndpoints:
+    """Test upload and ranged download through the API."""
+
+    @pytest.mark.asyncio
+    async def test_upload_then_download_range(
+        self,
+        async_client: AsyncClient,
+        mock_auth: MagicMock,
+        tmp_path: Path,
+    ) -> None:
+        """Test an image is stored with a thumbnail and served in ranges."""
+        data = png()
+        stored: dict[str, Any] = {}
+
+        def insert(row: dict[str, Any]) -> MagicMock:
+            stored.update(
+                row,
+                id="att-1",
+                created_at="2024-01-01T00:00:00Z",
+            )
+            result = MagicMock()
+            result.execute.return_value = MagicMock(data=[stored])
+            return result
+
+        supabase = MagicMock()
+        query = supabase.table.return_value
+        for method in ("select", "eq", "maybe_single"):
+            getattr(query, method).return_value = query
+        query.execute.side_effect = lambda: MagicMock(data=stored or {"id": "wo-1"})
+        query.insert.side_effect = insert
+
+        storage = LocalStorage(tmp_path)
+        app.dependency_overrides[get_storage] = lambda: storage
+        headers = {"Authorization": "Bearer test-access-token"}
+        try:
+            with (
+                patch("app.api.attachments.get_supabase_client", return_value=supabase),
+                patch(
+                    "app.services.replicas.get_supabase_client", return_value=supabase
+                ),
+            ):
+                upload = await async_client.post(
+                    "/api/v1/work-orders/wo-1/attachments",
+                    files={"file": ("pump.png", data, "image/png")},
+                    headers=headers,
+                )
+                partial = await async_client.get(
+                    "/api/v1/work-orders/wo-1/attachments/att-1",
+                    headers={**headers, "Range": "bytes=0-99"},
+                )
+                thumbnail = await async_client.get(
+                    "/api/v1/work-orders/wo-1/attachments/att-1?thumbnail=true",
+                    headers=headers,
+                )
+        finally:
+            app.dependency_overrides.clear()
+
+        assert upload.status_code == status.HTTP_201_CREATED
+        body = upload.json()
+        assert body["size_bytes"] == len(data)
+        assert body["sha256"] == hashlib.sha256(data).hexdigest()
+        assert body["has_thumbnail"]
+        assert stored["uploaded_by_user_id"] == "test-user-id"
+
+        assert partial.status_code == status.HTTP_206_PARTIAL_CONTENT
+        assert partial.content == data[:100]
+        assert partial.headers["Content-Range"] == f"bytes 0-99/{len(data)}"
+
+        assert thumbnail.status_code == status.HTTP_200_OK
+        assert thumbnail.headers["content-type"] == "image/jpeg"
+
+    @pytest.mark.asyncio
+    async def test_upload_to_archived_work_order_rejected(
+        self,
+        async_client: AsyncClient,
+        mock_auth: MagicMock,
+        tmp_path: Path,
+    ) -> None:
+        """Test archived work orders are read-only and nothing is stored."""
+
+        def table(name: str) -> MagicMock:
+            query = MagicMock()
+            for method in ("select", "eq", "maybe_single"):
+                getattr(query, method).return_value = query
+            archived = name == "work_orders_archive"
+            query.execute.return_value = MagicMock(
+                data={"id": "wo-1"} if archived else None
+            )
+            return query
+
+        supabase = MagicMock()
+        supabase.table.side_effect = table
+        app.dependency_overrides[get_storage] = lambda: LocalStorage(tmp_path)
+        try:
+            with patch(
+                "app.api.attachments.get_supabase_client", return_value=supabase
+            ):
+                response = await async_client.post(
+                    "/api/v1/work-orders/wo-1/attachments",
+                    files={"file": ("pump.png", png(), "image/png")},
+                    headers={"Authorization": "Bearer test-access-token"},
+                )
+        finally:
+            app.dependency_overrides.clear()
+
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert list(tmp_path.iterdir()) == []
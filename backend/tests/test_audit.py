@@ -0,0 +1,200 @@
+import asyncio
+import time
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import status
+from httpx import AsyncClient
+
+from app.services import audit
+from app.services.audit import AuditLog, HistoryRow
+
+
+class RecordingWrite:
+    def __init__(self, fail: int = 0, delay: float = 0.0) -> None:
+        self.batches: list[list[HistoryRow]] = []
+        self.fail = fail
+        self.delay = delay
+
+    def __call__(self, rows: list[HistoryRow]) -> None:
+        if self.delay:
+            time.sleep(self.delay)
+        if self.fail:
+            self.fail -= 1
+            raise ConnectionError("upstream unavailable")
+        self.batches.append(rows)
+
+
+def rows(count: int) -> list[HistoryRow]:
+    return [audit._row(str(i), "user-1", "create") for i in range(count)]
+
+
+class TestHistoryRows:
+    """Test the change records built by handlers."""
+
+    def test_update_records_changed_fields_only(self) -> None:
+        """Test one row per field whose value differs from the prior state."""
+        before = {"id": "1", "status": "Open", "priority": "High", "title": "Leak"}
+        changes = {"status": "In Progress", "priority": "High"}
+
+        records = audit.updated("1", before, changes, "user-1")
+
+        assert len(records) == 1
+        assert records[0]["action"] == "update"
+        assert records[0]["field"] == "status"
+        assert records[0]["old_value"] == "Open"
+        assert records[0]["new_value"] == "In Progress"
+        assert records[0]["changed_by_user_id"] == "user-1"
+
+
+class TestAuditLog:
+    """Test batching, backpressure and draining."""
+
+    @pytest.mark.asyncio
+    async def test_writes_queued_rows_in_batches(self) -> None:
+        """Test rows queued together go upstream in batches of batch_size."""
+        write = RecordingWrite()
+        log = AuditLog(max_queue=100, batch_size=3, enqueue_timeout=0.1, write=write)
+        log.start()
+
+        await log.record(rows(7))
+        await log.close()
+
+        assert [len(batch) for batch in write.batches] == [3, 3, 1]
+        assert log.stats()["written"] == 7
+
+    @pytest.mark.asyncio
+    async def test_record_is_noop_when_not_started(self) -> None:
+        """Test nothing is queued unless the writer is running."""
+        log = AuditLog(max_queue=10, batch_size=10, enqueue_timeout=0.1)
+
+        await log.record(rows(3))
+
+        assert log.queued == 0
+        assert log.stats()["enqueued"] == 0
+
+    @pytest.mark.asyncio
+    async def test_full_queue_applies_backpressure_then_drops(self) -> None:
+        """Test a full queue waits for room, then drops and counts the overflow."""
+        write = RecordingWrite(delay=0.2)
+        log = AuditLog(max_queue=2, batch_size=1, enqueue_timeout=0.01, write=write)
+        log.start()
+
+        await log.record(rows(1))
+        await asyncio.sleep(0.05)  # the writer is now busy with the first row
+        await log.record(rows(4))
+        stats = log.stats()
+
+        assert stats["backpressure_waits"] == 2
+        assert stats["dropped"] == 2
+        assert stats["high_water"] == 2
+        await log.close()
+        assert log.stats()["written"] == 3
+
+    @pytest.mark.asyncio
+    async def test_retries_failed_batches(self) -> None:
+        """Test a failed write is retried before the batch is given up on."""
+        write = RecordingWrite(fail=1)
+        log = AuditLog(max_queue=10, batch_size=10, enqueue_timeout=0.1, write=write)
+        log.start()
+
+        await log.record(rows(2))
+        await log.close()
+
+        assert len(write.batches) == 1
+        assert log.stats()["failed_batches"] == 0
+        assert log.stats()["written"] == 2
+
+
+class TestHistoryEndpoints:
+    """Test history recording and GET /work-orders/{id}/history."""
+
+    def supabase(self, data: Any, count: int | None = None) -> MagicMock:
+        supabase = MagicMock()
+        query = supabase.table.return_value
+        for method in ("select", "eq", "maybe_single", "single", "update", "order"):
+            getattr(query, method).return_value = query
+        query.range.return_value = query
+        query.execute.return_value = MagicMock(data=data, count=count)
+        return supabase
+
+    @pytest.mark.asyncio
+    async def test_update_records_diff(
+        self,
+        async_client: AsyncClient,
+        mock_auth: MagicMock,
+    ) -> None:
+        """Test a synchronous update queues the diff against the prior row."""
+        row = {
+            "id": 1,
+            "title": "Leak",
+            "description": None,
+            "status": "Open",
+            "priority": "High",
+            "created_by_user_id": "test-user-id",
+            "created_at": "2024-01-01T00:00:00Z",
+            "updated_at": "2024-01-01T00:00:00Z",
+        }
+        supabase = self.supabase(row)
+        supabase.table.return_value.execute.side_effect = [
+            MagicMock(data=row),
+            MagicMock(data=[{**row, "status": "Completed"}]),
+            MagicMock(data={**row, "status": "Completed"}),
+        ]
+        audit_log = MagicMock(record=AsyncMock())
+
+        with (
+            patch("app.api.work_orders.get_supabase_client", return_value=supabase),
+            patch("app.api.work_orders.audit_log", audit_log),
+        ):
+            response = await async_client.put(
+                "/api/v1/work-orders/1",
+                json={"status": "Completed", "priority": "High"},
+                headers={"Authorization": "Bearer test-access-token"},
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        supabase.table.return_value.select.assert_any_call("*")
+        (records,) = audit_log.record.await_args.args
+        assert [(r["field"], r["old_value"], r["new_value"]) for r in records] == [
+            ("status", "Open", "Completed")
+        ]
+
+    @pytest.mark.asyncio
+    async def test_get_history(
+        self,
+        async_client: AsyncClient,
+        mock_auth: MagicMock,
+    ) -> None:
+        """Test history is paginated newest first."""
+        entry = {
+            "id": 12,
+            "work_order_id": "1",
+            "action": "update",
+            "field": "status",
+            "old_value": "Open",
+            "new_value": "Completed",
+            "changed_by_user_id": "test-user-id",
+            "changed_at": "2024-01-02T00:00:00Z",
+        }
+        supabase = self.supabase([entry], count=3)
+
+        with patch("app.services.replicas.get_supabase_client", return_value=supabase):
+            response = await async_client.get(
+                "/api/v1/work-orders/1/history?page=2&limit=2",
+                headers={"Authorization": "Bearer test-access-token"},
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        body = response.json()
+        assert body["data"][0]["new_value"] == "Completed"
+        assert body["pagination"] == {
+            "page": 2,
+            "limit": 2,
+            "total": 3,
+            "totalPages": 2,
+        }
+        supabase.table.assert_called_with("work_order_history")
+        supabase.table.return_value.range.assert_called_once_with(2, 3)
+        supabase.table.return_value.order.assert_any_call("changed_at", desc=True)
@@ -0,0 +1,165 @@
+import time
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import numpy as np
+import pytest
+from fastapi import status
+from httpx import AsyncClient
+
+from app.services.dispatch import UNASSIGNED, haversine_matrix, solve
+
+T1 = "00000000-0000-4000-8000-000000000001"
+T2 = "00000000-0000-4000-8000-000000000002"
+
+
+class TestSolver:
+    """Test the dispatch solver."""
+
+    def test_haversine(self) -> None:
+        """Test distances against a known value (NYC to LA ~3936 km)."""
+        nyc = np.array([[40.7128, -74.0060]])
+        la = np.array([[34.0522, -118.2437]])
+        assert haversine_matrix(nyc, la)[0, 0] == pytest.approx(3936, rel=0.01)
+
+    def test_assigns_nearest_within_capacity(self) -> None:
+        """Test orders go to the closest technician until capacity runs out."""
+        orders = np.array([[0.0, 0.0], [0.0, 0.01], [10.0, 10.0]])
+        techs = np.array([[0.0, 0.0], [10.0, 10.0]])
+
+        assignment, _ = solve(orders, techs, [2, 2])
+        assert assignment.tolist() == [0, 0, 1]
+
+        assignment, _ = solve(orders, techs, [1, 2])
+        assert assignment.tolist().count(0) == 1
+        assert assignment[2] == 1
+
+    def test_respects_total_capacity(self) -> None:
+        """Test orders beyond total capacity are left unassigned."""
+        orders = np.zeros((5, 2))
+        techs = np.array([[0.0, 0.0], [1.0, 1.0]])
+
+        assignment, _ = solve(orders, techs, [1, 2])
+
+        assert (assignment == UNASSIGNED).sum() == 2
+        assert np.bincount(assignment[assignment != UNASSIGNED]).tolist() == [1, 2]
+
+    def test_zero_capacity_technician_skipped(self) -> None:
+        """Test technicians without capacity get nothing, however close."""
+        orders = np.array([[0.0, 0.0]])
+        techs = np.array([[0.0, 0.0], [5.0, 5.0]])
+
+        assignment, _ = solve(orders, techs, [0, 1])
+
+        assert assignment.tolist() == [1]
+
+    def test_scale(self) -> None:
+        """Test 10k orders x 500 technicians solve in well under a few seconds."""
+        rng = np.random.default_rng(0)
+        orders = rng.normal(scale=0.3, size=(10_000, 2)) + [40.7, -74.0]
+        techs = rng.normal(scale=0.3, size=(500, 2)) + [40.7, -74.0]
+
+        start = time.perf_counter()
+        assignment, _ = solve(orders, techs, [22] * 500)
+        elapsed = time.perf_counter() - start
+
+        assert (assignment != UNASSIGNED).all()
+        assert np.bincount(assignment).max() <= 22
+        assert elapsed < 5
+
+    def test_blocked_distances_match_full_matrix(self) -> None:
+        """Test computing distances in blocks picks the same technicians."""
+        rng = np.random.default_rng(1)
+        orders = rng.normal(scale=0.3, size=(300, 2)) + [40.7, -74.0]
+        techs = rng.normal(scale=0.3, size=(40, 2)) + [40.7, -74.0]
+
+        whole, whole_km = solve(orders, techs, [8] * 40)
+        with patch("app.services.dispatch.BLOCK_CELLS", 100):
+            blocked, blocked_km = solve(orders, techs, [8] * 40)
+
+        assert blocked.tolist() == whole.tolist()
+        assert blocked_km.tolist() == whole_km.tolist()
+
+
+class TestDispatchEndpoint:
+    """Test POST /dispatch."""
+
+    @pytest.mark.asyncio
+    async def test_dispatch_applies_bulk_update(
+        self,
+        async_client: AsyncClient,
+        mock_auth: MagicMock,
+    ) -> None:
+        """Test assignments are applied in a single RPC call."""
+        rows: list[dict[str, Any]] = [
+            {"id": "a", "location": {"latitude": 0.0, "longitude": 0.0}},
+            {"id": "b", "location": {"latitude": 10.0, "longitude": 10.0}},
+            {"id": "c", "location": None},
+        ]
+        supabase = MagicMock()
+        query = supabase.table.return_value
+        for method in ("select", "eq", "is_", "order", "range"):
+            getattr(query, method).return_value = query
+        query.execute.return_value = MagicMock(data=rows)
+        supabase.rpc.return_value.execute.return_value = MagicMock(
+            data=[{"id": "a", "updated_at": "2024-01-01T00:00:00Z"}]
+        )
+
+        audit_log = AsyncMock()
+
+        with (
+            patch("app.api.dispatch.get_supabase_client", return_value=supabase),
+            patch("app.api.dispatch.audit_log", audit_log),
+        ):
+            response = await async_client.post(
+                "/api/v1/dispatch",
+                json={
+                    "technicians": [
+                        {"id": T1, "latitude": 0, "longitude": 0, "capacity": 5},
+                        {"id": T2, "latitude": 10, "longitude": 10, "capacity": 5},
+                    ]
+                },
+                headers={"Authorization": "Bearer test-access-token"},
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["assignments"] == [
+            {"work_order_id": "a", "technician_id": T1, "distance_km": 0.0}
+        ]
+        # "c" has no coordinates; "b" was assigned by hand meanwhile, or
+        # rejected by RLS, so the conditional update skipped it
+        assert sorted(data["unassigned"]) == ["b", "c"]
+        supabase.rpc.assert_called_once()
+        name, params = supabase.rpc.call_args.args
+        assert name == "assign_open_work_orders"
+        assert {a["id"] for a in params["assignments"]} == {"a", "b"}
+        ((history,),) = [call.args for call in audit_log.record.await_args_list]
+        assert [(h["work_order_id"], h["new_value"]) for h in history] == [("a", T1)]
+
+    @pytest.mark.asyncio
+    async def test_rejects_oversized_and_malformed_requests(
+        self,
+        async_client: AsyncClient,
+        mock_auth: MagicMock,
+    ) -> None:
+        """Test bad technician ids and too large a problem are a 422."""
+        technician = {"latitude": 0, "longitude": 0, "capacity": 5}
+        bodies = [
+            {"technicians": [{**technician, "id": "not-a-uuid"}]},
+            {
+                "technicians": [{**technician, "id": T1}] * 5000,
+                "max_orders": 50_000,
+            },
+        ]
+
+        with patch("app.api.dispatch.get_supabase_client") as get_client:
+            for body in bodies:
+                response = await async_client.post(
+                    "/api/v1/dispatch",
+                    json=body,
+                    headers={"Authorization": "Bearer test-access-token"},
+                )
+                assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+        get_client.assert_not_called()
@@ -0,0 +1,110 @@
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi import status
+from httpx import AsyncClient
+
+from app.services.entity_cache import VERSION_SELECT, EntityCache, work_order_cache
+
+
+class TestEntityCache:
+    """Test the byte-bounded, versioned LRU."""
+
+    def test_version_must_match(self) -> None:
+        """Test a stale version is a miss."""
+        cache = EntityCache(max_bytes=100)
+        cache.put("1", "v1", b"{}")
+
+        assert cache.get("1", "v1") == b"{}"
+        assert cache.get("1", "v2") is None
+        assert cache.stats()["hits"] == 1
+
+    def test_evicts_least_recently_used_by_bytes(self) -> None:
+        """Test the byte budget holds and recently read entries survive."""
+        cache = EntityCache(max_bytes=10)
+        cache.put("a", "v", b"aaaa")
+        cache.put("b", "v", b"bbbb")
+        cache.get("a", "v")
+        cache.put("c", "v", b"cccc")
+
+        assert cache.get("b", "v") is None
+        assert cache.get("a", "v") == b"aaaa"
+        assert cache.size == 8
+
+        cache.put("huge", "v", b"x" * 11)
+        assert cache.get("huge", "v") is None
+        assert cache.size == 8
+
+    def test_replacing_entry_keeps_size_accurate(self) -> None:
+        """Test re-putting and invalidating adjust the byte count."""
+        cache = EntityCache(max_bytes=100)
+        cache.put("a", "v1", b"12345")
+        cache.put("a", "v2", b"12")
+        assert cache.size == 2
+
+        cache.invalidate("a")
+        assert cache.size == 0
+        assert len(cache) == 0
+
+
+class TestCachedGetEndpoint:
+    """Test GET /work-orders/{id} with the cache."""
+
+    def supabase(self, versions: list[str]) -> tuple[MagicMock, MagicMock]:
+        row: dict[str, Any] = {
+            "id": 1,
+            "title": "Replace pump",
+            "status": "Open",
+            "priority": "High",
+            "created_by_user_id": "test-user-id",
+            "created_at": "2024-01-01T00:00:00Z",
+            "updated_at": versions[0],
+            "location": None,
+        }
+        version_query, full_query = MagicMock(), MagicMock()
+        for query in (version_query, full_query):
+            query.eq.return_value = query
+            query.maybe_single.return_value = query
+        version_query.execute.side_effect = [
+            MagicMock(data={"updated_at": version, "location": None})
+            for version in versions
+        ]
+
+        def full_fetch() -> MagicMock:
+            return MagicMock(data={**row, "updated_at": versions[0]})
+
+        full_query.execute.side_effect = full_fetch
+
+        supabase = MagicMock()
+        supabase.table.return_value.select.side_effect = lambda columns: (
+            version_query if columns == VERSION_SELECT else full_query
+        )
+        return supabase, full_query
+
+    @pytest.mark.asyncio
+    async def test_second_read_served_from_cache(
+        self,
+        async_client: AsyncClient,
+        mock_auth: MagicMock,
+    ) -> None:
+        """Test an unchanged row skips the full fetch, a changed one doesn't."""
+        versions = ["2024-01-01T00:00:00Z"] * 2 + ["2024-01-02T00:00:00Z"]
+        supabase, full_query = self.supabase(versions)
+        work_order_cache.clear()
+        headers = {"Authorization": "Bearer test-access-token"}
+
+        with patch("app.services.replicas.get_supabase_client", return_value=supabase):
+            first = await async_client.get("/api/v1/work-orders/1", headers=headers)
+            second = await async_client.get("/api/v1/work-orders/1", headers=headers)
+            assert full_query.execute.call_count == 1
+
+            versions[0] = "2024-01-02T00:00:00Z"
+            third = await async_client.get("/api/v1/work-orders/1", headers=headers)
+
+        assert first.status_code == second.status_code == status.HTTP_200_OK
+        assert first.content == second.content
+        assert first.json()["title"] == "Replace pump"
+        assert third.json()["updated_at"] == "2024-01-02T00:00:00Z"
+        assert full_query.execute.call_count == 2
+        work_order_cache.clear()
@@ -0,0 +1,130 @@
+import asyncio
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi import status
+from httpx import AsyncClient
+
+from app.services.loaders import WorkOrderLoader
+
+
+def make_id(n: int) -> str:
+    return f"6f1c2a9e-0000-4000-8000-{n:012d}"
+
+
+def work_order_row(work_order_id: str) -> dict[str, Any]:
+    return {
+        "id": work_order_id,
+        "title": f"Work order {work_order_id}",
+        "status": "Open",
+        "priority": "Medium",
+        "created_by_user_id": "test-user-id",
+        "created_at": "2024-01-01T00:00:00Z",
+        "updated_at": "2024-01-01T00:00:00Z",
+    }
+
+
+def supabase_with_rows(*tables: list[dict[str, Any]]) -> MagicMock:
+    """Mock client answering successive `in.(...)` queries with `tables`."""
+    supabase = MagicMock()
+    query = supabase.table.return_value.select.return_value.in_.return_value
+    query.execute.side_effect = [MagicMock(data=rows) for rows in tables]
+    return supabase
+
+
+class TestWorkOrderLoader:
+    """Test request-scoped batching of work-order lookups."""
+
+    @pytest.mark.asyncio
+    async def test_coalesces_concurrent_loads(self) -> None:
+        """Test loads issued in the same tick share one query."""
+        one, two = make_id(1), make_id(2)
+        supabase = supabase_with_rows([work_order_row(one), work_order_row(two)])
+        loader = WorkOrderLoader(lambda: supabase)
+
+        first, second = await asyncio.gather(loader.load(one), loader.load(two))
+
+        assert first is not None and first["id"] == one
+        assert second is not None and second["id"] == two
+        supabase.table.return_value.select.return_value.in_.assert_called_once_with(
+            "id", [one, two]
+        )
+
+    @pytest.mark.asyncio
+    async def test_caches_and_falls_back_to_archive(self) -> None:
+        """Test misses are looked up in the archive once, then cached."""
+        supabase = supabase_with_rows([work_order_row(make_id(1))], [])
+        loader = WorkOrderLoader(lambda: supabase)
+
+        rows = await loader.load_many([make_id(1), make_id(9)])
+        again = await loader.load(make_id(9))
+
+        assert rows[0] is not None and rows[1] is None
+        assert again is None
+        tables = [call.args[0] for call in supabase.table.call_args_list]
+        assert tables == ["work_orders", "work_orders_archive"]
+
+    @pytest.mark.asyncio
+    async def test_connects_when_the_batch_runs(self) -> None:
+        """Test the client is obtained at query time and ids match in any case."""
+        row = work_order_row("6f1c2a9e-0000-4000-8000-00000000000a")
+        supabase = supabase_with_rows([row])
+        connect = MagicMock(return_value=supabase)
+        loader = WorkOrderLoader(connect)
+
+        future = loader.load("6F1C2A9E-0000-4000-8000-00000000000A")
+        connect.assert_not_called()
+
+        assert await future == row
+        connect.assert_called_once_with()
+        assert await loader.load("6f1c2a9e-0000-4000-8000-00000000000a") == row
+
+    @pytest.mark.asyncio
+    async def test_malformed_ids_do_not_fail_the_batch(self) -> None:
+        """Test ids that aren't UUIDs resolve to None without being queried."""
+        row = work_order_row(make_id(1))
+        supabase = supabase_with_rows([row])
+        loader = WorkOrderLoader(lambda: supabase)
+
+        rows = await loader.load_many([make_id(1), "not-a-uuid", "7"])
+
+        assert rows == [row, None, None]
+        supabase.table.return_value.select.return_value.in_.assert_called_once_with(
+            "id", [make_id(1)]
+        )
+
+
+class TestBatchGetEndpoint:
+    """Test POST /work-orders:batchGet."""
+
+    @pytest.mark.asyncio
+    async def test_reports_missing_ids_per_item(
+        self,
+        async_client: AsyncClient,
+        mock_auth: MagicMock,
+    ) -> None:
+        """Test missing and malformed ids are reported per item, in order."""
+        missing = make_id(3)
+        supabase = supabase_with_rows([], [])
+
+        with patch("app.services.replicas.get_supabase_client", return_value=supabase):
+            response = await async_client.post(
+                "/api/v1/work-orders:batchGet",
+                json={"ids": ["2", missing, "2"]},
+                headers={"Authorization": "Bearer test-access-token"},
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        items = response.json()["items"]
+        assert [item["id"] for item in items] == ["2", missing]
+        assert items[0]["data"] is None
+        assert items[0]["error"] == "Invalid work order ID"
+        assert items[1]["data"] is None
+        assert "not found" in items[1]["error"]
+        # Only the well-formed id went upstream
+        in_ = supabase.table.return_value.select.return_value.in_
+        assert [call.args for call in in_.call_args_list] == [
+            ("id", [missing]),
+            ("id", [missing]),
+        ]
@@ -0,0 +1,341 @@
+from datetime import UTC, datetime
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi import status
+from httpx import AsyncClient
+
+from app.services.maintenance import (
+    MaintenanceScheduler,
+    Occurrence,
+    parse_schedule,
+    rebase,
+)
+
+
+def template_row(
+    template_id: str,
+    rrule: str = "FREQ=DAILY;BYHOUR=9",
+    last_generated_at: str | None = None,
+    **fields: Any,
+) -> dict[str, Any]:
+    return {
+        "id": template_id,
+        "rrule": rrule,
+        "dtstart": "2024-01-01T09:00:00+00:00",
+        "timezone": "UTC",
+        "active": True,
+        "last_generated_at": last_generated_at,
+        "created_at": "2024-01-01T00:00:00+00:00",
+        "updated_at": "2024-01-01T00:00:00+00:00",
+        **fields,
+    }
+
+
+class RecordingGenerate:
+    """Fake upstream: remembers occurrences, like the unique key would."""
+
+    def __init__(self, fail: int = 0, deleted: tuple[str, ...] = ()) -> None:
+        self.calls: list[list[Occurrence]] = []
+        self.inserted: set[tuple[str, str]] = set()
+        self.fail = fail
+        self.deleted = deleted
+
+    def __call__(self, occurrences: list[Occurrence]) -> dict[str, datetime]:
+        self.calls.append(occurrences)
+        if self.fail:
+            self.fail -= 1
+            raise ConnectionError("upstream unavailable")
+        progress: dict[str, datetime] = {}
+        for o in occurrences:
+            if o["template_id"] in self.deleted:
+                continue
+            self.inserted.add((o["template_id"], o["occurrence_at"]))
+            at = datetime.fromisoformat(o["occurrence_at"])
+            progress[o["template_id"]] = max(progress.get(o["template_id"], at), at)
+        return progress
+
+
+def scheduler(generate: RecordingGenerate, **kwargs: Any) -> MaintenanceScheduler:
+    options = {
+        "batch_size": 100,
+        "max_catch_up": 10,
+        "catch_up_window": 30 * 86400,
+        "reload_interval": 60,
+    }
+    return MaintenanceScheduler(
+        **{**options, **kwargs}, fetch=lambda since: [], generate=generate
+    )
+
+
+class TestSchedules:
+    """Test recurrence rule parsing."""
+
+    def test_wall_clock_time_kept_across_dst(self) -> None:
+        """Test a 9am local rule stays at 9am local when the offset changes."""
+        schedule = parse_schedule(
+            "FREQ=MONTHLY;BYMONTHDAY=1;BYHOUR=9",
+            datetime(2024, 1, 1, 9),
+            "America/New_York",
+        )
+
+        january, april = schedule[0], schedule[3]
+
+        assert (january.hour, april.hour) == (9, 9)
+        assert january.astimezone(UTC).hour == 14
+        assert april.astimezone(UTC).hour == 13
+
+    def test_invalid_rule_and_timezone(self) -> None:
+        """Test bad rules and unknown timezones raise ValueError."""
+        with pytest.raises(ValueError):
+            parse_schedule("FREQ=SOMETIMES", datetime(2024, 1, 1), "UTC")
+        with pytest.raises(ValueError):
+            parse_schedule("FREQ=DAILY", datetime(2024, 1, 1), "Mars/Olympus")
+
+    def test_too_frequent_rule(self) -> None:
+        """Test rules repeating more often than the minimum interval are refused."""
+        for rrule in ("FREQ=SECONDLY", "FREQ=HOURLY;BYMINUTE=0,30"):
+            with pytest.raises(ValueError):
+                parse_schedule(rrule, datetime(2024, 1, 1), "UTC")
+        assert parse_schedule("FREQ=HOURLY", datetime(2024, 1, 1), "UTC")
+
+    def test_rebase_keeps_later_occurrences(self) -> None:
+        """Test a rule restarted at an occurrence yields the same ones after it."""
+        schedule = parse_schedule(
+            "FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,TH;BYHOUR=9",
+            datetime(2023, 1, 2, 9),
+            "America/New_York",
+        )
+        last = schedule[120]
+
+        rebased = rebase(schedule, last.astimezone(UTC))
+
+        assert rebased[0] == last
+        assert list(rebased[1:40]) == list(schedule[121:160])
+
+    def test_rules_with_count_are_not_rebased(self) -> None:
+        """Test a COUNT rule isn't restarted, which would change where it ends."""
+        schedule = parse_schedule("FREQ=DAILY;COUNT=10", datetime(2024, 1, 1), "UTC")
+
+        assert rebase(schedule, schedule[5]) is schedule
+
+
+class TestMaintenanceScheduler:
+    """Test the due heap, catch-up and idempotent generation."""
+
+    @pytest.mark.asyncio
+    async def test_only_due_templates_are_touched(self) -> None:
+        """Test a tick generates for due templates and leaves the rest queued."""
+        generate = RecordingGenerate()
+        s = scheduler(generate)
+        await s.schedule(
+            template_row("daily", last_generated_at="2024-03-01T09:00:00+00:00")
+        )
+        await s.schedule(
+            template_row(
+                "monthly",
+                rrule="FREQ=MONTHLY;BYMONTHDAY=1;BYHOUR=9",
+                last_generated_at="2024-03-01T09:00:00+00:00",
+            )
+        )
+
+        await s.run_due(datetime(2024, 3, 2, 10, tzinfo=UTC))
+
+        assert generate.calls == [
+            [{"template_id": "daily", "occurrence_at": "2024-03-02T09:00:00+00:00"}]
+        ]
+        assert s.peek() == datetime(2024, 3, 3, 9, tzinfo=UTC)
+
+    @pytest.mark.asyncio
+    async def test_catch_up_is_capped_and_batched(self) -> None:
+        """Test downtime generates the latest missed occurrences in bulk."""
+        generate = RecordingGenerate()
+        s = scheduler(generate, batch_size=4, max_catch_up=3)
+        for name in ("a", "b"):
+            await s.schedule(
+                template_row(name, last_generated_at="2024-03-01T09:00:00+00:00")
+            )
+
+        await s.run_due(datetime(2024, 3, 10, 10, tzinfo=UTC))
+
+        assert [len(call) for call in generate.calls] == [4, 2]
+        assert sorted(generate.inserted)[:3] == [
+            ("a", "2024-03-08T09:00:00+00:00"),
+            ("a", "2024-03-09T09:00:00+00:00"),
+            ("a", "2024-03-10T09:00:00+00:00"),
+        ]
+        assert s.stats()["skipped"] == 12
+        assert s.peek() == datetime(2024, 3, 11, 9, tzinfo=UTC)
+
+    @pytest.mark.asyncio
+    async def test_catch_up_only_looks_back_over_the_window(self) -> None:
+        """Test a template far behind only scans the catch-up window."""
+        generate = RecordingGenerate()
+        s = scheduler(generate, max_catch_up=100, catch_up_window=2 * 86400)
+        await s.schedule(
+            template_row("a", last_generated_at="2024-01-01T09:00:00+00:00")
+        )
+
+        await s.run_due(datetime(2024, 3, 10, 10, tzinfo=UTC))
+
+        assert sorted(o["occurrence_at"] for o in generate.calls[0]) == [
+            "2024-03-09T09:00:00+00:00",
+            "2024-03-10T09:00:00+00:00",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_is_retried_without_duplicates(self) -> None:
+        """Test a failed generation is retried from the same point."""
+        generate = RecordingGenerate(fail=1)
+        s = scheduler(generate)
+        await s.schedule(
+            template_row("a", last_generated_at="2024-03-01T09:00:00+00:00")
+        )
+
+        await s.run_due(datetime(2024, 3, 2, 10, tzinfo=UTC))
+        retry_at = s.peek()
+        assert retry_at == datetime(2024, 3, 2, 10, 1, tzinfo=UTC)
+        await s.run_due(retry_at)
+
+        assert generate.inserted == {("a", "2024-03-02T09:00:00+00:00")}
+        assert s.stats()["failed_batches"] == 1
+        assert s.peek() == datetime(2024, 3, 3, 9, tzinfo=UTC)
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_holds_back_the_templates_later_batches(
+        self,
+    ) -> None:
+        """Test later occurrences can't advance progress past failed ones."""
+        generate = RecordingGenerate(fail=1)
+        s = scheduler(generate, batch_size=2)
+        await s.schedule(
+            template_row("a", last_generated_at="2024-03-01T09:00:00+00:00")
+        )
+
+        await s.run_due(datetime(2024, 3, 4, 10, tzinfo=UTC))
+        assert len(generate.calls) == 1
+        await s.run_due(s.peek())
+
+        assert sorted(o for _, o in generate.inserted) == [
+            "2024-03-02T09:00:00+00:00",
+            "2024-03-03T09:00:00+00:00",
+            "2024-03-04T09:00:00+00:00",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_reload_keeps_retry_backoff(self) -> None:
+        """Test a template reloaded while its retry waits isn't retried early."""
+        generate = RecordingGenerate(fail=1)
+        s = scheduler(generate)
+        row = template_row("a", last_generated_at="2024-03-01T09:00:00+00:00")
+        await s.schedule(row)
+
+        await s.run_due(datetime(2024, 3, 2, 10, tzinfo=UTC))
+        await s.schedule({**row, "title": "Renamed"})
+
+        assert s.peek() == datetime(2024, 3, 2, 10, 1, tzinfo=UTC)
+
+    @pytest.mark.asyncio
+    async def test_deleted_and_inactive_templates_are_dropped(self) -> None:
+        """Test templates gone upstream or deactivated are forgotten."""
+        generate = RecordingGenerate(deleted=("gone",))
+        s = scheduler(generate)
+        for name in ("gone", "paused"):
+            await s.schedule(
+                template_row(name, last_generated_at="2024-03-01T09:00:00+00:00")
+            )
+        await s.schedule(template_row("paused", active=False))
+
+        await s.run_due(datetime(2024, 3, 2, 10, tzinfo=UTC))
+
+        assert [o["template_id"] for o in generate.calls[0]] == ["gone"]
+        assert s.stats()["templates"] == 0
+        assert s.peek() is None
+
+    @pytest.mark.asyncio
+    async def test_reload_resumes_after_last_generated(self) -> None:
+        """Test a restart resumes from stored progress instead of dtstart."""
+        generate = RecordingGenerate()
+        s = MaintenanceScheduler(
+            batch_size=100,
+            max_catch_up=10,
+            catch_up_window=30 * 86400,
+            reload_interval=60,
+            fetch=lambda since: [
+                template_row("a", last_generated_at="2024-03-05T09:00:00+00:00")
+            ],
+            generate=generate,
+        )
+
+        await s.reload()
+
+        assert s.peek() == datetime(2024, 3, 6, 9, tzinfo=UTC)
+
+
+class TestMaintenanceEndpoints:
+    """Test the maintenance template endpoints."""
+
+    @pytest.mark.asyncio
+    async def test_create_template(
+        self,
+        async_client: AsyncClient,
+        mock_auth: MagicMock,
+    ) -> None:
+        """Test a template is stored with its dtstart localized."""
+        supabase = MagicMock()
+        supabase.table.return_value.insert.return_value.execute.return_value = (
+            MagicMock(
+                data=[
+                    {
+                        **template_row("t1", "FREQ=WEEKLY;BYDAY=MO;BYHOUR=8"),
+                        "title": "HVAC check",
+                        "priority": "Medium",
+                        "timezone": "Europe/Berlin",
+                        "dtstart": "2024-01-01T08:00:00+01:00",
+                        "created_by_user_id": "test-user-id",
+                    }
+                ]
+            )
+        )
+
+        with patch("app.api.maintenance.get_supabase_client", return_value=supabase):
+            response = await async_client.post(
+                "/api/v1/maintenance-templates",
+                json={
+                    "title": "HVAC check",
+                    "rrule": "FREQ=WEEKLY;BYDAY=MO;BYHOUR=8",
+                    "dtstart": "2024-01-01T08:00:00",
+                    "timezone": "Europe/Berlin",
+                },
+                headers={"Authorization": "Bearer test-access-token"},
+            )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        (inserted,) = supabase.table.return_value.insert.call_args.args
+        assert inserted["dtstart"] == "2024-01-01T08:00:00+01:00"
+        assert inserted["created_by_user_id"] == "test-user-id"
+        assert response.json()["next_due_at"] is not None
+
+    @pytest.mark.asyncio
+    async def test_create_rejects_invalid_rule(
+        self,
+        async_client: AsyncClient,
+        mock_auth: MagicMock,
+    ) -> None:
+        """Test an unparseable recurrence rule is rejected before any write."""
+        supabase = MagicMock()
+
+        with patch("app.api.maintenance.get_supabase_client", return_value=supabase):
+            response = await async_client.post(
+                "/api/v1/maintenance-templates",
+                json={
+                    "title": "HVAC check",
+                    "rrule": "FREQ=SOMETIMES",
+                    "dtstart": "2024-01-01T08:00:00Z",
+                },
+                headers={"Authorization": "Bearer test-access-token"},
+            )
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        supabase.table.assert_not_called()
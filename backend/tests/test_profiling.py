@@ -0,0 +1,92 @@
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI, status
+from httpx import ASGITransport, AsyncClient
+
+from app.api import debug
+from app.core.profiling import (
+    ProfilingMiddleware,
+    make_profile_token,
+    profile_store,
+    verify_profile_token,
+)
+
+
+@pytest.fixture
+def profiled_app() -> FastAPI:
+    """Create a small app with the profiling middleware installed."""
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware)
+    app.include_router(debug.router, prefix="/api/v1")
+
+    @app.get("/ping")
+    async def ping() -> dict[str, str]:
+        return {"status": "ok"}
+
+    return app
+
+
+class TestProfileToken:
+    """Test signed profiling tokens."""
+
+    def test_roundtrip(self) -> None:
+        """Test a fresh token verifies."""
+        assert verify_profile_token(make_profile_token())
+
+    def test_rejects_tampered_and_expired(self) -> None:
+        """Test bad signatures and expired tokens are rejected."""
+        expires, _, signature = make_profile_token().partition(".")
+        assert not verify_profile_token(f"{int(expires) + 1}.{signature}")
+        assert not verify_profile_token(make_profile_token(ttl_seconds=-10))
+        assert not verify_profile_token("garbage")
+        assert not verify_profile_token(None)
+
+
+class TestProfilingMiddleware:
+    """Test the profiling middleware."""
+
+    @pytest.mark.asyncio
+    async def test_unprofiled_request_passes_through(
+        self, profiled_app: FastAPI
+    ) -> None:
+        """Test requests without X-Profile are untouched."""
+        transport = ASGITransport(app=profiled_app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get("/ping")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert "x-profile-id" not in response.headers
+
+    @pytest.mark.asyncio
+    async def test_unsigned_request_not_profiled(self, profiled_app: FastAPI) -> None:
+        """Test X-Profile without a valid token is ignored outside debug."""
+        transport = ASGITransport(app=profiled_app)
+        with patch("app.core.profiling.settings.debug", False):
+            async with AsyncClient(
+                transport=transport, base_url="http://test"
+            ) as client:
+                response = await client.get("/ping", headers={"X-Profile": "1"})
+
+        assert "x-profile-id" not in response.headers
+
+    @pytest.mark.asyncio
+    async def test_profile_is_stored_and_retrievable(
+        self, profiled_app: FastAPI
+    ) -> None:
+        """Test a signed request is profiled and the profile can be fetched."""
+        headers = {"X-Profile": "1", "X-Profile-Token": make_profile_token()}
+        transport = ASGITransport(app=profiled_app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get("/ping", headers=headers)
+            profile_id = response.headers["x-profile-id"]
+            speedscope = await client.get(
+                f"/api/v1/debug/profiles/{profile_id}",
+                params={"format": "speedscope"},
+                headers=headers,
+            )
+
+        assert response.json() == {"status": "ok"}
+        assert profile_store.get(profile_id) is not None
+        assert speedscope.status_code == status.HTTP_200_OK
+        assert "speedscope" in speedscope.json()["$schema"]
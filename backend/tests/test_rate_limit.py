@@ -0,0 +1,111 @@
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi import status
+from httpx import AsyncClient
+
+from app.main import app
+from app.services.rate_limit import (
+    InMemoryRateLimitStore,
+    RateLimiter,
+    get_rate_limiter,
+    parse_rate,
+)
+
+
+class TestTokenBucket:
+    """Test the in-memory token bucket store."""
+
+    def test_parse_rate(self) -> None:
+        """Test parsing of limit strings."""
+        limit = parse_rate("60/minute")
+        assert limit.capacity == 60
+        assert limit.refill_per_second == 1
+
+        with pytest.raises(ValueError):
+            parse_rate("fast")
+
+    def test_allows_burst_then_rejects(self) -> None:
+        """Test a bucket allows `capacity` requests then reports a wait."""
+        store = InMemoryRateLimitStore()
+        limit = parse_rate("3/second")
+
+        assert [store.acquire("k", limit) for _ in range(3)] == [0, 0, 0]
+        assert store.acquire("k", limit) > 0
+
+    def test_refills_over_time(self) -> None:
+        """Test tokens are refilled based on elapsed time."""
+        store = InMemoryRateLimitStore()
+        limit = parse_rate("1/second")
+
+        with patch("app.services.rate_limit.time.monotonic", return_value=100.0):
+            assert store.acquire("k", limit) == 0
+            assert store.acquire("k", limit) == pytest.approx(1.0)
+        with patch("app.services.rate_limit.time.monotonic", return_value=101.0):
+            assert store.acquire("k", limit) == 0
+
+    def test_memory_is_bounded(self) -> None:
+        """Test least recently used buckets are evicted past max_keys."""
+        store = InMemoryRateLimitStore(max_keys=2)
+        limit = parse_rate("1/minute")
+
+        for key in ("a", "b", "c"):
+            store.acquire(key, limit)
+
+        assert len(store) == 2
+        assert store.acquire("a", limit) == 0  # evicted, so a fresh bucket
+
+    def test_route_limits(self) -> None:
+        """Test per-route limits override the default."""
+        limiter = RateLimiter(
+            InMemoryRateLimitStore(), "100/minute", {"get_work_orders": "1/minute"}
+        )
+
+        assert limiter.check("user", "get_work_orders") == 0
+        assert limiter.check("user", "get_work_orders") > 0
+        assert limiter.check("user", "get_work_order") == 0
+        assert limiter.check("other-user", "get_work_orders") == 0
+
+
+class TestRateLimitDependency:
+    """Test rate limiting on API routes."""
+
+    @pytest.mark.asyncio
+    async def test_returns_429_before_upstream_call(
+        self,
+        async_client: AsyncClient,
+        mock_supabase_client: MagicMock,
+        mock_user_response: dict[str, Any],
+    ) -> None:
+        """Test requests over the limit get 429 without touching PostgREST."""
+        mock_response = MagicMock()
+        mock_response.user.model_dump.return_value = mock_user_response
+        mock_supabase_client.auth.get_user.return_value = mock_response
+
+        limiter = RateLimiter(InMemoryRateLimitStore(), "1/minute")
+        app.dependency_overrides[get_rate_limiter] = lambda: limiter
+        data_client = MagicMock()
+        try:
+            with (
+                patch(
+                    "app.services.auth.get_supabase_client",
+                    return_value=mock_supabase_client,
+                ),
+                patch(
+                    "app.services.replicas.get_supabase_client",
+                    return_value=data_client,
+                ),
+            ):
+                headers = {"Authorization": "Bearer test-access-token"}
+                await async_client.get("/api/v1/work-orders/1", headers=headers)
+                data_client.reset_mock()
+                response = await async_client.get(
+                    "/api/v1/work-orders/1", headers=headers
+                )
+        finally:
+            app.dependency_overrides.clear()
+
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert int(response.headers["Retry-After"]) > 0
+        data_client.table.assert_not_called()
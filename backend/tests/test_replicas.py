@@ -0,0 +1,113 @@
+from unittest.mock import patch
+
+import httpx
+
+from app.core.config import settings
+from app.services.replicas import ReplicaPool, get_replica_pool
+
+PRIMARY = "https://primary.test"
+REPLICAS = ["https://replica-a.test", "https://replica-b.test"]
+
+
+class FakeDatabases:
+    """Stand-in PostgREST servers keyed by host."""
+
+    def __init__(self, down: set[str] | None = None) -> None:
+        self.down = down or set()
+        self.hits: list[str] = []
+        self.tokens: list[str] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        self.hits.append(host)
+        self.tokens.append(request.headers["Authorization"])
+        if host in self.down:
+            return httpx.Response(503)
+        return httpx.Response(200, json=[{"id": "1", "served_by": host}])
+
+
+def make_pool(databases: FakeDatabases, **kwargs: float) -> ReplicaPool:
+    return ReplicaPool(
+        REPLICAS,
+        primary_url=PRIMARY,
+        key="test-anon-key",
+        transport=httpx.MockTransport(databases),
+        **kwargs,
+    )
+
+
+class TestReplicaPool:
+    """Test replica selection, failover and read-your-writes."""
+
+    def test_least_outstanding(self) -> None:
+        """Test the replica with fewer requests in flight is chosen."""
+        pool = make_pool(FakeDatabases())
+        busy, idle = pool.replicas
+        busy.outstanding = 3
+
+        assert all(pool.choose() is idle for _ in range(4))
+
+        idle.outstanding = 3
+        assert {pool.choose() for _ in range(4)} == {busy, idle}
+
+    def test_failed_read_retried_on_primary(self) -> None:
+        """Test a 503 replica is taken out of rotation and the read still works."""
+        databases = FakeDatabases(down={"replica-a.test"})
+        pool = make_pool(databases, cooldown=60)
+        failing, other = pool.replicas
+        failing.outstanding = other.outstanding = 0
+
+        client = pool.client(failing, "token")
+        rows = client.table("work_orders").select("*").execute().data
+
+        assert rows[0]["served_by"] == "primary.test"
+        assert databases.hits == ["replica-a.test", "primary.test"]
+        assert not failing.healthy
+        assert failing.outstanding == 0
+        assert all(pool.choose() is other for _ in range(4))
+
+    def test_callers_keep_their_own_token(self) -> None:
+        """Test clients for one replica don't share credentials."""
+        databases = FakeDatabases()
+        pool = make_pool(databases)
+        replica = pool.replicas[0]
+
+        alice = pool.client(replica, "alice-token")
+        bob = pool.client(replica, "bob-token")
+        bob.table("work_orders").select("*").execute()
+        alice.table("work_orders").select("*").execute()
+
+        assert databases.tokens == ["Bearer bob-token", "Bearer alice-token"]
+
+    def test_reads_stick_to_primary_after_writes(self) -> None:
+        """Test a writer reads from the primary during the sticky window."""
+        pool = make_pool(FakeDatabases(), sticky_seconds=60)
+
+        pool.note_write("writer")
+
+        assert pool.choose("writer") is None
+        assert pool.choose("someone-else") is not None
+
+    def test_no_healthy_replicas_uses_primary(self) -> None:
+        """Test reads go to the primary when every replica is down."""
+        pool = make_pool(FakeDatabases(), cooldown=60)
+        for replica in pool.replicas:
+            pool.mark_unhealthy(replica)
+
+        assert pool.choose() is None
+
+    def test_dsns_are_skipped(self) -> None:
+        """Test Postgres DSNs are ignored; only PostgREST URLs become replicas."""
+        urls = ["postgresql://user@db:5432/postgres", REPLICAS[0]]
+        get_replica_pool.cache_clear()
+        try:
+            with (
+                patch.object(settings, "supabase_read_urls", urls),
+                patch.object(settings, "supabase_url", PRIMARY),
+                patch.object(settings, "supabase_key", "test-anon-key"),
+            ):
+                pool = get_replica_pool()
+        finally:
+            get_replica_pool.cache_clear()
+
+        assert [replica.url for replica in pool.replicas] == [REPLICAS[0]]
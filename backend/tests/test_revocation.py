@@ -0,0 +1,131 @@
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi import status
+from httpx import AsyncClient
+from jose import jwt
+
+from app.services.revocation import (
+    BloomFilter,
+    RevocationList,
+    RevocationSync,
+    revocation_list,
+    token_revocation_key,
+)
+
+
+def make_token(session_id: str, expires_in: int = 3600) -> str:
+    claims = {"sub": "test-user-id", "session_id": session_id}
+    claims["exp"] = int(time.time()) + expires_in
+    return jwt.encode(claims, "test-secret", algorithm="HS256")
+
+
+class TestRevocationList:
+    """Test the Bloom-filtered denylist."""
+
+    def test_bloom_filter_has_no_false_negatives(self) -> None:
+        """Test every added key is reported present."""
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        keys = [f"session-{i}" for i in range(1000)]
+        for key in keys:
+            bloom.add(key)
+
+        assert all(key in bloom for key in keys)
+        false_positives = sum(f"other-{i}" in bloom for i in range(10_000))
+        assert false_positives < 300
+
+    def test_revoked_until_expiry(self) -> None:
+        """Test entries stop matching, and are purged, once expired."""
+        revoked = RevocationList(capacity=10)
+        revoked.revoke("live", time.time() + 60)
+        revoked.revoke("expiring", time.time() + 60)
+        revoked.revoke("already-expired", time.time() - 1)
+
+        assert revoked.is_revoked("live")
+        assert not revoked.is_revoked("already-expired")
+        assert not revoked.is_revoked("unknown")
+
+        revoked._expiry["expiring"] = time.time() - 1
+        assert not revoked.is_revoked("expiring")
+        assert revoked.purge() == 1
+        assert len(revoked) == 1
+        assert revoked.is_revoked("live")
+
+    def test_grows_past_capacity(self) -> None:
+        """Test the filter is rebuilt larger instead of saturating."""
+        revoked = RevocationList(capacity=4)
+        for i in range(20):
+            revoked.revoke(f"session-{i}", time.time() + 60)
+
+        assert revoked.capacity >= 20
+        assert all(revoked.is_revoked(f"session-{i}") for i in range(20))
+
+    def test_token_key_prefers_session_id(self) -> None:
+        """Test all tokens of one session share a key and carry their expiry."""
+        token = make_token("session-1")
+        key, expires_at = token_revocation_key(token)
+
+        assert key == "session-1"
+        assert expires_at == jwt.get_unverified_claims(token)["exp"]
+        assert token_revocation_key("not-a-jwt")[0].startswith("sha256:")
+
+    def test_sync_applies_rows_from_other_workers(self) -> None:
+        """Test synced rows are revoked locally and advance the cursor."""
+        sync = RevocationSync(interval=5)
+        sync.apply(
+            [
+                {
+                    "token_key": "synced-session",
+                    "expires_at": "2999-01-01T00:00:00+00:00",
+                    "revoked_at": "2024-01-01T00:00:00+00:00",
+                }
+            ]
+        )
+
+        assert revocation_list.is_revoked("synced-session")
+        assert sync._since == "2024-01-01T00:00:00+00:00"
+
+    def test_sync_rereads_overlap_window(self) -> None:
+        """Test each pull reaches back so late-committing revocations are seen."""
+        sync = RevocationSync(interval=5, overlap=30)
+        sync._since = "2024-01-01T00:01:00+00:00"
+        supabase = MagicMock()
+        query = supabase.table.return_value.select.return_value.gt.return_value
+
+        with patch(
+            "app.services.revocation.get_supabase_service_client",
+            return_value=supabase,
+        ):
+            sync.fetch()
+
+        query.gte.assert_called_once_with("revoked_at", "2024-01-01T00:00:30+00:00")
+
+
+class TestSignOut:
+    """Test revocation through the API."""
+
+    @pytest.mark.asyncio
+    async def test_signed_out_token_is_rejected(
+        self,
+        async_client: AsyncClient,
+        mock_auth: MagicMock,
+    ) -> None:
+        """Test a token is refused after sign-out without calling Supabase."""
+        token = make_token("signout-session")
+        headers = {"Authorization": f"Bearer {token}"}
+        service = MagicMock()
+
+        with patch(
+            "app.services.revocation.get_supabase_service_client",
+            return_value=service,
+        ):
+            response = await async_client.post("/api/v1/auth/signout", headers=headers)
+        assert response.status_code == status.HTTP_200_OK
+
+        mock_auth.auth.get_user.reset_mock()
+        response = await async_client.get("/api/v1/auth/me", headers=headers)
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response.json()["detail"] == "Token has been revoked"
+        mock_auth.auth.get_user.assert_not_called()
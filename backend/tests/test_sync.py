@@ -0,0 +1,161 @@
+from datetime import UTC, datetime, timedelta
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi import HTTPException, status
+from httpx import AsyncClient
+
+from app.services import sync
+
+
+def chainable_query(rows: list[dict[str, Any]]) -> MagicMock:
+    """Mock query builder whose filter methods all return itself."""
+    query = MagicMock()
+    for method in ("select", "gte", "or_", "order", "limit"):
+        getattr(query, method).return_value = query
+    query.execute.return_value = MagicMock(data=rows)
+    return query
+
+
+def supabase_with(
+    changes: list[dict[str, Any]], deletions: list[dict[str, Any]]
+) -> tuple[MagicMock, MagicMock, MagicMock]:
+    changes_query = chainable_query(changes)
+    deletions_query = chainable_query(deletions)
+    supabase = MagicMock()
+    supabase.table.side_effect = lambda name: (
+        deletions_query if name == sync.DELETIONS_TABLE else changes_query
+    )
+    return supabase, changes_query, deletions_query
+
+
+def row(work_order_id: int, updated_at: datetime) -> dict[str, Any]:
+    return {
+        "id": work_order_id,
+        "title": "Fix leak",
+        "status": "Open",
+        "priority": "Medium",
+        "created_by_user_id": "test-user-id",
+        "created_at": updated_at.isoformat(),
+        "updated_at": updated_at.isoformat(),
+    }
+
+
+class TestSyncToken:
+    """Test sync token encoding."""
+
+    def test_roundtrip(self) -> None:
+        """Test a token survives encoding."""
+        token = sync.SyncToken(
+            changes=sync.SyncCursor(datetime(2024, 1, 1, tzinfo=UTC), "42"),
+            deletions=sync.SyncCursor(datetime(2024, 2, 1, tzinfo=UTC)),
+        )
+        assert sync.decode_token(sync.encode_token(token)) == token
+
+    def test_invalid_token(self) -> None:
+        """Test garbage tokens are a 400."""
+        with pytest.raises(HTTPException) as exc_info:
+            sync.decode_token("not-a-token")
+        assert exc_info.value.status_code == status.HTTP_400_BAD_REQUEST
+
+
+class TestFetchChanges:
+    """Test reading changes after a token."""
+
+    def test_pages_in_updated_at_order(self) -> None:
+        """Test a full page continues from its last row."""
+        old = datetime.now(UTC) - timedelta(days=1)
+        supabase, changes_query, _ = supabase_with(
+            [row(1, old), row(2, old), row(3, old)], []
+        )
+
+        page = sync.fetch_changes(supabase, None, limit=2)
+
+        assert [r["id"] for r in page.changes] == [1, 2]
+        assert page.has_more
+        assert page.token.changes == sync.SyncCursor(old, "2")
+        changes_query.limit.assert_called_with(3)
+
+    def test_recent_rows_are_resent(self) -> None:
+        """Test the cursor holds back by the overlap window once caught up."""
+        now = datetime.now(UTC)
+        supabase, _, _ = supabase_with(
+            [row(1, now)],
+            [{"work_order_id": "7", "deleted_at": now.isoformat()}],
+        )
+        token = sync.SyncToken(
+            changes=sync.SyncCursor(now - timedelta(minutes=5), "0"),
+            deletions=sync.SyncCursor(now - timedelta(minutes=5), "0"),
+        )
+
+        page = sync.fetch_changes(supabase, token, limit=10)
+
+        assert page.deleted == ["7"]
+        assert not page.has_more
+        assert page.token.changes.at < now
+        assert page.token.changes.id == ""
+
+    def test_overlap_reread_after_paging_into_it(self) -> None:
+        """Test a page ending inside the overlap doesn't skip re-reading it."""
+        now = datetime.now(UTC)
+        supabase, _, _ = supabase_with([row(1, now), row(2, now)], [])
+
+        first = sync.fetch_changes(supabase, None, limit=1)
+        assert first.has_more and first.token.changes.at == now
+
+        supabase, _, _ = supabase_with([], [])
+        caught_up = sync.fetch_changes(supabase, first.token, limit=1)
+
+        assert not caught_up.has_more
+        assert caught_up.token.changes.at < now
+        assert caught_up.token.changes.id == ""
+
+    def test_idle_cursor_moves_to_horizon(self) -> None:
+        """Test a stream with nothing new still advances, so it doesn't expire."""
+        now = datetime.now(UTC)
+        supabase, _, _ = supabase_with([], [])
+        token = sync.SyncToken(
+            changes=sync.SyncCursor(now - timedelta(days=20), "3"),
+            deletions=sync.SyncCursor(now - timedelta(days=20)),
+        )
+
+        page = sync.fetch_changes(supabase, token, limit=10)
+
+        for cursor in (page.token.changes, page.token.deletions):
+            assert now - timedelta(minutes=1) < cursor.at < now
+            assert cursor.id == ""
+
+    def test_expired_token(self) -> None:
+        """Test tokens older than tombstone retention need a full resync."""
+        long_ago = datetime.now(UTC) - timedelta(days=365)
+        token = sync.SyncToken(sync.SyncCursor(long_ago), sync.SyncCursor(long_ago))
+
+        with pytest.raises(HTTPException) as exc_info:
+            sync.fetch_changes(MagicMock(), token, limit=10)
+        assert exc_info.value.status_code == status.HTTP_410_GONE
+
+
+class TestChangesEndpoint:
+    """Test GET /work-orders/changes."""
+
+    @pytest.mark.asyncio
+    async def test_initial_sync(
+        self,
+        async_client: AsyncClient,
+        mock_auth: MagicMock,
+    ) -> None:
+        """Test an initial sync returns rows and a token to continue from."""
+        supabase, _, _ = supabase_with([row(1, datetime(2024, 1, 1, tzinfo=UTC))], [])
+
+        with patch("app.api.work_orders.get_supabase_client", return_value=supabase):
+            response = await async_client.get(
+                "/api/v1/work-orders/changes",
+                headers={"Authorization": "Bearer test-access-token"},
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert [c["id"] for c in data["changes"]] == [1]
+        assert data["deleted"] == []
+        assert sync.decode_token(data["next_token"])
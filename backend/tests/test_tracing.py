@@ -0,0 +1,95 @@
+from collections.abc import Generator
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+from opentelemetry.trace import SpanKind
+
+from app.core import tracing
+
+
+@pytest.fixture
+def span_exporter(
+    monkeypatch: pytest.MonkeyPatch,
+) -> Generator[InMemorySpanExporter, None, None]:
+    """Route spans from app.core.tracing into an in-memory exporter."""
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    monkeypatch.setattr(tracing, "tracer", provider.get_tracer("test"))
+    yield exporter
+    provider.shutdown()
+
+
+class TestTracingTransport:
+    """Test client spans around Supabase calls."""
+
+    def test_postgrest_select_span(self, span_exporter: InMemorySpanExporter) -> None:
+        """Test table, operation and row counts are recorded and context sent."""
+        seen: list[httpx.Request] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            seen.append(request)
+            return httpx.Response(200, json=[], headers={"Content-Range": "0-9/42"})
+
+        client = httpx.Client(
+            transport=tracing.TracingTransport(httpx.MockTransport(handler))
+        )
+        client.get("https://test.supabase.co/rest/v1/work_orders?select=*")
+
+        (span,) = span_exporter.get_finished_spans()
+        assert span.name == "PostgREST select work_orders"
+        assert span.kind == SpanKind.CLIENT
+        assert span.attributes["db.collection.name"] == "work_orders"
+        assert span.attributes["db.operation.name"] == "select"
+        assert span.attributes["db.response.returned_rows"] == 10
+        assert span.attributes["db.response.total_rows"] == 42
+        assert "traceparent" in seen[0].headers
+
+    def test_gotrue_span(self, span_exporter: InMemorySpanExporter) -> None:
+        """Test GoTrue calls get their own span name."""
+        client = httpx.Client(
+            transport=tracing.TracingTransport(
+                httpx.MockTransport(lambda request: httpx.Response(200, json={}))
+            )
+        )
+        client.get("https://test.supabase.co/auth/v1/user")
+
+        (span,) = span_exporter.get_finished_spans()
+        assert span.name == "GoTrue GET user"
+
+
+class TestTracingMiddleware:
+    """Test server spans."""
+
+    @pytest.mark.asyncio
+    async def test_server_span_continues_incoming_trace(
+        self, span_exporter: InMemorySpanExporter
+    ) -> None:
+        """Test the server span is named by route and joins the caller's trace."""
+        app = FastAPI()
+        app.add_middleware(tracing.TracingMiddleware)
+
+        @app.get("/items/{item_id}")
+        async def read_item(item_id: str) -> dict[str, str]:
+            return {"id": item_id}
+
+        trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            await client.get(
+                "/items/1",
+                headers={"traceparent": f"00-{trace_id}-00f067aa0ba902b7-01"},
+            )
+
+        (span,) = span_exporter.get_finished_spans()
+        assert span.kind == SpanKind.SERVER
+        assert span.name == "GET /items/{item_id}"
+        assert format(span.context.trace_id, "032x") == trace_id
+        assert span.attributes["http.response.status_code"] == 200
@@ -0,0 +1,189 @@
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi import HTTPException, status
+from httpx import AsyncClient
+
+from app.core.config import settings
+from app.services.users import PROFILE_COLUMNS, UserDirectory, parse_expand
+
+
+class RecordingLookup:
+    def __init__(self, known: dict[str, str]) -> None:
+        self.calls: list[list[str]] = []
+        self.known = known
+
+    def __call__(self, user_ids: list[str]) -> list[dict[str, Any]]:
+        self.calls.append(user_ids)
+        return [
+            {"id": user_id, "full_name": name}
+            for user_id, name in self.known.items()
+            if user_id in user_ids
+        ]
+
+
+def work_order_row(work_order_id: int, assignee: str | None) -> dict[str, Any]:
+    return {
+        "id": work_order_id,
+        "title": f"Work order {work_order_id}",
+        "status": "Open",
+        "priority": "High",
+        "assigned_to_user_id": assignee,
+        "created_by_user_id": "creator",
+        "created_at": "2024-01-01T00:00:00Z",
+        "updated_at": "2024-01-01T00:00:00Z",
+    }
+
+
+class TestUserDirectory:
+    """Test batched lookups and the TTL cache."""
+
+    @pytest.mark.asyncio
+    async def test_uncached_users_fetched_in_one_lookup(self) -> None:
+        """Test misses are batched and hits don't go upstream."""
+        lookup = RecordingLookup({"u1": "Ada", "u2": "Grace"})
+        directory = UserDirectory(ttl=60, max_entries=100, lookup=lookup)
+
+        first = await directory.get_many(["u1", "u2", "u1"])
+        second = await directory.get_many(["u2", "u1"])
+
+        assert lookup.calls == [["u1", "u2"]]
+        assert first["u1"].full_name == "Ada"
+        assert second == first
+        assert directory.stats()["hits"] == 2
+
+    @pytest.mark.asyncio
+    async def test_unknown_users_are_cached(self) -> None:
+        """Test ids with no profile aren't looked up again within the TTL."""
+        lookup = RecordingLookup({})
+        directory = UserDirectory(ttl=60, max_entries=100, lookup=lookup)
+
+        assert await directory.get_many(["ghost"]) == {}
+        assert await directory.get_many(["ghost"]) == {}
+        assert len(lookup.calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_expired_entries_are_refetched(self) -> None:
+        """Test entries older than the TTL go upstream again."""
+        lookup = RecordingLookup({"u1": "Ada"})
+        directory = UserDirectory(ttl=60, max_entries=100, lookup=lookup)
+
+        with patch("app.services.users.time.monotonic", return_value=1000.0):
+            await directory.get_many(["u1"])
+        with patch("app.services.users.time.monotonic", return_value=1061.0):
+            await directory.get_many(["u1"])
+
+        assert lookup.calls == [["u1"], ["u1"]]
+
+    @pytest.mark.asyncio
+    async def test_bounded_least_recently_used(self) -> None:
+        """Test the directory evicts the least recently used user."""
+        lookup = RecordingLookup({"u1": "Ada", "u2": "Grace", "u3": "Edsger"})
+        directory = UserDirectory(ttl=60, max_entries=2, lookup=lookup)
+
+        await directory.get_many(["u1", "u2"])
+        await directory.get_many(["u1"])
+        await directory.get_many(["u3"])
+        await directory.get_many(["u1", "u2"])
+
+        assert len(directory) == 2
+        assert lookup.calls[-1] == ["u2"]
+
+    def test_parse_expand(self) -> None:
+        """Test expand accepts known names and rejects others."""
+        with patch.object(settings, "supabase_service_key", "service-key"):
+            assert parse_expand("assignee, creator") == {"assignee", "creator"}
+            assert parse_expand(None) == set()
+            with pytest.raises(HTTPException) as exc_info:
+                parse_expand("assignee,location")
+        assert exc_info.value.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_expand_unavailable_without_service_key(self) -> None:
+        """Test expanding without the service key is a 503, not a 500."""
+        with patch.object(settings, "supabase_service_key", None):
+            assert parse_expand(None) == set()
+            with pytest.raises(HTTPException) as exc_info:
+                parse_expand("assignee")
+        assert exc_info.value.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+    def test_only_public_columns_are_read(self) -> None:
+        """Test profile lookups with the service key never select emails."""
+        assert PROFILE_COLUMNS == "id, full_name"
+
+
+class TestExpandEndpoints:
+    """Test expand=assignee,creator on work order reads."""
+
+    def supabase(self, data: Any, count: int | None = None) -> MagicMock:
+        supabase = MagicMock()
+        query = supabase.table.return_value
+        for method in ("select", "eq", "in_", "order", "range", "maybe_single"):
+            getattr(query, method).return_value = query
+        query.execute.return_value = MagicMock(data=data, count=count)
+        return supabase
+
+    @pytest.mark.asyncio
+    async def test_list_expands_page_with_one_lookup(
+        self,
+        async_client: AsyncClient,
+        mock_auth: MagicMock,
+    ) -> None:
+        """Test a page's users are resolved in a single batched lookup."""
+        rows = [work_order_row(i, f"tech-{i % 3}") for i in range(1, 31)]
+        rows[0]["assigned_to_user_id"] = None
+        supabase = self.supabase(rows, count=30)
+        lookup = RecordingLookup({"tech-1": "Ada", "tech-2": "Grace", "creator": "C"})
+        directory = UserDirectory(ttl=60, max_entries=100, lookup=lookup)
+
+        with (
+            patch("app.services.replicas.get_supabase_client", return_value=supabase),
+            patch("app.services.users.user_directory", directory),
+            patch.object(settings, "supabase_service_key", "service-key"),
+        ):
+            response = await async_client.get(
+                "/api/v1/work-orders",
+                params={"expand": "assignee,creator", "limit": 30},
+                headers={"Authorization": "Bearer test-access-token"},
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(lookup.calls) == 1
+        assert sorted(lookup.calls[0]) == ["creator", "tech-0", "tech-1", "tech-2"]
+        data = response.json()["data"]
+        assert data[0]["assignee"] is None
+        assert data[1]["assignee"]["full_name"] == "Grace"
+        assert data[2]["creator"]["full_name"] == "C"
+        # tech-0 has no profile
+        assert data[2]["assignee"] is None
+
+    @pytest.mark.asyncio
+    async def test_get_with_expand_bypasses_cache(
+        self,
+        async_client: AsyncClient,
+        mock_auth: MagicMock,
+    ) -> None:
+        """Test expanded reads skip the serialized work order cache."""
+        supabase = self.supabase(work_order_row(1, "tech-1"))
+        directory = UserDirectory(
+            ttl=60, max_entries=100, lookup=RecordingLookup({"tech-1": "Ada"})
+        )
+        cache = MagicMock()
+
+        with (
+            patch("app.services.replicas.get_supabase_client", return_value=supabase),
+            patch("app.services.users.user_directory", directory),
+            patch.object(settings, "supabase_service_key", "service-key"),
+            patch("app.api.work_orders.work_order_cache", cache),
+        ):
+            response = await async_client.get(
+                "/api/v1/work-orders/1",
+                params={"expand": "assignee"},
+                headers={"Authorization": "Bearer test-access-token"},
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["assignee"]["full_name"] == "Ada"
+        assert response.json()["creator"] is None
+        cache.get.assert_not_called()
+        cache.put.assert_not_called()
@@ -0,0 +1,109 @@
+from datetime import UTC, datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi import status
+from httpx import AsyncClient
+from postgrest import SyncPostgrestClient
+
+from app.models.work_orders import WorkOrderFilters
+from app.services import archive, work_order_query
+
+
+def compiled_params(filters: WorkOrderFilters) -> dict[str, list[str]]:
+    """Compile filters onto a real PostgREST builder and return its params."""
+    query = (
+        SyncPostgrestClient("https://test.supabase.co/rest/v1")
+        .table("work_orders")
+        .select("*", count="exact")
+    )
+    params = work_order_query.apply_filters(query, filters).request.params
+    return {key: params.get_list(key) for key in params.keys()}
+
+
+def chainable_query(**execute_result: object) -> MagicMock:
+    """Mock query builder whose filter methods all return itself."""
+    query = MagicMock()
+    for method in ("select", "eq", "in_", "gte", "lt", "order", "range", "limit"):
+        getattr(query, method).return_value = query
+    query.execute.return_value = MagicMock(**execute_result)
+    return query
+
+
+class TestApplyFilters:
+    """Test compiling list filters to PostgREST parameters."""
+
+    def test_single_and_multi_value_filters(self) -> None:
+        """Test one value compiles to eq and several to in."""
+        params = compiled_params(
+            WorkOrderFilters(status=["Open", "On Hold"], priority=["High"])
+        )
+
+        assert params["status"] == ["in.(Open,On Hold)"]
+        assert params["priority"] == ["eq.High"]
+
+    def test_date_ranges_and_sort(self) -> None:
+        """Test date ranges and the sort key with its id tie-break."""
+        start = datetime(2024, 1, 1, tzinfo=UTC)
+        params = compiled_params(
+            WorkOrderFilters(updated_after=start, created_before=start, sort="title")
+        )
+
+        assert params["updated_at"] == [f"gte.{start.isoformat()}"]
+        assert params["created_at"] == [f"lt.{start.isoformat()}"]
+        assert params["order"] == ["title.asc,id.asc"]
+
+    def test_updated_range_picks_archive(self) -> None:
+        """Test an updated_before older than the archive cutoff reads the archive."""
+        filters = WorkOrderFilters(updated_before=datetime(2020, 1, 1, tzinfo=UTC))
+
+        assert work_order_query.source_table(filters) == archive.ALL_TABLE
+
+    def test_sort_allow_list(self) -> None:
+        """Test unknown sort keys are rejected."""
+        with pytest.raises(ValueError):
+            WorkOrderFilters(sort="description")
+
+
+class TestListEndpoint:
+    """Test GET /work-orders."""
+
+    @pytest.mark.asyncio
+    async def test_rows_and_total_in_one_request(
+        self,
+        async_client: AsyncClient,
+        mock_auth: MagicMock,
+    ) -> None:
+        """Test the page and total come back from a single upstream call."""
+        supabase = MagicMock()
+        query = chainable_query(data=[], count=42)
+        supabase.table.return_value = query
+
+        with patch("app.services.replicas.get_supabase_client", return_value=supabase):
+            response = await async_client.get(
+                "/api/v1/work-orders",
+                params={"status": ["Open", "In Progress"], "limit": 10},
+                headers={"Authorization": "Bearer test-access-token"},
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["pagination"]["total"] == 42
+        assert response.json()["pagination"]["totalPages"] == 5
+        query.execute.assert_called_once()
+        query.in_.assert_called_once_with("status", ["Open", "In Progress"])
+        supabase.table.assert_called_once_with("work_orders")
+
+    @pytest.mark.asyncio
+    async def test_invalid_sort_rejected(
+        self,
+        async_client: AsyncClient,
+        mock_auth: MagicMock,
+    ) -> None:
+        """Test sort keys outside the allow-list return 422."""
+        response = await async_client.get(
+            "/api/v1/work-orders",
+            params={"sort": "description"},
+            headers={"Authorization": "Bearer test-access-token"},
+        )
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
@@ -0,0 +1,253 @@
+import asyncio
+import time
+from pathlib import Path
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import status
+from httpx import AsyncClient
+
+from app.core.config import settings
+from app.services.write_behind import Patch, WriteBehindBuffer
+
+
+class RecordingApply:
+    def __init__(self, fail: int = 0) -> None:
+        self.calls: list[list[Patch]] = []
+        self.fail = fail
+
+    def __call__(self, patches: list[Patch]) -> set[str]:
+        self.calls.append(patches)
+        if self.fail:
+            self.fail -= 1
+            raise ConnectionError("upstream unavailable")
+        return {patch["id"] for patch in patches}
+
+
+class TestWriteBehindBuffer:
+    """Test coalescing, flushing and durability."""
+
+    @pytest.mark.asyncio
+    async def test_coalesces_updates_per_work_order(self) -> None:
+        """Test a burst becomes one bulk call with last-write-wins per field."""
+        apply = RecordingApply()
+        buffer = WriteBehindBuffer(window=0.01, max_pending=100, apply=apply)
+
+        await buffer.submit("1", {"status": "In Progress"})
+        await buffer.submit("1", {"assigned_to_user_id": "tech-1"})
+        await buffer.submit("1", {"status": "Completed"})
+        await buffer.submit("2", {"priority": "High"})
+        await asyncio.sleep(0.05)
+
+        assert apply.calls == [
+            [
+                {"id": "1", "status": "Completed", "assigned_to_user_id": "tech-1"},
+                {"id": "2", "priority": "High"},
+            ]
+        ]
+        assert buffer.pending == 0
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_keeps_newer_values(self) -> None:
+        """Test a failed batch is retried under updates that arrived since."""
+        apply = RecordingApply(fail=1)
+        buffer = WriteBehindBuffer(window=60, max_pending=100, apply=apply)
+
+        await buffer.submit("1", {"status": "In Progress", "priority": "Low"})
+        await buffer.flush()
+        await buffer.submit("1", {"status": "Completed"})
+        await buffer.close()
+
+        assert apply.calls[-1] == [
+            {"id": "1", "status": "Completed", "priority": "Low"},
+        ]
+        assert buffer.failed_flushes == 1
+
+    @pytest.mark.asyncio
+    async def test_journal_replayed_after_crash(self, tmp_path: Path) -> None:
+        """Test acknowledged updates survive a process dying before a flush."""
+        journal = tmp_path / "write_behind.jsonl"
+        crashed = WriteBehindBuffer(window=60, max_pending=100, journal_path=journal)
+        await crashed.start()
+        await crashed.submit("1", {"status": "On Hold"})
+        await crashed.submit("1", {"priority": "High"})
+        # The process dies here, releasing its journal lock
+        crashed._timer.cancel()
+        crashed._journal_lock.close()
+        with journal.open("a") as f:
+            f.write('{"id": "2", "pat')  # torn write
+
+        apply = RecordingApply()
+        restarted = WriteBehindBuffer(
+            window=60, max_pending=100, journal_path=journal, apply=apply
+        )
+        await restarted.start()
+
+        assert apply.calls == [[{"id": "1", "status": "On Hold", "priority": "High"}]]
+        assert journal.read_text() == ""
+        await restarted.close()
+
+    @pytest.mark.asyncio
+    async def test_superseded_fields_not_replayed(self, tmp_path: Path) -> None:
+        """Test a synchronous update's fields aren't overwritten on replay."""
+        journal = tmp_path / "write_behind.jsonl"
+        crashed = WriteBehindBuffer(window=60, max_pending=100, journal_path=journal)
+        await crashed.start()
+        await crashed.submit("1", {"status": "On Hold", "priority": "High"})
+        await crashed.supersede("1", ["status"])
+        crashed._timer.cancel()
+        crashed._journal_lock.close()
+
+        apply = RecordingApply()
+        restarted = WriteBehindBuffer(
+            window=60, max_pending=100, journal_path=journal, apply=apply
+        )
+        await restarted.start()
+
+        assert apply.calls == [[{"id": "1", "priority": "High"}]]
+        await restarted.close()
+
+    @pytest.mark.asyncio
+    async def test_update_acknowledged_during_flush_is_journalled(
+        self, tmp_path: Path
+    ) -> None:
+        """Test a flush compacting the journal keeps records still being fsynced."""
+        journal = tmp_path / "write_behind.jsonl"
+        crashed = WriteBehindBuffer(
+            window=60, max_pending=100, journal_path=journal, apply=RecordingApply()
+        )
+        await crashed.start()
+        await crashed.submit("1", {"status": "On Hold"})
+
+        def slow_fsync(fd: int) -> None:
+            time.sleep(0.2)
+
+        with patch("app.services.write_behind.os.fsync", side_effect=slow_fsync):
+            # "2" starts an fsync; the flush then waits on it before compacting,
+            # and "3" arrives while it runs
+            first = asyncio.create_task(crashed.submit("2", {"priority": "High"}))
+            await asyncio.sleep(0)
+            flush = asyncio.create_task(crashed.flush())
+            await asyncio.sleep(0.05)
+            acked = asyncio.create_task(crashed.submit("3", {"title": "acked"}))
+            await asyncio.gather(first, flush, acked)
+        crashed._timer.cancel()
+        crashed._journal_lock.close()
+
+        apply = RecordingApply()
+        restarted = WriteBehindBuffer(
+            window=60, max_pending=100, journal_path=journal, apply=apply
+        )
+        await restarted.start()
+
+        assert apply.calls == [[{"id": "3", "title": "acked"}]]
+        await restarted.close()
+
+    @pytest.mark.asyncio
+    async def test_each_worker_locks_its_own_journal(self, tmp_path: Path) -> None:
+        """Test workers don't share a journal and orphaned ones are adopted."""
+        journal = tmp_path / "write_behind.jsonl"
+        first = WriteBehindBuffer(window=60, max_pending=100, journal_path=journal)
+        second = WriteBehindBuffer(window=60, max_pending=100, journal_path=journal)
+        await first.start()
+        await second.start()
+        await first.submit("1", {"status": "On Hold"})
+        await second.submit("2", {"status": "Completed"})
+
+        assert second.journal_path == tmp_path / "write_behind.1.jsonl"
+        assert '"1"' not in second.journal_path.read_text()
+        # The second worker dies; the first is restarted and picks up its work
+        second._timer.cancel()
+        second._journal_lock.close()
+        first._timer.cancel()
+        first._journal_lock.close()
+
+        apply = RecordingApply()
+        restarted = WriteBehindBuffer(
+            window=60, max_pending=100, journal_path=journal, apply=apply
+        )
+        await restarted.start()
+
+        assert apply.calls == [
+            [{"id": "1", "status": "On Hold"}, {"id": "2", "status": "Completed"}]
+        ]
+        assert not second.journal_path.exists()
+        await restarted.close()
+
+
+class TestAsyncUpdateEndpoint:
+    """Test PUT /work-orders/{id} with Prefer: respond-async."""
+
+    def supabase(self, row: dict[str, Any]) -> MagicMock:
+        supabase = MagicMock()
+        query = supabase.table.return_value
+        for method in ("select", "eq", "maybe_single"):
+            getattr(query, method).return_value = query
+        query.execute.return_value = MagicMock(data=row)
+        return supabase
+
+    @pytest.mark.asyncio
+    async def test_queues_update_for_assignee(
+        self,
+        async_client: AsyncClient,
+        mock_auth: MagicMock,
+    ) -> None:
+        """Test a permitted update is acknowledged with 202 and queued."""
+        supabase = self.supabase(
+            {
+                "id": "1",
+                "created_by_user_id": "other",
+                "assigned_to_user_id": "test-user-id",
+            }
+        )
+        buffer = AsyncMock()
+
+        with (
+            patch.object(settings, "write_behind_enabled", True),
+            patch("app.api.work_orders.get_supabase_client", return_value=supabase),
+            patch("app.api.work_orders.write_behind", buffer),
+        ):
+            response = await async_client.put(
+                "/api/v1/work-orders/1",
+                json={"status": "Completed"},
+                headers={
+                    "Authorization": "Bearer test-access-token",
+                    "Prefer": "respond-async",
+                },
+            )
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert response.headers["Preference-Applied"] == "respond-async"
+        assert response.json() == {"id": "1", "fields": ["status"]}
+        buffer.submit.assert_awaited_once_with("1", {"status": "Completed"})
+        supabase.table.return_value.update.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_rejects_other_users(
+        self,
+        async_client: AsyncClient,
+        mock_auth: MagicMock,
+    ) -> None:
+        """Test updates the RLS policy would refuse are rejected up front."""
+        supabase = self.supabase(
+            {"id": "1", "created_by_user_id": "other", "assigned_to_user_id": None}
+        )
+        buffer = AsyncMock()
+
+        with (
+            patch.object(settings, "write_behind_enabled", True),
+            patch("app.api.work_orders.get_supabase_client", return_value=supabase),
+            patch("app.api.work_orders.write_behind", buffer),
+        ):
+            response = await async_client.put(
+                "/api/v1/work-orders/1",
+                json={"status": "Completed"},
+                headers={
+                    "Authorization": "Bearer test-access-token",
+                    "Prefer": "respond-async",
+                },
+            )
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        buffer.submit.assert_not_called()
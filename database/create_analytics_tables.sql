@@ -0,0 +1,212 @@
+-- Work order analytics rollups (GET /api/v1/analytics/*).
+-- Triggers on work_orders fold every insert, status/priority/location change
+-- and delete into small aggregate tables, so analytics queries read a few
+-- rows per day (or per priority and location) no matter how much history
+-- there is. Run after create_tables.sql (and create_archive_tables.sql if
+-- used), then call refresh_work_order_rollups() once to backfill.
+
+-- Daily throughput and resolution time per priority and location.
+-- "closed" counts transitions into Completed or Cancelled on that day;
+-- resolution time is only accumulated for Completed.
+CREATE TABLE IF NOT EXISTS work_order_daily_stats (
+    day DATE NOT NULL,
+    priority TEXT NOT NULL,
+    location_id UUID,
+    opened INTEGER NOT NULL DEFAULT 0,
+    closed INTEGER NOT NULL DEFAULT 0,
+    resolved INTEGER NOT NULL DEFAULT 0,
+    resolution_seconds_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    CONSTRAINT work_order_daily_stats_key UNIQUE NULLS NOT DISTINCT (day, priority, location_id)
+);
+
+-- Open work orders per priority and location. Summing creation times lets
+-- the mean age be computed at read time: now - created_epoch_sum / open_count.
+CREATE TABLE IF NOT EXISTS work_order_backlog (
+    priority TEXT NOT NULL,
+    location_id UUID,
+    open_count INTEGER NOT NULL DEFAULT 0,
+    created_epoch_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    CONSTRAINT work_order_backlog_key UNIQUE NULLS NOT DISTINCT (priority, location_id)
+);
+
+ALTER TABLE work_order_daily_stats ENABLE ROW LEVEL SECURITY;
+ALTER TABLE work_order_backlog ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view daily work order stats" ON work_order_daily_stats
+    FOR SELECT USING (auth.role() = 'authenticated');
+
+CREATE POLICY "Users can view work order backlog" ON work_order_backlog
+    FOR SELECT USING (auth.role() = 'authenticated');
+
+CREATE OR REPLACE FUNCTION work_order_is_open(status TEXT)
+RETURNS BOOLEAN AS $$
+    SELECT status NOT IN ('Completed', 'Cancelled');
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION bump_daily_stats(
+    p_day DATE,
+    p_priority TEXT,
+    p_location_id UUID,
+    p_opened INTEGER,
+    p_closed INTEGER,
+    p_resolved INTEGER,
+    p_resolution_seconds DOUBLE PRECISION
+) RETURNS VOID AS $$
+    INSERT INTO work_order_daily_stats AS s
+        (day, priority, location_id, opened, closed, resolved, resolution_seconds_sum)
+    VALUES
+        (p_day, p_priority, p_location_id, p_opened, p_closed, p_resolved, p_resolution_seconds)
+    ON CONFLICT ON CONSTRAINT work_order_daily_stats_key DO UPDATE SET
+        opened = s.opened + EXCLUDED.opened,
+        closed = s.closed + EXCLUDED.closed,
+        resolved = s.resolved + EXCLUDED.resolved,
+        resolution_seconds_sum = s.resolution_seconds_sum + EXCLUDED.resolution_seconds_sum;
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION bump_backlog(
+    p_priority TEXT,
+    p_location_id UUID,
+    p_count INTEGER,
+    p_created_at TIMESTAMP WITH TIME ZONE
+) RETURNS VOID AS $$
+    INSERT INTO work_order_backlog AS b (priority, location_id, open_count, created_epoch_sum)
+    VALUES (p_priority, p_location_id, p_count, p_count * EXTRACT(EPOCH FROM p_created_at))
+    ON CONFLICT ON CONSTRAINT work_order_backlog_key DO UPDATE SET
+        open_count = b.open_count + EXCLUDED.open_count,
+        created_epoch_sum = b.created_epoch_sum + EXCLUDED.created_epoch_sum;
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION rollup_work_order_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM bump_daily_stats(
+            NEW.created_at::DATE, NEW.priority, NEW.location_id,
+            1, CASE WHEN work_order_is_open(NEW.status) THEN 0 ELSE 1 END, 0, 0
+        );
+        IF work_order_is_open(NEW.status) THEN
+            PERFORM bump_backlog(NEW.priority, NEW.location_id, 1, NEW.created_at);
+        END IF;
+        RETURN NEW;
+    END IF;
+
+    IF TG_OP = 'DELETE' THEN
+        -- Archival only moves closed work orders, which aren't in the backlog
+        IF work_order_is_open(OLD.status) THEN
+            PERFORM bump_backlog(OLD.priority, OLD.location_id, -1, OLD.created_at);
+        END IF;
+        RETURN OLD;
+    END IF;
+
+    -- UPDATE: move the row between backlog groups if anything relevant changed
+    IF work_order_is_open(OLD.status) IS DISTINCT FROM work_order_is_open(NEW.status)
+       OR OLD.priority IS DISTINCT FROM NEW.priority
+       OR OLD.location_id IS DISTINCT FROM NEW.location_id THEN
+        IF work_order_is_open(OLD.status) THEN
+            PERFORM bump_backlog(OLD.priority, OLD.location_id, -1, OLD.created_at);
+        END IF;
+        IF work_order_is_open(NEW.status) THEN
+            PERFORM bump_backlog(NEW.priority, NEW.location_id, 1, NEW.created_at);
+        END IF;
+    END IF;
+
+    IF work_order_is_open(OLD.status) AND NOT work_order_is_open(NEW.status) THEN
+        PERFORM bump_daily_stats(
+            NOW()::DATE, NEW.priority, NEW.location_id,
+            0, 1,
+            CASE WHEN NEW.status = 'Completed' THEN 1 ELSE 0 END,
+            CASE WHEN NEW.status = 'Completed'
+                THEN EXTRACT(EPOCH FROM NOW() - NEW.created_at) ELSE 0 END
+        );
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- The helpers only run inside the trigger; clients must not call them
+REVOKE ALL ON FUNCTION bump_daily_stats(DATE, TEXT, UUID, INTEGER, INTEGER, INTEGER, DOUBLE PRECISION)
+    FROM PUBLIC, anon, authenticated;
+REVOKE ALL ON FUNCTION bump_backlog(TEXT, UUID, INTEGER, TIMESTAMP WITH TIME ZONE)
+    FROM PUBLIC, anon, authenticated;
+
+CREATE TRIGGER rollup_work_orders AFTER INSERT OR UPDATE OR DELETE ON work_orders
+    FOR EACH ROW EXECUTE FUNCTION rollup_work_order_change();
+
+-- Daily opened/closed counts, optionally for one priority and/or location
+CREATE OR REPLACE FUNCTION analytics_throughput(
+    start_day DATE,
+    end_day DATE,
+    p_priority TEXT DEFAULT NULL,
+    p_location_id UUID DEFAULT NULL
+) RETURNS TABLE (day DATE, opened BIGINT, closed BIGINT) AS $$
+    SELECT s.day, SUM(s.opened), SUM(s.closed)
+    FROM work_order_daily_stats s
+    WHERE s.day BETWEEN start_day AND end_day
+      AND (p_priority IS NULL OR s.priority = p_priority)
+      AND (p_location_id IS NULL OR s.location_id = p_location_id)
+    GROUP BY s.day
+    ORDER BY s.day;
+$$ LANGUAGE sql STABLE SECURITY INVOKER;
+
+-- Work orders completed in the range and their total resolution time, by priority
+CREATE OR REPLACE FUNCTION analytics_resolution(
+    start_day DATE,
+    end_day DATE,
+    p_location_id UUID DEFAULT NULL
+) RETURNS TABLE (priority TEXT, resolved BIGINT, resolution_seconds_sum DOUBLE PRECISION) AS $$
+    SELECT s.priority, SUM(s.resolved), SUM(s.resolution_seconds_sum)
+    FROM work_order_daily_stats s
+    WHERE s.day BETWEEN start_day AND end_day
+      AND (p_location_id IS NULL OR s.location_id = p_location_id)
+    GROUP BY s.priority
+    ORDER BY s.priority;
+$$ LANGUAGE sql STABLE SECURITY INVOKER;
+
+GRANT EXECUTE ON FUNCTION analytics_throughput(DATE, DATE, TEXT, UUID) TO authenticated;
+GRANT EXECUTE ON FUNCTION analytics_resolution(DATE, DATE, UUID) TO authenticated;
+
+-- Rebuild the rollups from work_orders (and the archive, if present). Use once
+-- after installing the triggers. Historical close dates aren't recorded, so
+-- updated_at of closed work orders stands in for them.
+CREATE OR REPLACE FUNCTION refresh_work_order_rollups()
+RETURNS VOID AS $$
+BEGIN
+    LOCK TABLE work_orders IN SHARE MODE;
+    TRUNCATE work_order_daily_stats, work_order_backlog;
+
+    CREATE TEMP TABLE rollup_source ON COMMIT DROP AS
+        SELECT priority, location_id, status, created_at, updated_at FROM work_orders;
+    IF to_regclass('work_orders_archive') IS NOT NULL THEN
+        INSERT INTO rollup_source
+            SELECT priority, location_id, status, created_at, updated_at
+            FROM work_orders_archive;
+    END IF;
+
+    INSERT INTO work_order_daily_stats
+        (day, priority, location_id, opened, closed, resolved, resolution_seconds_sum)
+    SELECT day, priority, location_id,
+           SUM(opened), SUM(closed), SUM(resolved), SUM(resolution_seconds)
+    FROM (
+        SELECT created_at::DATE AS day, priority, location_id,
+               1 AS opened, 0 AS closed, 0 AS resolved, 0 AS resolution_seconds
+        FROM rollup_source
+        UNION ALL
+        SELECT updated_at::DATE, priority, location_id, 0, 1,
+               CASE WHEN status = 'Completed' THEN 1 ELSE 0 END,
+               CASE WHEN status = 'Completed'
+                   THEN EXTRACT(EPOCH FROM updated_at - created_at) ELSE 0 END
+        FROM rollup_source
+        WHERE NOT work_order_is_open(status)
+    ) events
+    GROUP BY day, priority, location_id;
+
+    INSERT INTO work_order_backlog (priority, location_id, open_count, created_epoch_sum)
+    SELECT priority, location_id, COUNT(*), SUM(EXTRACT(EPOCH FROM created_at))
+    FROM work_orders
+    WHERE work_order_is_open(status)
+    GROUP BY priority, location_id;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+REVOKE ALL ON FUNCTION refresh_work_order_rollups() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION refresh_work_order_rollups() TO service_role;
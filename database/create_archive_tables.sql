@@ -0,0 +1,94 @@
+-- Hot/cold tiering for work orders.
+-- Completed and Cancelled work orders that have not been touched for a while are
+-- moved from work_orders into work_orders_archive by archive_work_orders().
+-- Run after create_tables.sql.
+
+-- Create archive table (same shape as work_orders, plus archived_at)
+CREATE TABLE IF NOT EXISTS work_orders_archive (
+    id UUID PRIMARY KEY,
+    title TEXT NOT NULL,
+    description TEXT,
+    status TEXT NOT NULL CHECK (status IN ('Completed', 'Cancelled')),
+    priority TEXT NOT NULL,
+    location_id UUID REFERENCES locations(id),
+    assigned_to_user_id UUID REFERENCES auth.users(id),
+    created_by_user_id UUID NOT NULL REFERENCES auth.users(id),
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    archived_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_work_orders_archive_status ON work_orders_archive(status);
+CREATE INDEX IF NOT EXISTS idx_work_orders_archive_created_at ON work_orders_archive(created_at);
+CREATE INDEX IF NOT EXISTS idx_work_orders_archive_assigned_to ON work_orders_archive(assigned_to_user_id);
+
+-- Lets the mover find candidates without scanning open work orders
+CREATE INDEX IF NOT EXISTS idx_work_orders_closed_updated_at ON work_orders(updated_at)
+    WHERE status IN ('Completed', 'Cancelled');
+
+-- Archived work orders are read-only
+ALTER TABLE work_orders_archive ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view archived work orders" ON work_orders_archive
+    FOR SELECT USING (auth.role() = 'authenticated');
+
+-- Hot and archived work orders together; only queried when filters can match
+-- archived rows (closed statuses or old date ranges)
+CREATE OR REPLACE VIEW work_orders_all WITH (security_invoker = true) AS
+    SELECT id, title, description, status, priority, location_id,
+           assigned_to_user_id, created_by_user_id, created_at, updated_at
+    FROM work_orders
+    UNION ALL
+    SELECT id, title, description, status, priority, location_id,
+           assigned_to_user_id, created_by_user_id, created_at, updated_at
+    FROM work_orders_archive;
+
+-- Computed relationship so `location:locations(*)` embeds work on the view too
+CREATE OR REPLACE FUNCTION locations(work_orders_all)
+RETURNS SETOF locations ROWS 1 AS $$
+    SELECT * FROM locations WHERE id = $1.location_id
+$$ LANGUAGE sql STABLE;
+
+-- Move one batch of closed work orders into the archive.
+-- Each call is a single transaction, so the mover can stop and resume anywhere.
+CREATE OR REPLACE FUNCTION archive_work_orders(
+    batch_size INTEGER DEFAULT 1000,
+    older_than INTERVAL DEFAULT '90 days'
+)
+RETURNS INTEGER AS $$
+DECLARE
+    moved INTEGER;
+BEGIN
+    -- Lets other triggers tell archival apart from user deletes
+    PERFORM set_config('app.archiving', 'on', true);
+
+    WITH batch AS (
+        SELECT id FROM work_orders
+        WHERE status IN ('Completed', 'Cancelled')
+          AND updated_at < NOW() - older_than
+        ORDER BY updated_at
+        LIMIT batch_size
+        FOR UPDATE SKIP LOCKED
+    ), moved_rows AS (
+        DELETE FROM work_orders w
+        USING batch b
+        WHERE w.id = b.id
+        RETURNING w.*
+    ), inserted AS (
+        INSERT INTO work_orders_archive (
+            id, title, description, status, priority, location_id,
+            assigned_to_user_id, created_by_user_id, created_at, updated_at
+        )
+        SELECT id, title, description, status, priority, location_id,
+               assigned_to_user_id, created_by_user_id, created_at, updated_at
+        FROM moved_rows
+        ON CONFLICT (id) DO NOTHING
+    )
+    SELECT count(*) INTO moved FROM moved_rows;
+
+    RETURN moved;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+REVOKE ALL ON FUNCTION archive_work_orders(INTEGER, INTERVAL) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION archive_work_orders(INTEGER, INTERVAL) TO service_role;
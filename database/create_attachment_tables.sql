@@ -0,0 +1,71 @@
+-- Work order attachments (photos, documents).
+-- File contents live in blob storage (ATTACHMENTS_STORAGE: a local directory
+-- or a private Supabase Storage bucket); this table holds the metadata and is
+-- what access control is enforced on. Run after create_tables.sql.
+--
+-- There is deliberately no foreign key to work_orders: archive_work_orders()
+-- moves closed work orders out of that table, and their attachments must
+-- stay. Attachments of deleted work orders are removed by a trigger instead.
+
+CREATE TABLE IF NOT EXISTS work_order_attachments (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    work_order_id UUID NOT NULL,
+    filename TEXT NOT NULL,
+    content_type TEXT NOT NULL,
+    size_bytes BIGINT NOT NULL CHECK (size_bytes >= 0),
+    sha256 TEXT NOT NULL,
+    storage_key TEXT NOT NULL UNIQUE,
+    thumbnail_key TEXT,
+    uploaded_by_user_id UUID NOT NULL REFERENCES auth.users(id),
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_work_order_attachments_work_order_id
+    ON work_order_attachments(work_order_id, created_at DESC);
+
+ALTER TABLE work_order_attachments ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view attachments" ON work_order_attachments
+    FOR SELECT USING (auth.role() = 'authenticated');
+
+CREATE POLICY "Users can add attachments to visible work orders" ON work_order_attachments
+    FOR INSERT WITH CHECK (
+        auth.role() = 'authenticated' AND
+        uploaded_by_user_id = auth.uid() AND
+        EXISTS (SELECT 1 FROM work_orders w WHERE w.id = work_order_id)
+    );
+
+CREATE POLICY "Uploaders and work order creators can delete attachments" ON work_order_attachments
+    FOR DELETE USING (
+        auth.role() = 'authenticated' AND (
+            uploaded_by_user_id = auth.uid() OR
+            EXISTS (
+                SELECT 1 FROM work_orders w
+                WHERE w.id = work_order_id AND w.created_by_user_id = auth.uid()
+            )
+        )
+    );
+
+-- Drop the attachment rows of deleted work orders (the API removes their
+-- files). Rows moved to the archive by archive_work_orders() keep theirs.
+CREATE OR REPLACE FUNCTION delete_work_order_attachments()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF current_setting('app.archiving', true) = 'on' THEN
+        RETURN OLD;
+    END IF;
+
+    DELETE FROM work_order_attachments WHERE work_order_id = OLD.id;
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+DROP TRIGGER IF EXISTS delete_work_orders_attachments ON work_orders;
+CREATE TRIGGER delete_work_orders_attachments AFTER DELETE ON work_orders
+    FOR EACH ROW EXECUTE FUNCTION delete_work_order_attachments();
+
+-- With ATTACHMENTS_STORAGE=supabase, create a private bucket for the files.
+-- Only the API's service key reads or writes it.
+INSERT INTO storage.buckets (id, name, public)
+VALUES ('work-order-attachments', 'work-order-attachments', false)
+ON CONFLICT (id) DO NOTHING;
@@ -0,0 +1,47 @@
+-- Bulk partial updates of work orders in a single call.
+-- `patches` is a JSON array of objects with an `id` plus any of the updatable
+-- columns; columns missing from a patch are left unchanged (an explicit null
+-- clears the column). Runs as the caller, so the usual RLS policies apply and
+-- rows the caller may not update are silently skipped. Send at most one patch
+-- per id. Returns the id and new updated_at of every row that was updated.
+
+CREATE OR REPLACE FUNCTION bulk_update_work_orders(patches JSONB)
+RETURNS TABLE (id UUID, updated_at TIMESTAMP WITH TIME ZONE) AS $$
+    UPDATE work_orders w
+    SET
+        title = CASE WHEN p.patch ? 'title'
+            THEN p.patch->>'title' ELSE w.title END,
+        description = CASE WHEN p.patch ? 'description'
+            THEN p.patch->>'description' ELSE w.description END,
+        status = CASE WHEN p.patch ? 'status'
+            THEN p.patch->>'status' ELSE w.status END,
+        priority = CASE WHEN p.patch ? 'priority'
+            THEN p.patch->>'priority' ELSE w.priority END,
+        location_id = CASE WHEN p.patch ? 'location_id'
+            THEN (p.patch->>'location_id')::UUID ELSE w.location_id END,
+        assigned_to_user_id = CASE WHEN p.patch ? 'assigned_to_user_id'
+            THEN (p.patch->>'assigned_to_user_id')::UUID ELSE w.assigned_to_user_id END
+    FROM jsonb_array_elements(patches) AS p(patch)
+    WHERE w.id = (p.patch->>'id')::UUID
+    RETURNING w.id, w.updated_at;
+$$ LANGUAGE sql SECURITY INVOKER;
+
+GRANT EXECUTE ON FUNCTION bulk_update_work_orders(JSONB) TO authenticated, service_role;
+
+-- Assign work orders that are still open and unassigned, for dispatch.
+-- `assignments` is a JSON array of {"id": ..., "assigned_to_user_id": ...}.
+-- Work orders assigned or closed since they were fetched are left alone,
+-- rather than having a manual assignment overwritten; only the rows actually
+-- assigned are returned. Runs as the caller, so the usual RLS policies apply.
+CREATE OR REPLACE FUNCTION assign_open_work_orders(assignments JSONB)
+RETURNS TABLE (id UUID, updated_at TIMESTAMP WITH TIME ZONE) AS $$
+    UPDATE work_orders w
+    SET assigned_to_user_id = a.assigned_to_user_id
+    FROM jsonb_to_recordset(assignments) AS a(id UUID, assigned_to_user_id UUID)
+    WHERE w.id = a.id
+      AND w.assigned_to_user_id IS NULL
+      AND w.status = 'Open'
+    RETURNING w.id, w.updated_at;
+$$ LANGUAGE sql SECURITY INVOKER;
+
+GRANT EXECUTE ON FUNCTION assign_open_work_orders(JSONB) TO authenticated, service_role;
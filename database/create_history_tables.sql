@@ -0,0 +1,40 @@
+-- Work order change history (GET /api/v1/work-orders/{id}/history).
+-- The API writes one row per changed field, plus one per create and delete,
+-- in batches with the service role; generate_maintenance_work_orders() writes
+-- the create rows of work orders it generates. Rows are never updated or deleted, and
+-- there is no foreign key so a work order's history survives its deletion.
+-- Run after create_tables.sql.
+
+CREATE TABLE IF NOT EXISTS work_order_history (
+    id BIGSERIAL PRIMARY KEY,
+    work_order_id UUID NOT NULL,
+    action TEXT NOT NULL CHECK (action IN ('create', 'update', 'delete')),
+    field TEXT,
+    old_value JSONB,
+    new_value JSONB,
+    changed_by_user_id UUID,
+    changed_at TIMESTAMP WITH TIME ZONE DEFAULT NOW() NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_work_order_history_work_order
+    ON work_order_history(work_order_id, changed_at DESC, id DESC);
+
+ALTER TABLE work_order_history ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view work order history" ON work_order_history
+    FOR SELECT USING (auth.role() = 'authenticated');
+
+-- Clients only read; the service role inserts
+REVOKE INSERT, UPDATE, DELETE, TRUNCATE ON work_order_history FROM anon, authenticated;
+
+-- Append-only, even for the service role
+CREATE OR REPLACE FUNCTION reject_history_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    RAISE EXCEPTION 'work_order_history is append-only';
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER work_order_history_append_only
+    BEFORE UPDATE OR DELETE ON work_order_history
+    FOR EACH ROW EXECUTE FUNCTION reject_history_change();
@@ -0,0 +1,219 @@
+-- Preventive maintenance templates (/api/v1/maintenance-templates).
+-- Each template carries an RFC 5545 recurrence rule; the API's scheduler
+-- turns due occurrences into work orders with
+-- generate_maintenance_work_orders(). A work order records the template and
+-- occurrence it was generated for, and the unique key on that pair makes
+-- generation idempotent: catching up after downtime, retries and several
+-- API instances never produce duplicates. Run after create_tables.sql (and
+-- create_archive_tables.sql if used).
+
+CREATE TABLE IF NOT EXISTS maintenance_templates (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    title TEXT NOT NULL,
+    description TEXT,
+    priority TEXT NOT NULL DEFAULT 'medium' CHECK (priority IN ('low', 'medium', 'high', 'urgent')),
+    location_id UUID REFERENCES locations(id),
+    assigned_to_user_id UUID REFERENCES auth.users(id),
+    rrule TEXT NOT NULL,
+    dtstart TIMESTAMP WITH TIME ZONE NOT NULL,
+    timezone TEXT NOT NULL DEFAULT 'UTC',
+    active BOOLEAN NOT NULL DEFAULT TRUE,
+    -- The latest occurrence materialized; the scheduler resumes after it
+    last_generated_at TIMESTAMP WITH TIME ZONE,
+    created_by_user_id UUID NOT NULL REFERENCES auth.users(id),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- The scheduler reloads templates changed since its last look
+CREATE INDEX IF NOT EXISTS idx_maintenance_templates_updated_at
+    ON maintenance_templates(updated_at);
+
+ALTER TABLE work_orders
+    ADD COLUMN IF NOT EXISTS maintenance_template_id UUID
+        REFERENCES maintenance_templates(id) ON DELETE SET NULL,
+    ADD COLUMN IF NOT EXISTS occurrence_at TIMESTAMP WITH TIME ZONE;
+
+-- NULLs are distinct, so hand-made work orders are unaffected
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint
+        WHERE conname = 'work_orders_maintenance_occurrence_key'
+          AND conrelid = 'work_orders'::regclass
+    ) THEN
+        ALTER TABLE work_orders
+            ADD CONSTRAINT work_orders_maintenance_occurrence_key
+            UNIQUE (maintenance_template_id, occurrence_at);
+    END IF;
+END $$;
+
+-- Archived work orders keep the template and occurrence they came from:
+-- the archive table, work_orders_all and archive_work_orders() from
+-- create_archive_tables.sql gain the two columns
+DO $do$
+BEGIN
+    IF to_regclass('work_orders_archive') IS NULL THEN
+        RETURN;
+    END IF;
+
+    ALTER TABLE work_orders_archive
+        ADD COLUMN IF NOT EXISTS maintenance_template_id UUID
+            REFERENCES maintenance_templates(id) ON DELETE SET NULL,
+        ADD COLUMN IF NOT EXISTS occurrence_at TIMESTAMP WITH TIME ZONE;
+
+    EXECUTE $view$
+    CREATE OR REPLACE VIEW work_orders_all WITH (security_invoker = true) AS
+        SELECT id, title, description, status, priority, location_id,
+               assigned_to_user_id, created_by_user_id, created_at, updated_at,
+               maintenance_template_id, occurrence_at
+        FROM work_orders
+        UNION ALL
+        SELECT id, title, description, status, priority, location_id,
+               assigned_to_user_id, created_by_user_id, created_at, updated_at,
+               maintenance_template_id, occurrence_at
+        FROM work_orders_archive
+    $view$;
+
+    EXECUTE $fn$
+    CREATE OR REPLACE FUNCTION archive_work_orders(
+        batch_size INTEGER DEFAULT 1000,
+        older_than INTERVAL DEFAULT '90 days'
+    )
+    RETURNS INTEGER AS $$
+    DECLARE
+        moved INTEGER;
+    BEGIN
+        -- Lets other triggers tell archival apart from user deletes
+        PERFORM set_config('app.archiving', 'on', true);
+
+        WITH batch AS (
+            SELECT id FROM work_orders
+            WHERE status IN ('Completed', 'Cancelled')
+              AND updated_at < NOW() - older_than
+            ORDER BY updated_at
+            LIMIT batch_size
+            FOR UPDATE SKIP LOCKED
+        ), moved_rows AS (
+            DELETE FROM work_orders w
+            USING batch b
+            WHERE w.id = b.id
+            RETURNING w.*
+        ), inserted AS (
+            INSERT INTO work_orders_archive (
+                id, title, description, status, priority, location_id,
+                assigned_to_user_id, created_by_user_id, created_at, updated_at,
+                maintenance_template_id, occurrence_at
+            )
+            SELECT id, title, description, status, priority, location_id,
+                   assigned_to_user_id, created_by_user_id, created_at, updated_at,
+                   maintenance_template_id, occurrence_at
+            FROM moved_rows
+            ON CONFLICT (id) DO NOTHING
+        )
+        SELECT count(*) INTO moved FROM moved_rows;
+
+        RETURN moved;
+    END;
+    $$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public
+    $fn$;
+END $do$;
+
+ALTER TABLE maintenance_templates ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view maintenance templates" ON maintenance_templates
+    FOR SELECT USING (auth.role() = 'authenticated');
+
+CREATE POLICY "Users can insert maintenance templates" ON maintenance_templates
+    FOR INSERT WITH CHECK (
+        auth.role() = 'authenticated' AND
+        created_by_user_id = auth.uid()
+    );
+
+CREATE POLICY "Users can update maintenance templates they created" ON maintenance_templates
+    FOR UPDATE USING (
+        auth.role() = 'authenticated' AND
+        created_by_user_id = auth.uid()
+    );
+
+CREATE POLICY "Users can delete maintenance templates they created" ON maintenance_templates
+    FOR DELETE USING (
+        auth.role() = 'authenticated' AND
+        created_by_user_id = auth.uid()
+    );
+
+-- Progress is only advanced by generate_maintenance_work_orders()
+CREATE OR REPLACE FUNCTION reset_maintenance_template_progress()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF auth.role() IS DISTINCT FROM 'service_role' THEN
+        NEW.last_generated_at := OLD.last_generated_at;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS protect_maintenance_template_progress ON maintenance_templates;
+CREATE TRIGGER protect_maintenance_template_progress
+    BEFORE UPDATE ON maintenance_templates
+    FOR EACH ROW EXECUTE FUNCTION reset_maintenance_template_progress();
+
+-- Generating only advances last_generated_at, which isn't a change to the
+-- template: updated_at stays put, so the scheduler's incremental reload
+-- doesn't fetch and re-evaluate every template that just generated
+DROP TRIGGER IF EXISTS set_maintenance_templates_updated_at ON maintenance_templates;
+CREATE TRIGGER set_maintenance_templates_updated_at BEFORE UPDATE ON maintenance_templates
+    FOR EACH ROW
+    WHEN (to_jsonb(NEW.*) - 'last_generated_at' - 'updated_at'
+          IS DISTINCT FROM to_jsonb(OLD.*) - 'last_generated_at' - 'updated_at')
+    EXECUTE FUNCTION update_updated_at_column();
+
+-- Materialize occurrences, given as [{"template_id": ..., "occurrence_at": ...}],
+-- as work orders in one statement and advance each template's progress.
+-- Occurrences already generated are skipped. New work orders get a 'create'
+-- history row with no user, if create_history_tables.sql has been applied.
+-- Returns the templates that still exist, with their progress, so the caller
+-- can forget deleted ones.
+CREATE OR REPLACE FUNCTION generate_maintenance_work_orders(occurrences JSONB)
+RETURNS TABLE (template_id UUID, last_generated_at TIMESTAMP WITH TIME ZONE) AS $$
+BEGIN
+    CREATE TEMP TABLE due ON COMMIT DROP AS
+        SELECT o.template_id, o.occurrence_at
+        FROM jsonb_to_recordset(occurrences)
+            AS o(template_id UUID, occurrence_at TIMESTAMP WITH TIME ZONE);
+
+    CREATE TEMP TABLE generated (id UUID) ON COMMIT DROP;
+
+    WITH inserted AS (
+        INSERT INTO work_orders (
+            title, description, priority, location_id, assigned_to_user_id,
+            created_by_user_id, maintenance_template_id, occurrence_at
+        )
+        SELECT t.title, t.description, t.priority, t.location_id, t.assigned_to_user_id,
+               t.created_by_user_id, t.id, d.occurrence_at
+        FROM due d
+        JOIN maintenance_templates t ON t.id = d.template_id
+        ORDER BY d.occurrence_at
+        ON CONFLICT ON CONSTRAINT work_orders_maintenance_occurrence_key DO NOTHING
+        RETURNING work_orders.id
+    )
+    INSERT INTO generated SELECT id FROM inserted;
+
+    IF to_regclass('work_order_history') IS NOT NULL THEN
+        -- Made by the scheduler, not by a user
+        INSERT INTO work_order_history (work_order_id, action, changed_by_user_id)
+        SELECT id, 'create', NULL FROM generated;
+    END IF;
+
+    RETURN QUERY
+    UPDATE maintenance_templates t
+    SET last_generated_at = GREATEST(t.last_generated_at, d.latest)
+    FROM (SELECT due.template_id, MAX(due.occurrence_at) AS latest
+          FROM due GROUP BY due.template_id) d
+    WHERE t.id = d.template_id
+    RETURNING t.id, t.last_generated_at;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+REVOKE ALL ON FUNCTION generate_maintenance_work_orders(JSONB) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION generate_maintenance_work_orders(JSONB) TO service_role;
@@ -0,0 +1,64 @@
+-- User profiles, used to expand work order assignees and creators
+-- (expand=assignee,creator). A row is created for every new auth user;
+-- existing users are backfilled. The API only reads id and full_name.
+-- Run after create_tables.sql. Safe on a project that already has a profiles
+-- table or its own handle_new_user()/on_auth_user_created signup trigger:
+-- everything here is either new under its own name or created only if missing.
+
+CREATE TABLE IF NOT EXISTS profiles (
+    id UUID PRIMARY KEY REFERENCES auth.users(id) ON DELETE CASCADE,
+    full_name TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+ALTER TABLE profiles ENABLE ROW LEVEL SECURITY;
+
+-- Other users' profiles are read by the API with the service key
+DO $do$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_policies
+        WHERE schemaname = 'public' AND tablename = 'profiles'
+          AND policyname = 'Users can view their own profile'
+    ) THEN
+        CREATE POLICY "Users can view their own profile" ON profiles
+            FOR SELECT USING (auth.uid() = id);
+    END IF;
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_policies
+        WHERE schemaname = 'public' AND tablename = 'profiles'
+          AND policyname = 'Users can update their own profile'
+    ) THEN
+        CREATE POLICY "Users can update their own profile" ON profiles
+            FOR UPDATE USING (auth.uid() = id);
+    END IF;
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_trigger
+        WHERE tgrelid = 'public.profiles'::regclass
+          AND tgname = 'update_profiles_updated_at'
+    ) THEN
+        CREATE TRIGGER update_profiles_updated_at BEFORE UPDATE ON profiles
+            FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+    END IF;
+END
+$do$;
+
+-- Its own function and trigger names, so an existing signup trigger is kept
+CREATE OR REPLACE FUNCTION create_profile_for_new_user()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO public.profiles (id, full_name)
+    VALUES (NEW.id, NEW.raw_user_meta_data->>'full_name')
+    ON CONFLICT (id) DO NOTHING;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+DROP TRIGGER IF EXISTS on_auth_user_created_profile ON auth.users;
+CREATE TRIGGER on_auth_user_created_profile AFTER INSERT ON auth.users
+    FOR EACH ROW EXECUTE FUNCTION create_profile_for_new_user();
+
+INSERT INTO profiles (id, full_name)
+SELECT id, raw_user_meta_data->>'full_name' FROM auth.users
+ON CONFLICT (id) DO NOTHING;
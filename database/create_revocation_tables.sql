@@ -0,0 +1,31 @@
+-- Revoked access tokens (POST /api/v1/auth/signout).
+-- Written and read only by the API through the service role; every worker
+-- polls rows newer than its last sync into an in-memory denylist.
+
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+    token_key TEXT PRIMARY KEY,
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    revoked_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_revoked_tokens_revoked_at ON revoked_tokens(revoked_at);
+CREATE INDEX IF NOT EXISTS idx_revoked_tokens_expires_at ON revoked_tokens(expires_at);
+
+-- No policies: only the service role (which bypasses RLS) can see this table
+ALTER TABLE revoked_tokens ENABLE ROW LEVEL SECURITY;
+
+-- Entries are useless once the token has expired anyway; schedule this,
+-- e.g. with pg_cron.
+CREATE OR REPLACE FUNCTION purge_revoked_tokens()
+RETURNS INTEGER AS $$
+DECLARE
+    purged INTEGER;
+BEGIN
+    DELETE FROM revoked_tokens WHERE expires_at < NOW();
+    GET DIAGNOSTICS purged = ROW_COUNT;
+    RETURN purged;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+REVOKE ALL ON FUNCTION purge_revoked_tokens() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION purge_revoked_tokens() TO service_role;
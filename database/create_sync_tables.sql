@@ -0,0 +1,54 @@
+-- Delta sync support for offline clients (GET /api/v1/work-orders/changes).
+-- Run after create_tables.sql (and create_archive_tables.sql if used).
+
+-- Changes are read in (updated_at, id) order
+CREATE INDEX IF NOT EXISTS idx_work_orders_updated_at ON work_orders(updated_at, id);
+
+-- Deletion log: one tombstone per deleted work order
+CREATE TABLE IF NOT EXISTS work_order_deletions (
+    work_order_id UUID PRIMARY KEY,
+    deleted_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_work_order_deletions_deleted_at
+    ON work_order_deletions(deleted_at, work_order_id);
+
+ALTER TABLE work_order_deletions ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view work order deletions" ON work_order_deletions
+    FOR SELECT USING (auth.role() = 'authenticated');
+
+-- Record a tombstone whenever a work order is deleted. Rows moved to the
+-- archive by archive_work_orders() are not deletions and are skipped.
+CREATE OR REPLACE FUNCTION log_work_order_deletion()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF current_setting('app.archiving', true) = 'on' THEN
+        RETURN OLD;
+    END IF;
+
+    INSERT INTO work_order_deletions (work_order_id, deleted_at)
+    VALUES (OLD.id, NOW())
+    ON CONFLICT (work_order_id) DO UPDATE SET deleted_at = EXCLUDED.deleted_at;
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE TRIGGER log_work_orders_deletion AFTER DELETE ON work_orders
+    FOR EACH ROW EXECUTE FUNCTION log_work_order_deletion();
+
+-- Tombstones only need to outlive the longest supported offline period
+-- (SYNC_TOMBSTONE_RETENTION_DAYS); schedule this, e.g. with pg_cron.
+CREATE OR REPLACE FUNCTION purge_work_order_deletions(older_than INTERVAL DEFAULT '30 days')
+RETURNS INTEGER AS $$
+DECLARE
+    purged INTEGER;
+BEGIN
+    DELETE FROM work_order_deletions WHERE deleted_at < NOW() - older_than;
+    GET DIAGNOSTICS purged = ROW_COUNT;
+    RETURN purged;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+REVOKE ALL ON FUNCTION purge_work_order_deletions(INTERVAL) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION purge_work_order_deletions(INTERVAL) TO service_role;
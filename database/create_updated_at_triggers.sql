@@ -0,0 +1,26 @@
+-- Make updated_at a strictly increasing row version.
+-- Delta sync, write-behind results and the API's work order cache all treat
+-- updated_at as the row version. The update_*_updated_at triggers from
+-- create_tables.sql already stamp it on every update, including writes that
+-- don't set it (bulk_update_work_orders, the SQL editor), but with NOW(): the
+-- transaction start time, so two updates of a row in one transaction, or in
+-- the same microsecond, get the same version. This redefines their function
+-- instead of adding a second trigger that theirs would overwrite.
+-- Run after create_tables.sql.
+
+CREATE OR REPLACE FUNCTION update_updated_at_column()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- Strictly increasing, even when the clock hasn't moved since the last write
+    NEW.updated_at := GREATEST(
+        clock_timestamp(),
+        COALESCE(OLD.updated_at, '-infinity') + INTERVAL '1 microsecond'
+    );
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Superseded by the above; remove them where an earlier version created them
+DROP TRIGGER IF EXISTS set_work_orders_updated_at ON work_orders;
+DROP TRIGGER IF EXISTS set_locations_updated_at ON locations;
+DROP FUNCTION IF EXISTS set_updated_at();